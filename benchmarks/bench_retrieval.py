@@ -0,0 +1,172 @@
+# benchmarks/bench_retrieval.py
+# ────────────────────────────────────────────────────────────────────────────
+# Relevance and latency of the phase-P2 retrievers on a synthetic corpus.
+#
+#   python benchmarks/bench_retrieval.py --chunks 100000 --queries 200
+#
+# The corpus has `--topics` topics, each with its own vocabulary; a chunk
+# mixes words of its topic with Zipf-distributed background words.  Two
+# query sets are scored:
+#
+#   exact    a few words sampled from one chunk – that chunk is relevant (MRR@10)
+#   topical  topic words *not* taken from any particular chunk – every chunk of
+#            the topic is relevant (precision@5)
+#
+# Retrievers compared:
+#
+#   tfidf-refit  the original fallback: fit a TfidfVectorizer per request
+#                (only timed up to `--refit-max` chunks)
+#   tfidf        tools.tfidf_index (persisted, query-only transform)
+#   vector       dense top-k via tools.vector_index; BeeAI is not available
+#                offline, so 64-d LSA vectors stand in for the embeddings
+#   bm25         tools.bm25_index
+#   hybrid       bm25 ⊕ vector, reciprocal rank fusion (what P2 uses)
+#
+# Latency is per query, excluding index construction (reported separately)
+# and, for `vector` / `hybrid`, excluding computing the query embedding
+# (a remote call in production).
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from tools.bm25_index import BM25Index, reciprocal_rank_fusion  # noqa: E402
+from tools.tfidf_index import TfidfIndex  # noqa: E402
+from tools.vector_index import normalize_rows, top_k_cosine  # noqa: E402
+
+K = 5
+DEPTH = 20
+
+
+def build_corpus(n_chunks: int, n_topics: int, rng: np.random.Generator):
+    topic_vocab = [[f"t{t}w{i}" for i in range(150)] for t in range(n_topics)]
+    background = np.array([f"bg{i}" for i in range(5000)])
+    zipf = 1.0 / np.arange(1, len(background) + 1)
+    zipf /= zipf.sum()
+
+    topics = rng.integers(0, n_topics, n_chunks)
+    texts = []
+    for t in topics:
+        words = list(rng.choice(topic_vocab[t], 25)) + list(rng.choice(background, 35, p=zipf))
+        rng.shuffle(words)
+        texts.append(" ".join(words))
+    return texts, topics, topic_vocab
+
+
+def make_queries(texts, topics, topic_vocab, n_queries, rng):
+    exact, topical = [], []
+    for _ in range(n_queries):
+        row = int(rng.integers(0, len(texts)))
+        words = texts[row].split()
+        exact.append((" ".join(rng.choice(words, 5, replace=False)), row))
+        t = int(rng.integers(0, len(topic_vocab)))
+        topical.append((" ".join(rng.choice(topic_vocab[t], 3, replace=False)), t))
+    return exact, topical
+
+
+def timed(fn, queries):
+    results, start = [], time.perf_counter()
+    for q, _ in queries:
+        results.append(fn(q))
+    return results, (time.perf_counter() - start) / max(len(queries), 1)
+
+
+def mrr(results, queries):
+    total = 0.0
+    for ranked, (_, target) in zip(results, queries):
+        if target in ranked[:10]:
+            total += 1.0 / (ranked.index(target) + 1)
+    return total / len(queries)
+
+
+def precision(results, queries, topics):
+    return float(np.mean([
+        np.mean([topics[r] == t for r in ranked[:K]]) if ranked else 0.0
+        for ranked, (_, t) in zip(results, queries)
+    ]))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="P2 retriever relevance + latency.")
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--topics", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--refit-max", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    texts, topics, topic_vocab = build_corpus(args.chunks, args.topics, rng)
+    exact, topical = make_queries(texts, topics, topic_vocab, args.queries, rng)
+    ids = [str(i) for i in range(len(texts))]
+    print(f"corpus: {len(texts)} chunks, {args.topics} topics, {args.queries} queries per set")
+
+    start = time.perf_counter()
+    tfidf = TfidfIndex()
+    tfidf.sync(list(zip(ids, texts)))
+    print(f"build tfidf  {time.perf_counter() - start:6.2f}s")
+
+    start = time.perf_counter()
+    bm25 = BM25Index(texts)
+    print(f"build bm25   {time.perf_counter() - start:6.2f}s")
+
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+
+    start = time.perf_counter()
+    hashed = HashingVectorizer(n_features=2 ** 18, alternate_sign=False, norm=None)
+    transformer = TfidfTransformer().fit(hashed.transform(texts))
+    svd = TruncatedSVD(64, random_state=args.seed)
+    vectors = normalize_rows(svd.fit_transform(transformer.transform(hashed.transform(texts))))
+
+    queries = [q for q, _ in exact + topical]
+    q_vecs = dict(zip(queries, svd.transform(transformer.transform(hashed.transform(queries)))))
+
+    def embed(q):
+        return q_vecs[q].astype(np.float32)
+
+    print(f"build vector {time.perf_counter() - start:6.2f}s  (LSA stand-in for embeddings)")
+
+    def refit(q):
+        vect = TfidfVectorizer(stop_words="english", max_features=5000)
+        matrix = vect.fit_transform(texts + [q])
+        sims = (matrix[:-1] @ matrix[-1].T).toarray().ravel()
+        return sims.argsort()[::-1][:DEPTH].tolist()
+
+    def vector(q):
+        return top_k_cosine(vectors, embed(q), DEPTH, normalized=True)
+
+    def hybrid(q):
+        return reciprocal_rank_fusion([bm25.top_k(q, DEPTH), vector(q)], DEPTH)
+
+    retrievers = {
+        "tfidf-refit": refit if len(texts) <= args.refit_max else None,
+        "tfidf": lambda q: [int(i) for i in tfidf.top_k(q, DEPTH)],
+        "vector": vector,
+        "bm25": lambda q: bm25.top_k(q, DEPTH),
+        "hybrid": hybrid,
+    }
+
+    print(f"\n{'retriever':<12} {'MRR@10':>7} {'P@5':>6} {'ms/query':>9}")
+    for name, fn in retrievers.items():
+        if fn is None:
+            print(f"{name:<12} {'–':>7} {'–':>6} {'skipped':>9}")
+            continue
+        sample = exact[:10] if name == "tfidf-refit" else exact
+        res_exact, t_exact = timed(fn, sample)
+        sample_t = topical[:10] if name == "tfidf-refit" else topical
+        res_topic, t_topic = timed(fn, sample_t)
+        latency = (t_exact + t_topic) / 2 * 1e3
+        print(
+            f"{name:<12} {mrr(res_exact, sample):7.3f} "
+            f"{precision(res_topic, sample_t, topics):6.3f} {latency:9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/bench_scan_zip.py
+# ────────────────────────────────────────────────────────────────────────────
+# Serial vs. parallel phase-Z scan on a synthetic archive.
+#
+#   python benchmarks/bench_scan_zip.py --members 50000 --workers 1 2 4 8
+#
+# Builds a deflated ZIP with `--members` small Python-ish files, renders the
+# tree once per worker count (1 = serial path) and checks that every parallel
+# rendering is byte-identical to the serial one.
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from tools.file_scanner import scan_zip  # noqa: E402
+
+
+def build_archive(path: Path, members: int, seed: int = 0) -> None:
+    """Write `members` deflated text files spread over a few hundred packages."""
+    rng = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "delta", "import", "class", "return", "self"]
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for i in range(members):
+            pkg = f"pkg{i % 311:03d}/sub{i % 17:02d}"
+            body = "\n".join(
+                " ".join(rng.choice(words) for _ in range(12)) for _ in range(40)
+            )
+            zf.writestr(f"{pkg}/module_{i:06d}.py", f"# module {i}\n{body}\n")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Serial vs. parallel phase-Z scan.")
+    parser.add_argument("--members", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "synthetic.zip"
+        t0 = time.perf_counter()
+        build_archive(archive, args.members)
+        print(
+            f"archive: {args.members} members, {archive.stat().st_size / 1e6:.1f} MB "
+            f"(built in {time.perf_counter() - t0:.1f}s)"
+        )
+
+        reference = None
+        for workers in sorted(set(args.workers)):
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                tree = scan_zip(str(archive), workers=workers)
+                timings.append(time.perf_counter() - start)
+            if reference is None:
+                reference = tree
+            identical = "identical" if tree == reference else "MISMATCH"
+            print(
+                f"workers={workers:<3} best={min(timings):.3f}s "
+                f"mean={sum(timings) / len(timings):.3f}s  {identical}"
+            )
+
+
+if __name__ == "__main__":
+    main()
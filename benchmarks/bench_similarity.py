@@ -0,0 +1,76 @@
+# benchmarks/bench_similarity.py
+# ────────────────────────────────────────────────────────────────────────────
+# Top-k cosine similarity: the old per-vector Python loop vs. the batched
+# NumPy path used by phase P2 (`tools.vector_index.top_k_cosine`).
+#
+#   python benchmarks/bench_similarity.py --chunks 1000 10000 100000 1000000
+#
+# Random float32 "embeddings" are generated per size.  The loop baseline is
+# only timed up to `--loop-max` chunks (it is minutes at 1M); the batched
+# path is timed on raw rows and on the index's pre-normalised rows, and its
+# top-k is checked against the baseline where both ran.
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from tools.vector_index import normalize_rows, top_k_cosine  # noqa: E402
+
+
+def loop_top_k(matrix: np.ndarray, query: np.ndarray, k: int):
+    """The pre-index implementation of `_rank_with_beeai`, kept for reference."""
+    sims = [(i, (query @ v) / (max((query**2).sum()**0.5, 1e-8) *
+                               max((v**2).sum()**0.5, 1e-8)))
+            for i, v in enumerate(matrix)]
+    sims.sort(key=lambda x: x[1], reverse=True)
+    return [idx for idx, _ in sims[:k]]
+
+
+def best_of(repeat: int, fn, *args, **kwargs):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Loop vs. batched top-k cosine.")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--loop-max", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    print(f"dim={args.dim} k={args.k}")
+    print(f"{'chunks':>9}  {'loop':>9}  {'numpy':>9}  {'prenorm':>9}  {'speedup':>8}  top-k")
+    for n in args.chunks:
+        matrix = rng.standard_normal((n, args.dim), dtype=np.float32)
+        query = rng.standard_normal(args.dim, dtype=np.float32)
+        unit = normalize_rows(matrix)
+
+        t_np, top_np = best_of(args.repeat, top_k_cosine, matrix, query, args.k)
+        t_pre, top_pre = best_of(args.repeat, top_k_cosine, unit, query, args.k, normalized=True)
+        if n <= args.loop_max:
+            t_loop, top_loop = best_of(1, loop_top_k, matrix, query, args.k)
+            check = "same" if top_loop == top_np == top_pre else "DIFFERENT"
+            loop_col, speedup = f"{t_loop * 1e3:8.1f}ms", f"{t_loop / t_pre:7.0f}x"
+        else:
+            check = "same" if top_np == top_pre else "DIFFERENT"
+            loop_col, speedup = f"{'–':>10}", f"{'–':>8}"
+        print(
+            f"{n:>9}  {loop_col}  {t_np * 1e3:7.1f}ms  {t_pre * 1e3:7.1f}ms  {speedup}  {check}"
+        )
+        del matrix, unit
+
+
+if __name__ == "__main__":
+    main()
@@ -8,20 +8,50 @@ planning and generation steps do not violate existing conventions.
 
 Strategy
 ────────
-1.  Collect candidate text chunks:  
-      • Any local `docs/*.md` and `docs/*.rst` files  
-      • Top-level `README.md`  
-2.  Represent each chunk by an embedding vector (BeeAI or fallback).  
+1.  Collect candidate text chunks from the **uploaded archive**
+    (`MEM["zip_path"]`, set by phase Z), streamed without extraction by
+    `tools.zip_docs`:  
+      • READMEs / ARCHITECTURE / CONTRIBUTING files at any depth  
+      • `.md` / `.rst` / `.txt` files anywhere under `docs/`  
+      • Architecture decision records  
+      • Module docstrings of `.py` files  
+    Documents are split by `tools.chunker` along Markdown / reST headings
+    and code fences into token-bounded, overlapping chunks with stable
+    content-hash ids.  The chunk list is cached per archive fingerprint,
+    so resubmitting the same ZIP does not decompress anything.  Without an archive (e.g. when
+    the agent is run by hand) the local `docs/*.md`, `docs/*.rst` and
+    `README.md` are used instead.  
+2.  Represent each chunk by an embedding vector (BeeAI or fallback).
+    Vectors live in a persistent, content-hash-keyed index
+    (`tools.vector_index`), so only new or edited chunks are embedded.  
 3.  Embed the **user prompt + constraints** as a query.  
 4.  Return the *k* most similar snippets (default k=5) and stash them in
     `MEM["architecture_snippets"]`.
 
-If BeeAI embeddings are **not** installed we fall back to a trivial
-TF-IDF cosine similarity using `sklearn.feature_extraction.text`.
+If BeeAI embeddings are **not** installed we fall back to TF-IDF cosine
+similarity (`tools.tfidf_index`): term counts are hashed, persisted per
+corpus (the archive's file name plus fingerprint, or "local" for cwd
+docs) and updated incrementally when chunks appear or disappear, so a
+resubmitted archive only transforms the query and edited local docs only
+cost their changed chunks.
+At most ``TFIDF_MAX_CORPORA`` corpora are kept on disk.
+
+Retrievers (`Settings.P2_RETRIEVER`)
+────────────────────────────────────
+* ``hybrid`` (default) – a BM25 inverted index (`tools.bm25_index`) over
+  the doc chunks *plus* one outline line per class / function of the
+  archive's `.py` files (phase S, ``MEM["symbol_index"]``), fused by
+  reciprocal rank fusion with the vector ranking (embeddings, or TF-IDF
+  without BeeAI) of the doc chunks.
+* ``embedding`` / ``tfidf`` – a single vector ranking, as before.
+* ``bm25`` – lexical only (docs + symbols).
 
 Environment variables
 ─────────────────────
 `EMBED_FALLBACK_K` – override k (default 5).
+`EMBED_INDEX_DIR`  – where the embedding index is stored.
+`TFIDF_INDEX_DIR`  – where the per-corpus TF-IDF indexes are stored.
+`P2_RETRIEVER`     – hybrid | embedding | tfidf | bm25.
 
 Security
 ────────
@@ -32,63 +62,85 @@ string processing.
 from __future__ import annotations
 
 import glob
+import json
 import logging
 import os
+import re
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Tuple
+from typing import Any, Callable, List, Tuple
 
-from memory import MEM
+from memory import Memory, resolve
 from config import Settings
+from tools.tree_cache import TreeCache, archive_fingerprint
+from tools.bm25_index import BM25Index, reciprocal_rank_fusion
+from tools.chunker import CHUNKER_VERSION, chunk_document
+from tools.zip_docs import iter_docs
 
 _LOG = logging.getLogger(__name__)
 _CFG = Settings()
 
+# Chunk lists keyed by archive fingerprint; shares the phase-Z cache directory.
+_CHUNK_CACHE = TreeCache(_CFG.TREE_CACHE_DIR, _CFG.TREE_CACHE_MAX_BYTES)
+
 # ──────────────────────────────────────────────────────────────────────────
 # Optional BeeAI embedding path
 # ──────────────────────────────────────────────────────────────────────────
 try:
     from beeai.embeddings import EmbeddingClient  # type: ignore
+    import numpy as np
+
+    from tools.vector_index import EmbeddingIndex, top_k_cosine
     _BEEAI_AVAILABLE = True
 except ModuleNotFoundError:
     _BEEAI_AVAILABLE = False
 
-# Fallback: sklearn TF-IDF
+# Fallback: persisted TF-IDF (needs scikit-learn + scipy)
 try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
+    from tools.tfidf_index import TfidfIndex, prune_indexes
+    from tools.vector_index import content_hash
     _SKLEARN_OK = True
 except ModuleNotFoundError:
     _SKLEARN_OK = False
 
 
-def run() -> None:
+def run(mem: Memory | None = None) -> None:
     """
     Execute phase P2.  Writes `architecture_snippets` (List[str]) to MEM.
     """
-    user_prompt: str | None = MEM.get("user_prompt")
-    tree: str | None = MEM.get("tree")
+    mem = resolve(mem)
+    user_prompt: str | None = mem.get("user_prompt")
+    tree: str | None = mem.get("tree")
     if not user_prompt or not tree:
         _LOG.warning("architecture_lookup_agent: missing prompt or tree; nothing to do.")
-        MEM.put("architecture_snippets", [])
+        mem.put("architecture_snippets", [])
         return
 
-    docs = _collect_docs()
-    if not docs:
-        MEM.put("architecture_snippets", [])
-        _LOG.info("No docs/*.md found – skipping architecture recall.")
+    zip_path: str | None = mem.get("zip_path")
+    fingerprint = archive_fingerprint(zip_path) if zip_path else ""
+    corpus = _corpus_name(zip_path, fingerprint) if zip_path else "local"
+    snippets: List[Tuple[str, str]] = (
+        _archive_chunks(zip_path, fingerprint) if zip_path else _split_docs(_collect_docs())
+    )
+    if not snippets:
+        mem.put("architecture_snippets", [])
+        _LOG.info("No design docs found – skipping architecture recall.")
         return
 
     top_k = int(os.getenv("EMBED_FALLBACK_K", 5))
-    snippets: List[Tuple[str, str]] = _split_docs(docs)
-
-    best = (
-        _rank_with_beeai(user_prompt, snippets, k=top_k)
-        if _BEEAI_AVAILABLE
-        else _rank_with_tfidf(user_prompt, snippets, k=top_k)
+    mode = _CFG.P2_RETRIEVER
+    symbol_index = mem.get("symbol_index")  # phase S
+    symbols = (
+        symbol_index.outline()
+        if symbol_index is not None and mode in ("hybrid", "bm25")
+        else []
     )
 
+    best = _rank(user_prompt, snippets, symbols, k=top_k, corpus=corpus, mode=mode)
+
     only_text = [txt for _, txt in best]
-    MEM.put("architecture_snippets", only_text)
+    mem.put("architecture_snippets", only_text)
     _LOG.info("Phase P2 completed – surfaced %d architecture snippets", len(only_text))
 
 
@@ -104,46 +156,163 @@ def _collect_docs() -> List[Path]:
     return paths
 
 
+def _corpus_name(zip_path: str, fingerprint: str) -> str:
+    """
+    Corpus identity of an archive: its file name plus its fingerprint.  The
+    web app saves every upload under the same name, so the name alone would
+    make unrelated projects share (and keep re-syncing) one index.
+    """
+    name = re.sub(r"[^\w.-]", "_", Path(zip_path).name)
+    return f"zip-{name}-{fingerprint[:16]}"
+
+
+def _archive_chunks(zip_path: str, fingerprint: str) -> List[Tuple[str, str]]:
+    """Chunks of the archive's docs, served from `_CHUNK_CACHE` when possible."""
+    key = _CHUNK_CACHE.key(
+        fingerprint,
+        kind="p2-chunks",
+        chunker=CHUNKER_VERSION,
+        tokens=_CFG.CHUNK_TOKENS,
+        overlap=_CFG.CHUNK_OVERLAP_TOKENS,
+    )
+    cached = _CHUNK_CACHE.get(key)
+    if cached is not None:
+        return [tuple(c) for c in json.loads(cached)]
+
+    chunks: List[Tuple[str, str]] = []
+    for name, text in iter_docs(zip_path):
+        chunks.extend(_split_text(name, text))
+    _CHUNK_CACHE.put(key, json.dumps(chunks))
+    return chunks
+
+
 def _split_docs(paths: List[Path]) -> List[Tuple[str, str]]:
     """
-    Split each doc into smaller paragraphs for finer-grained matching.
+    Split each doc into heading-aware chunks for finer-grained matching.
 
-    Returns list of tuples (source_id, paragraph_text).
+    Returns list of tuples (source_id, chunk_text).
     """
     chunks: List[Tuple[str, str]] = []
     for p in paths:
-        text = p.read_text(encoding="utf-8", errors="ignore")
-        for para in text.split("\n\n"):
-            para_clean = para.strip()
-            if len(para_clean) > 40:  # ignore trivial lines
-                source = f"{p.name}:{hash(para_clean) & 0xffff}"
-                chunks.append((source, para_clean))
+        chunks.extend(_split_text(p.name, p.read_text(encoding="utf-8", errors="ignore")))
     return chunks
 
 
+def _split_text(name: str, text: str) -> List[Tuple[str, str]]:
+    """Structure-aware chunks of one document (see `tools.chunker`)."""
+    return [
+        (c.source, c.text)
+        for c in chunk_document(
+            name,
+            text,
+            max_tokens=_CFG.CHUNK_TOKENS,
+            overlap_tokens=_CFG.CHUNK_OVERLAP_TOKENS,
+        )
+    ]
+
+
+# ── Retriever selection ──────────────────────────────────────────────────
+def _rank(
+    query: str,
+    docs: List[Tuple[str, str]],
+    symbols: List[Tuple[str, str]],
+    k: int,
+    corpus: str,
+    mode: str = "hybrid",
+) -> List[Tuple[str, str]]:
+    """Dispatch on `mode` (see "Retrievers" in the module docstring)."""
+    if mode == "bm25":
+        return _rank_with_bm25(query, docs + symbols, k, corpus)
+    if mode == "hybrid":
+        depth = max(4 * k, 20)  # candidates per ranking before fusion
+        lexical = _rank_with_bm25(query, docs + symbols, depth, corpus)
+        dense = _rank_dense(query, docs, depth, corpus)
+        return reciprocal_rank_fusion([lexical, dense], k)
+    if mode == "embedding" and not _BEEAI_AVAILABLE:
+        _LOG.warning("P2_RETRIEVER=embedding but BeeAI is not installed – using TF-IDF")
+    return _rank_dense(query, docs, k, corpus, embeddings=mode != "tfidf")
+
+
+def _rank_dense(
+    query: str,
+    chunks: List[Tuple[str, str]],
+    k: int,
+    corpus: str,
+    embeddings: bool = True,
+) -> List[Tuple[str, str]]:
+    if _BEEAI_AVAILABLE and embeddings:
+        return _rank_with_beeai(query, chunks, k=k)
+    return _rank_with_tfidf(query, chunks, k=k, corpus=corpus)
+
+
+# Loaded per-corpus indexes, least recently used dropped first.
+_MAX_CORPORA = 8
+_CORPORA: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+_CORPORA_LOCK = threading.Lock()
+
+
+def _corpus_index(kind: str, corpus: str, factory: Callable[[], Any]) -> Any:
+    """Return the cached index `(kind, corpus)`, building it with `factory` on a miss."""
+    key = (kind, corpus)
+    with _CORPORA_LOCK:
+        index = _CORPORA.get(key)
+        if index is not None:
+            _CORPORA.move_to_end(key)
+            return index
+    index = factory()  # built outside the lock; a racing duplicate is harmless
+    with _CORPORA_LOCK:
+        index = _CORPORA.setdefault(key, index)
+        _CORPORA.move_to_end(key)
+        while len(_CORPORA) > _MAX_CORPORA:
+            _CORPORA.popitem(last=False)
+    return index
+
+
 # ── BeeAI embedding route ────────────────────────────────────────────────
+_EMBED_MODEL = "mini"
+_INDEX: "EmbeddingIndex | None" = None
+
+
+def _embedding_index() -> "EmbeddingIndex":
+    """Process-wide index for the embedding model, opened on first use."""
+    global _INDEX  # pylint: disable=global-statement
+    if _INDEX is None:
+        _INDEX = EmbeddingIndex(Path(_CFG.EMBED_INDEX_DIR) / _EMBED_MODEL)
+    return _INDEX
+
+
 def _rank_with_beeai(query: str, chunks: List[Tuple[str, str]], k: int):
-    embedder = EmbeddingClient(model="mini")
-    vectors = embedder.encode([c[1] for c in chunks])
-    q_vec = embedder.encode([query])[0]
-    # cosine similarity
-    sims = [(i, (q_vec @ v) / (max((q_vec**2).sum()**0.5, 1e-8) *
-                               max((v**2).sum()**0.5, 1e-8)))
-            for i, v in enumerate(vectors)]
-    sims.sort(key=lambda x: x[1], reverse=True)
-    best = [chunks[idx] for idx, _ in sims[:k]]
-    return best
+    embedder = EmbeddingClient(model=_EMBED_MODEL)
+    vectors = _embedding_index().embed([c[1] for c in chunks], embedder.encode)
+    q_vec = np.asarray(embedder.encode([query])[0], dtype=np.float32)
+    return [chunks[i] for i in top_k_cosine(vectors, q_vec, k, normalized=True)]
 
 
 # ── TF-IDF fallback ──────────────────────────────────────────────────────
-def _rank_with_tfidf(query: str, chunks: List[Tuple[str, str]], k: int):
+def _rank_with_tfidf(query: str, chunks: List[Tuple[str, str]], k: int, corpus: str = "local"):
     if not _SKLEARN_OK:
         _LOG.warning("sklearn not available – returning first %d chunks", k)
         return chunks[:k]
 
-    texts = [c[1] for c in chunks]
-    vect = TfidfVectorizer(stop_words="english", max_features=5000)
-    matrix = vect.fit_transform(texts + [query])
-    sims = cosine_similarity(matrix[-1], matrix[:-1]).flatten()
-    best_idx = sims.argsort()[::-1][:k]
-    return [chunks[i] for i in best_idx]
+    by_id = {content_hash(c[1]): c for c in chunks}
+    index = _corpus_index("tfidf", corpus, lambda: _open_tfidf(corpus))
+    ids = index.search([(cid, c[1]) for cid, c in by_id.items()], query, k)
+    return [by_id[cid] for cid in ids]
+
+
+def _open_tfidf(corpus: str) -> "TfidfIndex":
+    """Load (or start) the corpus's index, pruning stale corpora first."""
+    root = Path(_CFG.TFIDF_INDEX_DIR)
+    directory = root / corpus
+    if directory.exists():
+        os.utime(directory)  # keep the corpus we are about to use
+    prune_indexes(root, _CFG.TFIDF_MAX_CORPORA)
+    return TfidfIndex(directory)
+
+
+# ── BM25 (lexical side of the hybrid retriever) ──────────────────────────
+def _rank_with_bm25(query: str, chunks: List[Tuple[str, str]], k: int, corpus: str = "local"):
+    # The chunk list is part of the key: "local" docs may change between runs.
+    kind = f"bm25:{hash(tuple(chunks)):x}"
+    index = _corpus_index(kind, corpus, lambda: BM25Index([c[1] for c in chunks]))
+    return [chunks[i] for i in index.top_k(query, k)]
@@ -9,10 +9,14 @@ High-level flow
 1.  Read **feature_spec**, **tasks**, and **constraints** from the
     shared blackboard.
 2.  If NEW file  →  generate a skeleton using BeeAI CodeAssistant
-    (Watsonx backend).  Fallback to a deterministic template if the
+    (Watsonx backend).  The prompt lists the existing classes / functions
+    most relevant to the tasks (phase S symbol index, token-budgeted) so
+    imports and calls target real signatures.  Fallback to a deterministic template if the
     API is unavailable (e.g. tests/offline mode).
 3.  If EXISTING file  →  ask CodeAssistant to *append* or *modify*
-    specific sections (guided by the numbered tasks).
+    specific sections (guided by the numbered tasks).  On a P5⇄D1 retry the
+    file written by the previous attempt is revised this way, guided by the
+    tasks `self_refine_agent` rewrote from the failure.
 4.  Validate the generated code:
       • Parse with `ast.parse()` to guarantee syntactic validity.  
       • Reject if any top-level *executable* statements exist
@@ -22,7 +26,9 @@ High-level flow
 6.  **requirements.txt** auto-update: for each new `import` whose top-level
     module isn’t already present in *requirements.txt*, append it.
 7.  Store a human-readable `patch_summary` string in `MEM` so that
-    `doc_assembler_agent` can include it in the recap.
+    `doc_assembler_agent` can include it in the recap, and the written
+    paths / buffers under `changed_files` / `changed_sources` so D1 can
+    check only what changed, in memory.
 
 Security guard-rails
 ────────────────────
@@ -40,6 +46,18 @@ This file expects:
 If BeeAI is not installed we automatically fallback to the deterministic
 template, keeping tests green without external API calls.
 
+CodeAssistant clients are created lazily and pooled per (model,
+temperature): the auth handshake happens once per process instead of on
+every P5⇄D1 attempt.
+
+Speculative mode
+────────────────
+`run` is `generate_candidate` (steps 1–4, nothing written) followed by
+`commit_candidate` (steps 5–7).  With `P5_SPECULATIVE` the workflow calls
+`run_speculative` instead: several candidates at different temperatures
+are generated concurrently, each is pre-checked in memory by
+`static_checker_agent.precheck`, and the first clean one is committed.
+
 """
 
 from __future__ import annotations
@@ -49,11 +67,17 @@ import importlib.util
 import logging
 import pathlib
 import re
-from typing import Dict, Any, List
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, NamedTuple, Tuple
 
-from memory import MEM
+from memory import Memory, resolve
 from config import Settings
+from agents import static_checker_agent
 from tools.diff_generator import create_patch
+from tools.token_budget import trim_text
 
 try:
     from beeai.codeassistant import CodeAssistant  # type: ignore
@@ -63,19 +87,42 @@ except ModuleNotFoundError:  # graceful offline fallback
 _LOG = logging.getLogger(__name__)
 _CFG = Settings()
 
+# Pooled CodeAssistant clients keyed by (model, temperature)
+_ASSISTANTS: Dict[Tuple[str, float], Any] = {}
+_ASSISTANTS_LOCK = threading.Lock()
+
 # ---------------------------------------------------------------------- #
 # Public API                                                             #
 # ---------------------------------------------------------------------- #
-def run() -> None:
+class Candidate(NamedTuple):
+    """One generated (not yet written) version of the target file."""
+
+    path: pathlib.Path
+    code: str
+    old_text: str          # "" when the file is new
+    temperature: float
+    elapsed_ms: float
+
+
+def run(mem: Memory | None = None) -> None:
     """
     Main entry for phase P5.  Ensures that:
     • Generated code is syntactically correct
     • No top-level executable statements sneak in
     • requirements.txt is updated when needed
     """
-    feature_spec: Dict[str, Any] | None = MEM.get("feature_spec")
-    constraints: Dict[str, Any] | None = MEM.get("constraints")
-    tasks: List[str] | None = MEM.get("tasks")
+    mem = resolve(mem)
+    commit_candidate(mem, generate_candidate(mem))
+
+
+def generate_candidate(mem: Memory, temperature: float | None = None) -> Candidate:
+    """
+    Generate and validate the code for the target file *without* writing
+    anything.  Raises ``RuntimeError`` like :func:`run` on unsafe output.
+    """
+    feature_spec: Dict[str, Any] | None = mem.get("feature_spec")
+    constraints: Dict[str, Any] | None = mem.get("constraints")
+    tasks: List[str] | None = mem.get("tasks")
 
     if not (feature_spec and constraints):
         raise RuntimeError("code_writer_agent: missing feature_spec or constraints.")
@@ -83,21 +130,41 @@ def run() -> None:
     path = pathlib.Path("src") / "agents" / f"{feature_spec['className'].lower()}.py"
     non_destructive = constraints.get("nonDestructive", True)
 
+    # A file this run already wrote (an earlier P5⇄D1 attempt, or before a
+    # --resume) is ours to revise
+    resolved = str(path.resolve())
+    owned = resolved in (mem.get("changed_files") or []) or resolved in (
+        mem.get("p5_created") or []
+    )
+
     # ── Safeguard: do not overwrite existing file in non-destructive mode ──
-    if non_destructive and path.exists():
+    if non_destructive and path.exists() and not owned:
         raise RuntimeError(
             f"Refusing to overwrite existing file {path} with nonDestructive=True"
         )
 
     # ─── Generate (or patch) code ────────────────────────────────────────
+    if temperature is None:
+        temperature = _CFG.LLM_TEMPERATURE
+    started = time.perf_counter()
     if not path.exists():
-        code = _generate_new_agent(feature_spec, tasks)
+        code = _generate_new_agent(
+            feature_spec, tasks, _symbol_notes(mem, tasks), temperature=temperature
+        )
         old_text = ""
     else:
-        code, old_text = _patch_existing_agent(path.read_text(), feature_spec, tasks)
+        code, old_text = _patch_existing_agent(
+            path.read_text(), feature_spec, tasks, temperature=temperature
+        )
 
     # ─── Validate AST & security guard rails ────────────────────────────
     _validate_code_safe(code, feature_spec["className"])
+    return Candidate(path, code, old_text, temperature, (time.perf_counter() - started) * 1000)
+
+
+def commit_candidate(mem: Memory, candidate: Candidate) -> None:
+    """Write `candidate` to disk and publish the diff / summary for D1 and P6."""
+    path, code, old_text = candidate.path, candidate.code, candidate.old_text
 
     # ─── Write file + produce diff summary ──────────────────────────────
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -106,14 +173,105 @@ def run() -> None:
     diff = create_patch(old_text, code, str(path))
     _update_requirements_if_needed(code)
 
+    created = set(mem.get("p5_created") or [])
+    if not old_text:
+        created.add(str(path.resolve()))
+        mem.put("p5_created", sorted(created))
     summary_lines = [
-        f"Created {path}" if not old_text else f"Patched {path}",
+        f"Created {path}" if str(path.resolve()) in created else f"Patched {path}",
         f"Lines changed: {diff.countlines() if hasattr(diff, 'countlines') else 'n/a'}",
     ]
-    MEM.put("patch_summary", "\n".join(summary_lines))
-    MEM.put("latest_diff", diff)
+    mem.put("patch_summary", "\n".join(summary_lines))
+    mem.put("latest_diff", diff)
+    mem.put("changed_files", [str(path.resolve())])
+    mem.put("changed_sources", {str(path.resolve()): code})
+
+    _LOG.info(
+        "Phase P5 complete – wrote %s bytes to %s (generated in %.0f ms)",
+        len(code),
+        path,
+        candidate.elapsed_ms,
+    )
+
+
+def run_speculative(mem: Memory | None = None) -> None:
+    """
+    Speculative P5: generate up to `P5_CANDIDATES` candidates concurrently
+    (temperatures spread by `P5_TEMPERATURE_STEP`), pre-check each buffer
+    in memory with D1's AST checks and commit the first clean one.
+    Candidates not yet started are cancelled; calls already in flight
+    finish in the background and are discarded.  If none is clean, the one
+    with the fewest diagnostics is committed so D1 reports it as usual.
+
+    `P5_MAX_CANDIDATES` caps the generations per run (counted across the
+    P5⇄D1 loop in ``mem["p5_candidates"]``); once it is spent, or without
+    an LLM backend, this degrades to a single :func:`run`.
+    """
+    mem = resolve(mem)
+    stats = mem.get("p5_candidates") or {"generated": 0, "discarded": 0, "rounds": 0}
+    budget = _CFG.P5_MAX_CANDIDATES - stats["generated"]
+    width = min(_CFG.P5_CANDIDATES, budget) if CodeAssistant else 1
+    if width <= 1:
+        stats["generated"] += 1
+        stats["rounds"] += 1
+        mem.put("p5_candidates", stats)
+        run(mem)
+        return
 
-    _LOG.info("Phase P5 complete – wrote %s bytes to %s", len(code), path)
+    base = _CFG.LLM_TEMPERATURE
+    temperatures = [
+        round(min(1.0, base + i * _CFG.P5_TEMPERATURE_STEP), 2) for i in range(width)
+    ]
+    stop = threading.Event()
+    launched: List[float] = []  # list.append is atomic – counts LLM calls made
+
+    def attempt(temperature: float):
+        if stop.is_set():
+            return None
+        launched.append(temperature)
+        candidate = generate_candidate(mem, temperature)
+        return candidate, static_checker_agent.precheck(candidate.path, candidate.code)
+
+    winner: Candidate | None = None
+    scored: List[Tuple[int, Candidate]] = []
+    errors: List[BaseException] = []
+    pool = ThreadPoolExecutor(max_workers=width, thread_name_prefix="p5-candidate")
+    try:
+        futures = [
+            pool.submit(contextvars.copy_context().run, attempt, t) for t in temperatures
+        ]
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as exc:  # noqa: BLE001 – one bad candidate is not fatal
+                errors.append(exc)
+                continue
+            if result is None:
+                continue
+            candidate, diagnostics = result
+            if not diagnostics:
+                winner = candidate
+                break
+            scored.append((len(diagnostics), candidate))
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    stats["generated"] += len(launched)
+    stats["discarded"] += len(launched) - 1
+    stats["rounds"] += 1
+    mem.put("p5_candidates", stats)
+
+    if winner is None and scored:
+        winner = min(scored, key=lambda item: item[0])[1]
+    if winner is None:
+        raise errors[0]
+    _LOG.info(
+        "Speculative P5 – committing candidate at temperature %.2f (%d generated)",
+        winner.temperature,
+        len(launched),
+    )
+    commit_candidate(mem, winner)
 
 
 # ---------------------------------------------------------------------- #
@@ -135,22 +293,67 @@ class {className}:
 """.lstrip()
 
 
-def _generate_new_agent(spec: Dict[str, Any], tasks: List[str] | None) -> str:
+def _get_assistant(model: str | None = None, temperature: float | None = None) -> Any:
+    """
+    Return the pooled CodeAssistant for (model, temperature), creating it on
+    first use.  Defaults come from `Settings`.
+    """
+    key = (
+        model or _CFG.DEFAULT_LLM_MODEL_ID,
+        _CFG.LLM_TEMPERATURE if temperature is None else temperature,
+    )
+    with _ASSISTANTS_LOCK:
+        assistant = _ASSISTANTS.get(key)
+        if assistant is None:
+            started = time.perf_counter()
+            assistant = CodeAssistant(
+                backend="watsonx",
+                model=key[0],
+                api_key=_CFG.WATSONX_API_KEY,
+                project_id=_CFG.WATSONX_PROJECT_ID,
+                temperature=key[1],
+            )
+            _ASSISTANTS[key] = assistant
+            _LOG.info(
+                "CodeAssistant created for model=%s temperature=%s in %.0f ms",
+                key[0],
+                key[1],
+                (time.perf_counter() - started) * 1000,
+            )
+    return assistant
+
+
+def _symbol_notes(mem: Memory, tasks: List[str] | None) -> str:
+    """Existing APIs relevant to the tasks, ranked and trimmed to a quarter of the prompt budget."""
+    symbol_index = mem.get("symbol_index")
+    if symbol_index is None or not _CFG.SYMBOL_PROMPT_K:
+        return ""
+    query = " ".join([mem.get("user_prompt") or ""] + list(tasks or []))
+    outline = symbol_index.render(symbol_index.rank(query, _CFG.SYMBOL_PROMPT_K))
+    return trim_text(outline, _CFG.PROMPT_TOKEN_BUDGET // 4, keep="head")
+
+
+def _generate_new_agent(
+    spec: Dict[str, Any],
+    tasks: List[str] | None,
+    symbol_notes: str = "",
+    temperature: float | None = None,
+) -> str:
     """Return brand-new agent code either via BeeAI CodeAssistant or static template."""
     if CodeAssistant:  # happy path – use LLM to flesh out skeleton
-        assistant = CodeAssistant(
-            backend="watsonx",
-            model=_CFG.DEFAULT_LLM_MODEL_ID,
-            api_key=_CFG.WATSONX_API_KEY,
-            project_id=_CFG.WATSONX_PROJECT_ID,
-            temperature=_CFG.LLM_TEMPERATURE,
-        )
+        assistant = _get_assistant(temperature=temperature)
 
         user_prompt = (
             "Create a Python agent class file that satisfies the following spec:\n"
             f"{spec}\n"
             "Tasks it must support:\n"
             + "\n".join(f"- {t}" for t in (tasks or []))
+            + (
+                "\n\nExisting code you may import / call (use these exact signatures):\n"
+                + symbol_notes
+                if symbol_notes
+                else ""
+            )
             + "\n\nRules:\n"
             "* All executable code must live under class / function bodies.\n"
             "* No top-level network or filesystem calls.\n"
@@ -167,6 +370,7 @@ def _patch_existing_agent(
     old_code: str,
     spec: Dict[str, Any],
     tasks: List[str] | None,
+    temperature: float | None = None,
 ) -> tuple[str, str]:
     """
     Use BeeAI CodeAssistant *edit* mode to revise an existing agent.
@@ -174,13 +378,7 @@ def _patch_existing_agent(
     to the end of the file.
     """
     if CodeAssistant:
-        assistant = CodeAssistant(
-            backend="watsonx",
-            model=_CFG.DEFAULT_LLM_MODEL_ID,
-            api_key=_CFG.WATSONX_API_KEY,
-            project_id=_CFG.WATSONX_PROJECT_ID,
-            temperature=_CFG.LLM_TEMPERATURE,
-        )
+        assistant = _get_assistant(temperature=temperature)
         code = assistant.edit_file(
             old_code,
             instruction="Apply the following tasks while preserving style:\n"
@@ -6,6 +6,7 @@ the final Markdown recap.  This includes:
 
   • The user’s original constraints and new feature specification  
   • A summary of what files were created or patched  
+  • How many P5⇄D1 attempts it took to pass the static checks
   • A “post-update” directory tree (depth ≤3)
 
 The resulting recap is stored under MEM["final_answer"], which is returned
@@ -16,20 +17,22 @@ from __future__ import annotations
 
 import subprocess
 import textwrap
-from typing import Any
+from typing import Any, List
 
-from memory import MEM
+from memory import Memory, resolve
 
 
-def run() -> None:
+def run(mem: Memory | None = None) -> None:
     """
     Execute phase P6:
 
     1.  Run a shell command to list all files (depth ≤3) under the project root.
     2.  Retrieve `constraints`, `feature_spec`, and `patch_summary` from memory.
-    3.  Format a Markdown recap string combining these pieces.
+    3.  Format a Markdown recap string combining these pieces (plus the
+        attempts-to-green of the P5⇄D1 loop).
     4.  Store the recap under MEM["final_answer"].
     """
+    mem = resolve(mem)
     # ── 1. Capture the post-patch file tree (max depth 3) ────────────────
     proc = subprocess.run(
         ["bash", "-lc", "find . -maxdepth 3 -type f | sort"],
@@ -40,9 +43,9 @@ def run() -> None:
     tree_after = proc.stdout.strip()
 
     # ── 2. Pull data from memory ─────────────────────────────────────────
-    constraints: dict[str, Any] = MEM.get("constraints") or {}
-    spec: dict[str, Any] = MEM.get("feature_spec") or {}
-    patch_summary: str = MEM.get("patch_summary") or "(no summary available)"
+    constraints: dict[str, Any] = mem.get("constraints") or {}
+    spec: dict[str, Any] = mem.get("feature_spec") or {}
+    patch_summary: str = mem.get("patch_summary") or "(no summary available)"
 
     # ── 3. Build the Markdown recap ─────────────────────────────────────
     recap = textwrap.dedent(f"""
@@ -60,5 +63,30 @@ def run() -> None:
         ```
     """).strip()
 
+    checks = _checks_summary(mem)
+    if checks:
+        recap = f"{recap}\n\n{checks}"
+
     # ── 4. Store the final recap in shared memory ───────────────────────
-    MEM.put("final_answer", recap)
+    mem.put("final_answer", recap)
+
+
+def _checks_summary(mem: Memory) -> str:
+    """Attempts-to-green of the P5⇄D1 loop (empty if the loop did not run)."""
+    attempts = mem.get("p5_attempts")
+    if not attempts:
+        return ""
+    lines: List[str] = [
+        "## Static checks",
+        f"* Passed after **{attempts}** attempt{'s' if attempts != 1 else ''}",
+    ]
+    for entry in mem.get("p5_history") or []:
+        if not entry.get("passed"):
+            lines.append(f"* Attempt {entry['attempt']} failed: `{entry.get('error') or '?'}`")
+    candidates = mem.get("p5_candidates")
+    if candidates:
+        lines.append(
+            f"* Speculative candidates: {candidates['generated']} generated, "
+            f"{candidates['discarded']} discarded"
+        )
+    return "\n".join(lines)
@@ -33,8 +33,8 @@ import re
 import textwrap
 from typing import Dict, Any, List
 
-from llm import generate
-from memory import MEM
+from llm import agenerate, generate
+from memory import Memory, resolve
 from config import Settings
 
 _LOG = logging.getLogger(__name__)
@@ -46,48 +46,67 @@ _JSON_RE = re.compile(r"\{.*\}", re.S)
 # ──────────────────────────────────────────────────────────────────────────
 # Public API
 # ──────────────────────────────────────────────────────────────────────────
-def run() -> None:
+def run(mem: Memory | None = None) -> None:
     """
     Execute phase P4.  Write `feature_spec` into MEM.
     """
-    constraints: Dict[str, Any] | None = MEM.get("constraints")
-    tasks: List[str] | None = MEM.get("tasks")
+    mem = resolve(mem)
+    messages = _messages(mem)
+    if messages is not None:
+        _store_reply(mem, generate(messages, temperature=_CFG.LLM_TEMPERATURE))
+
+
+async def arun(mem: Memory | None = None) -> None:
+    """Awaitable variant of :func:`run`; the LLM call does not block a thread."""
+    mem = resolve(mem)
+    messages = _messages(mem)
+    if messages is not None:
+        _store_reply(mem, await agenerate(messages, temperature=_CFG.LLM_TEMPERATURE))
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────
+def _messages(mem: Memory) -> List[Dict[str, str]] | None:
+    """
+    Build the chat messages for the design call, or return None (after
+    storing an empty spec) when the user opted out of a new agent.
+    """
+    constraints: Dict[str, Any] | None = mem.get("constraints")
+    tasks: List[str] | None = mem.get("tasks")
 
     if not constraints or tasks is None:
         raise RuntimeError("feature_instantiation_agent: prerequisites missing")
 
     # If user said no new agent – short-circuit
     if constraints.get("wantsNewAgent") is False:
-        MEM.put("feature_spec", {})
+        mem.put("feature_spec", {})
         _LOG.info("User opted out of new agent; feature_spec left empty.")
-        return
+        return None
 
     llm_prompt = _build_prompt(constraints, tasks)
 
-    assistant_reply = generate(
-        [
-            {
-                "role": "system",
-                "content": (
-                    "You are a senior Python architect.  "
-                    "Given the numbered tasks and constraints, propose a concise "
-                    "JSON spec for ONE new agent class.  "
-                    "Output ONLY the JSON object."
-                ),
-            },
-            {"role": "user", "content": llm_prompt},
-        ],
-        temperature=_CFG.LLM_TEMPERATURE,
-    )
-
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are a senior Python architect.  "
+                "Given the numbered tasks and constraints, propose a concise "
+                "JSON spec for ONE new agent class.  "
+                "Output ONLY the JSON object."
+            ),
+        },
+        {"role": "user", "content": llm_prompt},
+    ]
+
+
+def _store_reply(mem: Memory, assistant_reply: str) -> None:
+    """Validate the proposed spec and publish it as `"feature_spec"`."""
     spec = _parse_and_validate(assistant_reply)
-    MEM.put("feature_spec", spec)
+    mem.put("feature_spec", spec)
     _LOG.info("Phase P4 complete – feature_spec=%s", spec)
 
 
-# ──────────────────────────────────────────────────────────────────────────
-# Helpers
-# ──────────────────────────────────────────────────────────────────────────
 def _build_prompt(constraints: Dict[str, Any], tasks: List[str]) -> str:
     body = textwrap.dedent(
         f"""
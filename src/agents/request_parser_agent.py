@@ -23,6 +23,8 @@ Security / Robustness
   in case a welcome message slips through.
 * If parsing fails we raise `RuntimeError`, causing the orchestrator to
   abort early with a clear error.
+* The tree is trimmed to `PROMPT_TOKEN_BUDGET` via `tools.token_budget`;
+  pre/post token counts land in `mem["token_usage"]["P1"]`.
 
 The parsed dict is stored under `MEM["constraints"]`.
 """
@@ -32,11 +34,12 @@ from __future__ import annotations
 import json
 import logging
 import re
-from typing import Dict, Any
+from typing import Dict, Any, List
 
-from llm import generate
-from memory import MEM
+from llm import agenerate, generate
+from memory import Memory, resolve
 from config import Settings
+from tools.token_budget import Section, count_tokens, fit_sections
 
 _LOG = logging.getLogger(__name__)
 _CFG = Settings()  # validates env on first import
@@ -44,49 +47,68 @@ _CFG = Settings()  # validates env on first import
 # ──────────────────────────────────────────────────────────────────────────
 # Public API
 # ──────────────────────────────────────────────────────────────────────────
-def run() -> None:
+def run(mem: Memory | None = None) -> None:
     """
     Execute phase P1.  Reads *user_prompt* and *tree* from the blackboard,
     asks the LLM for a concise JSON descriptor, validates it, then places
     the result back in the blackboard under `"constraints"`.
     """
-    user_prompt: str | None = MEM.get("user_prompt")
-    tree: str | None = MEM.get("tree")
+    mem = resolve(mem)
+    _store_reply(mem, generate(_messages(mem), temperature=0.0))  # deterministic extraction
+
+
+async def arun(mem: Memory | None = None) -> None:
+    """Awaitable variant of :func:`run`; the LLM call does not block a thread."""
+    mem = resolve(mem)
+    _store_reply(mem, await agenerate(_messages(mem), temperature=0.0))
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────
+_JSON_RE = re.compile(r"\{.*\}", re.S)  # first {...} block, non-greedy
+
+_SYSTEM_PROMPT = (
+    "You are a JSON-only extraction engine.  "
+    "Never add commentary.  "
+    "Return a single JSON object and nothing else."
+)
+
+
+def _messages(mem: Memory) -> List[Dict[str, str]]:
+    """Read the blackboard and build the chat messages for the extraction call."""
+    user_prompt: str | None = mem.get("user_prompt")
+    tree: str | None = mem.get("tree")
 
     if not user_prompt or not tree:
         raise RuntimeError(
             "request_parser_agent: missing 'user_prompt' or 'tree' in MEM."
         )
 
-    llm_prompt = _build_prompt(user_prompt, tree)
+    fitted, report = fit_sections(
+        [Section("user_prompt", user_prompt, keep="none"), Section("tree", tree)],
+        _CFG.PROMPT_TOKEN_BUDGET,
+        phase="P1",
+        reserve=count_tokens(_SYSTEM_PROMPT) + count_tokens(_build_prompt("", "")),
+    )
+    report.publish(mem)
+
+    llm_prompt = _build_prompt(fitted["user_prompt"], fitted["tree"])
     _LOG.debug("Request-parser prompt (chars=%s)", len(llm_prompt))
 
-    assistant_reply = generate(
-        [
-            {
-                "role": "system",
-                "content": (
-                    "You are a JSON-only extraction engine.  "
-                    "Never add commentary.  "
-                    "Return a single JSON object and nothing else."
-                ),
-            },
-            {"role": "user", "content": llm_prompt},
-        ],
-        temperature=0.0,  # deterministic extraction
-    )
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": llm_prompt},
+    ]
 
+
+def _store_reply(mem: Memory, assistant_reply: str) -> None:
+    """Validate the LLM reply and publish it as `"constraints"`."""
     constraints = _parse_and_validate(assistant_reply)
-    MEM.put("constraints", constraints)
+    mem.put("constraints", constraints)
     _LOG.info("Phase P1 completed – extracted constraints: %s", constraints)
 
 
-# ──────────────────────────────────────────────────────────────────────────
-# Helpers
-# ──────────────────────────────────────────────────────────────────────────
-_JSON_RE = re.compile(r"\{.*\}", re.S)  # first {...} block, non-greedy
-
-
 def _build_prompt(user_prompt: str, tree_md: str) -> str:
     """Compose the string given to the LLM for extraction."""
     return (
@@ -1,14 +1,20 @@
 """
 self_refine_agent.py
 ────────────────────────────────────────────────────────────────────────────
-Phase (Optional) – invoked when the static checker (D1) fails after the
-maximum number of P5⇄D1 retries.  This meta-agent inspects the last `lint_error`
-and the most recent diff, asks the LLM to suggest concrete fixes or to roll
-back a bad patch, and then updates the in-memory “tasks” so that the next
+Retry step of the P5⇄D1 loop – invoked before every attempt after a failed
+static check (D1).  This meta-agent inspects the last `lint_error` and the
+most recent diff, asks the LLM to suggest concrete fixes or to roll back a
+bad patch, and then updates the in-memory “tasks” so that the next
 iteration of code_writer_agent has more precise instructions.
 
-If no reasonable fix is suggested, this agent raises a RuntimeError to
-abort the pipeline, signaling that human intervention is required.
+If no reasonable fix is suggested, this agent raises a RuntimeError; the
+loop then retries with the previous tasks.
+
+The prompt carries only the failure context (`tools.failure_context`): the
+diff lines around the lines D1 blamed and an excerpt of the error (D1
+diagnostics, or the `E …` / traceback lines of the pytest log) – not the
+full diff and log.  Both are still fitted to `PROMPT_TOKEN_BUDGET`; token
+counts are recorded under ``mem["token_usage"]["self_refine"]``.
 """
 
 from __future__ import annotations
@@ -17,13 +23,17 @@ import logging
 import re
 from typing import List, Optional, Dict, Any
 
+from config import Settings
 from llm import generate
-from memory import MEM
+from memory import Memory, resolve
+from tools.failure_context import error_excerpt, failing_hunks, failing_lines
+from tools.token_budget import Section, count_tokens, fit_sections
 
 _LOG = logging.getLogger(__name__)
+_CFG = Settings()
 
 
-def run() -> None:
+def run(mem: Memory | None = None) -> None:
     """
     Execute self-refinement:
 
@@ -34,20 +44,40 @@ def run() -> None:
     4.  Parse the LLM output into bullet points and overwrite MEM["tasks"].
     5.  If the LLM cannot produce a valid bullet list, raise RuntimeError.
     """
-    lint_error: Optional[str] = MEM.get("lint_error")
+    mem = resolve(mem)
+    lint_error: Optional[str] = mem.get("lint_error")
     if not lint_error:
         _LOG.info("self_refine_agent: no lint_error found; skipping refinement.")
         return
 
-    last_diff: Optional[str] = MEM.get("latest_diff")
-    old_tasks: Optional[List[str]] = MEM.get("tasks")
+    last_diff: Optional[str] = mem.get("latest_diff")
+    old_tasks: Optional[List[str]] = mem.get("tasks")
     if old_tasks is None:
         raise RuntimeError("self_refine_agent: no previous tasks found.")
 
     _LOG.debug("Self-refine: lint_error:\n%s", lint_error)
 
-    # Build a prompt that includes the lint error, the diff, and the previous tasks
-    prompt = _build_refinement_prompt(old_tasks, lint_error, last_diff)
+    # Only the failing hunk(s) and the informative error lines go out
+    changed = mem.get("changed_files") or []
+    blamed = (
+        failing_lines(changed[0], lint_error, mem.get("d1_diagnostics"))
+        if changed
+        else set()
+    )
+    hunk = failing_hunks(last_diff or "", blamed)
+    excerpt = error_excerpt(lint_error)
+
+    fitted, report = fit_sections(
+        [
+            Section("lint_error", excerpt, keep="head", min_tokens=200),
+            Section("diff", hunk, keep="head"),
+        ],
+        _CFG.PROMPT_TOKEN_BUDGET,
+        phase="self_refine",
+        reserve=count_tokens(_build_refinement_prompt(old_tasks, "", None)),
+    )
+    report.publish(mem)
+    prompt = _build_refinement_prompt(old_tasks, fitted["lint_error"], fitted["diff"])
 
     assistant_reply = generate(
         [
@@ -70,7 +100,7 @@ def run() -> None:
             "self_refine_agent: LLM did not return a valid bullet list."
         )
 
-    MEM.put("tasks", new_tasks)
+    mem.put("tasks", new_tasks)
     _LOG.info(
         "Self-refine completed: replaced %d old tasks with %d new tasks",
         len(old_tasks),
@@ -88,8 +118,8 @@ def _build_refinement_prompt(
     Construct the user-visible prompt for the LLM, including:
 
     • The previous numbered tasks
-    • The lint error message
-    • The unified diff of the last patch (if available)
+    • The error excerpt
+    • The failing hunk(s) of the last patch (if available)
     • Instructions to return a bullet list of revised tasks
     """
     lines: List[str] = []
@@ -97,16 +127,16 @@ def _build_refinement_prompt(
     for i, t in enumerate(old_tasks, start=1):
         lines.append(f"{i}. {t}")
 
-    lines.append("\n## Lint error from static checker")
+    lines.append("\n## Errors from static checker (excerpt)")
     lines.append(f"```\n{lint_error.strip()}\n```")
 
     if last_diff:
-        lines.append("\n## Last patch diff")
-        lines.append(f"```\n{last_diff.strip()}\n```")
+        lines.append("\n## Failing part of the last patch")
+        lines.append(f"```diff\n{last_diff.strip()}\n```")
 
     lines.append(
         "\n---\n"
-        "Based on the lint error and the diff, produce an *ordered* bullet list "
+        "Based on the errors and the failing lines, produce an *ordered* bullet list "
         "(use '-' or '1.' prefixes) of precise actions to fix the code. "
         "Each bullet should be a single sentence.\n"
     )
@@ -4,10 +4,17 @@ static_checker_agent.py
 Phase **D1** – sanity-check the patched project *without* executing
 business logic.  We verify three things:
 
-  1.  Every *.py* file compiles (syntax OK)  →   `py_compile`
+  1.  Every *.py* file compiles (syntax OK)  →   `tools.ast_checker`
   2.  Importing the *package tree* succeeds  →   `pytest --collect-only`
   3.  No `RuntimeError` / missing packages   →   non-zero exit → loop
 
+Step 1 compiles in memory (no `.pyc` is written).  Files P5 wrote are also
+checked for undefined names and, like their importers, for imports of
+local modules / names that do not exist; every finding is a structured
+`Diagnostic` (file, line, column, message) stored under
+``MEM["d1_diagnostics"]`` and rendered into ``MEM["lint_error"]`` – the
+pytest step only runs once these are clean.
+
 If *all* checks pass we return ``True`` so the workflow proceeds to P6.
 On failure we:
 
@@ -20,102 +27,370 @@ Why use **pytest --collect-only**?
 application package.  `--collect-only` stops before running any test
 functions, giving us a cheap “can I import the world?” smoke test.
 
+Incremental mode
+----------------
+P5 records the files it wrote under ``MEM["changed_files"]``.  D1 keeps a
+reverse-import graph of `src/` and `tests/` (`tools.import_graph`) alive
+between attempts and, once a check has established a baseline, only
+compiles the changed files, the files that failed last time and
+everything that imports them, and only collects the affected test
+modules.  A failed full check is a baseline too: every file was checked,
+so the next P5⇄D1 attempt re-checks just the failing files and what P5
+changed.  Until a full collection has passed in this run, an incremental
+check that compiles cleanly still collects the whole suite (through the
+warm worker).  The full check runs on a run's first attempt, when P5 did
+not report its changes, when files were added or removed behind our
+back, when a collection failure cannot be pinned to files, or when a
+`conftest.py` is affected.
+
+The baseline lives in the run's memory (``MEM["d1_state"]``), so runs
+in one process never inherit each other's state.
+
+Warm collection worker
+----------------------
+Collection runs in a long-lived worker process (`tools.collect_worker`)
+that keeps pytest and third-party imports loaded across attempts and only
+re-imports the project modules D1 is re-checking (all of them after a full
+check).  If the worker dies, hangs or is disabled (`D1_COLLECT_WORKER`), the
+one-shot subprocess below is used instead.
+
 Security notes
 --------------
-* We launch a *separate* Python subprocess to avoid polluting the current
-  interpreter state.
-* The subprocess inherits a **clean environment** with
-  `PYTHONPATH=.` only.
+* We launch a *separate* Python process (worker or subprocess) to avoid
+  polluting the current interpreter state.
+* Both get a **scrubbed environment** (`collect_worker.sandbox_env`:
+  PATH, HOME, locale and temp-dir variables plus `PYTHONPATH=.`), so
+  credentials such as `WATSONX_API_KEY` never reach test modules.  Test
+  modules that build `Settings()` on import still collect: every required
+  setting gets a placeholder value (see :func:`_collect_env`), and
+  `D1_ENV_PASSTHROUGH` names variables to hand through unchanged.
+* The worker runs under CPU / address-space rlimits
+  (`D1_WORKER_CPU_SECONDS`, `D1_WORKER_MEMORY_MB`); the subprocess under a
+  wall-clock timeout.
 """
 
 from __future__ import annotations
 
-import compileall
+import atexit
 import os
 import pathlib
 import subprocess
 import sys
 import textwrap
-from typing import List
+import threading
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Set
 
 import logging
 
-from memory import MEM
+from memory import Memory, resolve
 from config import Settings
+from tools.ast_checker import Diagnostic, check_source
+from tools.collect_worker import CollectWorker, WorkerError, sandbox_env
+from tools.import_graph import ImportGraph
+from tools.symbol_index import module_name
 
 _LOG = logging.getLogger(__name__)
 _CFG = Settings()
 
 # Where is our source tree?
 SRC_DIR = _CFG.SRC_DIR
+TESTS_DIR = SRC_DIR.parent / "tests"
+
+# The import graph mirrors the files on disk and the worker is a process,
+# so both are shared by every run; per-run state lives in `MEM["d1_state"]`.
+_STATE_LOCK = threading.Lock()
+_GRAPH: Optional[ImportGraph] = None
+_WORKER: Optional[CollectWorker] = None
+
+
+def _new_state() -> Dict[str, Any]:
+    return {
+        "baseline": False,   # every file outside `pending` is known clean
+        "collected": False,  # a full test collection passed in this run
+        "pending": [],       # files that failed the last check
+    }
 
 
 # ──────────────────────────────────────────────────────────────────────────
 # Public API – single entry-point used by the orchestrator
 # ──────────────────────────────────────────────────────────────────────────
-def run() -> bool:
+def run(mem: Memory | None = None) -> bool:
     """
     Perform the static sanity checks.  Returns ``True`` on success,
     ``False`` on failure (and records the error in memory).
 
     The orchestrator will loop (P5 → D1) based on this boolean.
     """
-    _LOG.debug("Static-checker: starting compilation pass")
-    if not _compile_project():
-        return False
-
-    _LOG.debug("Static-checker: running pytest collect-only")
-    success, log = _pytest_collect_only()
+    mem = resolve(mem)
+    state = dict(mem.get("d1_state") or _new_state())
+    with _STATE_LOCK:
+        changed = mem.get("changed_files")
+        sources: Dict[str, str] = mem.get("changed_sources") or {}
+        targets = _incremental_targets(changed, state)
+        if targets is None:
+            mem.put("d1_scope", {"mode": "full"})
+            ok, log = _full_check(mem, changed or [], sources, state)
+        else:
+            tests = [p for p in targets if _is_test_file(p)]
+            mem.put(
+                "d1_scope",
+                {
+                    "mode": "incremental",
+                    "files": len(targets),
+                    "tests": len(tests) if state["collected"] else "all",
+                },
+            )
+            _LOG.info(
+                "Static-checker: incremental – %d file(s), %s test module(s)",
+                len(targets),
+                len(tests) if state["collected"] else "all",
+            )
+            ok, log = _static_check(mem, targets, changed, sources, incremental=True)
+            if not ok:
+                state["pending"] = _diagnostic_files(mem)
+            elif state["collected"] and not tests:
+                state["pending"] = []
+            else:
+                ok, log = _collect_into(state, tests if state["collected"] else None, targets)
+    mem.put("d1_state", state)
 
-    if success:
+    if ok:
         _LOG.info("Static-checker passed ✅")
-        MEM.put("lint_error", None)
+        mem.put("lint_error", None)
         return True
 
-    MEM.put("lint_error", log)
+    mem.put("lint_error", log)
     _LOG.warning("Static-checker failed ❌; captured lint_error.")
     return False
 
 
+def precheck(path: pathlib.Path, code: str) -> List[Diagnostic]:
+    """
+    Step 1 only, for a candidate buffer P5 has not written yet: syntax,
+    undefined names and local imports, checked in memory against the
+    current module index.  Safe to call from several threads.
+    """
+    path = pathlib.Path(path).resolve()
+    with _STATE_LOCK:
+        graph = _graph()
+        if not graph.built:
+            graph.refresh()
+        index = graph.modules()
+        module = graph.module_of(path)
+    if module is None:
+        try:
+            module = module_name(path.relative_to(SRC_DIR.resolve()).as_posix())
+        except ValueError:
+            module = ""
+    return check_source(
+        code,
+        str(path),
+        module=module,
+        is_package=path.name == "__init__.py",
+        modules=index,
+    )
+
+
 # ──────────────────────────────────────────────────────────────────────────
 # Helpers
 # ──────────────────────────────────────────────────────────────────────────
-def _compile_project() -> bool:
+def _incremental_targets(
+    changed: Optional[List[str]], state: Dict[str, Any]
+) -> Optional[List[pathlib.Path]]:
     """
-    Run Python's `py_compile` over every *.py* file; returns True
-    iff *all* files compile cleanly.
+    Files to re-check after P5 wrote `changed`, or ``None`` when only a
+    full check is trustworthy.  Always refreshes the import graph so it
+    tracks the tree even across full checks.
     """
-    # compileall returns False *iff* a compilation failed
-    ok = compileall.compile_dir(
-        str(SRC_DIR),
-        quiet=1,           # only print errors
-        force=False,       # skip unchanged bytecode
-        optimize=0,
-    )
+    _graph().refresh(expected=changed or ())
+
+    if not state["baseline"] or changed is None or _GRAPH.invalidated:
+        return None
+    targets = _GRAPH.affected([*changed, *state["pending"]])
+    if any(p.name == "conftest.py" for p in targets):
+        return None
+    return targets
+
+
+def _graph() -> ImportGraph:
+    global _GRAPH  # pylint: disable=global-statement
+    if _GRAPH is None:
+        _GRAPH = ImportGraph([SRC_DIR, TESTS_DIR])
+    return _GRAPH
+
+
+def _is_test_file(path: pathlib.Path) -> bool:
+    return path.name.startswith("test_") or path.name.endswith("_test.py")
+
+
+def _full_check(
+    mem: Memory, changed: List[str], sources: Dict[str, str], state: Dict[str, Any]
+) -> tuple[bool, str]:
+    """Check every file under `SRC_DIR`, then collect the whole test suite."""
+    _LOG.debug("Static-checker: starting full compilation pass")
+    src_root = SRC_DIR.resolve()
+    paths = [p for p in _GRAPH.files() if p.is_relative_to(src_root)]
+    ok, log = _static_check(mem, paths, changed, sources, incremental=False)
     if not ok:
-        MEM.put(
-            "lint_error",
-            "Syntax error during py_compile – see console log above.",
+        # Every file was checked, so all but the failing ones are a baseline.
+        state.update(baseline=True, collected=False, pending=_diagnostic_files(mem))
+        return ok, log
+    _LOG.debug("Static-checker: running pytest collect-only")
+    state["baseline"] = True
+    return _collect_into(state, None, None)
+
+
+def _collect_into(
+    state: Dict[str, Any],
+    paths: Optional[List[pathlib.Path]],
+    evict: Optional[List[pathlib.Path]],
+) -> tuple[bool, str]:
+    """Run :func:`_collect` and record its outcome in the run's `state`."""
+    ok, log, failed = _collect(paths, evict)
+    if ok:
+        state["pending"] = []
+        state["collected"] = state["collected"] or paths is None
+    elif failed is None:  # cannot tell which files broke: start over
+        state.update(baseline=False, pending=[])
+    else:
+        state["pending"] = failed
+    return ok, log
+
+
+def _diagnostic_files(mem: Memory) -> List[str]:
+    """Files with at least one D1 diagnostic (from ``MEM["d1_diagnostics"]``)."""
+    return sorted({d["path"] for d in mem.get("d1_diagnostics") or []})
+
+
+def _static_check(
+    mem: Memory,
+    paths: List[pathlib.Path],
+    changed: List[str],
+    sources: Dict[str, str],
+    *,
+    incremental: bool,
+) -> tuple[bool, str]:
+    """
+    In-memory checks of `paths`: files in `changed` get every check, other
+    files in an incremental run (importers) syntax + local imports, other
+    files in a full run syntax only.  Buffers in `sources` (path → code)
+    are used instead of re-reading the file.
+    """
+    changed_set = {pathlib.Path(p).resolve() for p in changed}
+    index = _GRAPH.modules()
+    diagnostics: List[Diagnostic] = []
+    for path in paths:
+        source = sources.get(str(path))
+        if source is None:
+            try:
+                source = path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError) as exc:
+                diagnostics.append(Diagnostic(str(path), 1, 1, "syntax", str(exc)))
+                continue
+        is_changed = path in changed_set
+        diagnostics += check_source(
+            source,
+            str(path),
+            module=_GRAPH.module_of(path) or "",
+            is_package=path.name == "__init__.py",
+            modules=index if is_changed or incremental else None,
+            names=is_changed,
         )
-    return bool(ok)
+    mem.put("d1_diagnostics", [asdict(d) for d in diagnostics])
+    return not diagnostics, "\n".join(str(d) for d in diagnostics)
+
+
+def _collect(
+    paths: Optional[List[pathlib.Path]] = None,
+    evict: Optional[List[pathlib.Path]] = None,
+) -> tuple[bool, str, Optional[List[str]]]:
+    """
+    Collect through the warm worker, re-importing only `evict` (everything
+    when ``None``); falls back to :func:`_pytest_collect_only`.  Also
+    returns the files that failed to collect, or ``None`` if unknown.
+    """
+    global _WORKER  # pylint: disable=global-statement
+    if _CFG.D1_COLLECT_WORKER:
+        if _WORKER is None:
+            _WORKER = CollectWorker(
+                SRC_DIR.parent,
+                pythonpath=[os.getcwd()],
+                watch=[SRC_DIR, TESTS_DIR],
+                max_runs=_CFG.D1_WORKER_MAX_RUNS,
+                cpu_seconds=_CFG.D1_WORKER_CPU_SECONDS,
+                memory_bytes=_CFG.D1_WORKER_MEMORY_MB * 1024 * 1024,
+                env=_collect_env(),
+            )
+            atexit.register(_WORKER.close)
+        try:
+            result = _WORKER.collect(paths or (), evict=evict)
+        except WorkerError as exc:
+            _LOG.warning("Collection worker unavailable (%s) – using a subprocess", exc)
+        else:
+            return result.ok, _format_result(result), _failed_files(result)
+    return (*_pytest_collect_only(paths), None)
+
+
+def _collect_env() -> Dict[str, str]:
+    """
+    Extra variables for collection: a placeholder for every required
+    `Settings` field (collect-only never calls the LLM, but agents build
+    `Settings()` on import) plus the `D1_ENV_PASSTHROUGH` variables.
+    """
+    env = {
+        name: "d1-collect-placeholder"
+        for name, field in Settings.__fields__.items()
+        if field.required
+    }
+    env.update({k: os.environ[k] for k in _CFG.D1_ENV_PASSTHROUGH if k in os.environ})
+    return env
+
+
+def _failed_files(result) -> Optional[List[str]]:
+    """Project files named by a worker `CollectResult`'s errors (None if any is not a file)."""
+    if result.ok:
+        return []
+    files: Set[str] = set()
+    for where in result.errors:
+        path = pathlib.Path(where.split("::")[0])
+        if not path.is_absolute():
+            path = SRC_DIR.parent / path
+        if not path.is_file():
+            return None
+        files.add(str(path.resolve()))
+    return sorted(files) or None
+
+
+def _format_result(result) -> str:
+    """Render a worker `CollectResult` like the subprocess log, errors per file."""
+    status = "OK" if result.ok else f"FAIL, exit {result.exit_code}"
+    lines = [f"---- pytest collect-only ({status}, {result.collected} collected) ----"]
+    for where, text in result.errors.items():
+        lines += [f"ERROR collecting {where}:", text.rstrip()]
+    if not result.ok and not result.errors:
+        lines.append(result.output.rstrip())
+    lines.append("-------------------------------------------------------------------------")
+    return "\n".join(lines)
 
 
-def _pytest_collect_only() -> tuple[bool, str]:
+def _pytest_collect_only(paths: Optional[List[pathlib.Path]] = None) -> tuple[bool, str]:
     """
     Spawn a *new* Python process:
 
-        python -m pytest --collect-only -q
+        python -m pytest --collect-only -q [paths…]
 
-    Captures stdout / stderr, returns (success, combined_log).
+    Captures stdout / stderr, returns (success, combined_log).  Without
+    `paths` pytest collects whatever its configuration points at.
     """
-    env = os.environ.copy()
-    env["PYTHONPATH"] = os.getcwd()  # ensure local package is importable
+    env = sandbox_env([os.getcwd()], _collect_env())  # local package importable
     cmd: List[str] = [
         sys.executable,
         "-m",
         "pytest",
         "--collect-only",
         "-q",
+        *(str(p) for p in paths or ()),
     ]
 
     proc = subprocess.run(
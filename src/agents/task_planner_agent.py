@@ -10,6 +10,9 @@ Given:
 • A deterministic *file-tree* string stored under ``MEM["tree"]`` (phase Z)  
 • A structured *constraints* JSON object in ``MEM["constraints"]`` (phase P1)  
 • Optional *architecture snippets* list in ``MEM["architecture_snippets"]`` (phase P2)
+• Optional *symbol index* in ``MEM["symbol_index"]`` (phase S) – the
+  classes / functions / signatures most relevant to the request are
+  listed so the plan can name real APIs instead of guessing
 
 …ask the LLM to derive an **ordered, human-readable bullet list** of the
 code-editing steps required to satisfy the user request *without breaking
@@ -25,6 +28,9 @@ Implementation notes
   runaway hallucinated task lists.  
 * Splits the assistant response into tidy bullet-lines, stripping common
   list prefixes (“1. ”, “- ”, “• ”, etc.).
+* Fits tree, design notes and ranked symbols into `PROMPT_TOKEN_BUDGET`
+  (largest section trimmed first; symbols keep their best-ranked head) and
+  records the token counts under ``mem["token_usage"]["P3"]``.
 
 Security
 ────────
@@ -36,11 +42,12 @@ from __future__ import annotations
 
 import logging
 import re
-from typing import List
+from typing import Dict, List
 
-from llm import generate
-from memory import MEM
+from llm import agenerate, generate
+from memory import Memory, resolve
 from config import Settings
+from tools.token_budget import Section, count_tokens, fit_sections
 
 _LOG = logging.getLogger(__name__)
 _CFG = Settings()  # cached singleton; validates env on first import
@@ -49,35 +56,62 @@ _CFG = Settings()  # cached singleton; validates env on first import
 # ──────────────────────────────────────────────────────────────────────────
 # Public API – single entry-point called by the orchestrator
 # ──────────────────────────────────────────────────────────────────────────
-def run() -> None:
+def run(mem: Memory | None = None) -> None:
     """
     Execute phase P3 and place the ordered *tasks* list into the shared
     blackboard under key ``"tasks"``.
     """
-    constraints = MEM.get("constraints") or {}
-    tree_md = MEM.get("tree") or "(no tree found)"
-    arch_snippets: List[str] | None = MEM.get("architecture_snippets")
+    mem = resolve(mem)
+    _store_reply(mem, generate(_messages(mem), temperature=_CFG.LLM_TEMPERATURE))
+
+
+async def arun(mem: Memory | None = None) -> None:
+    """Awaitable variant of :func:`run`; the LLM call does not block a thread."""
+    mem = resolve(mem)
+    _store_reply(mem, await agenerate(_messages(mem), temperature=_CFG.LLM_TEMPERATURE))
 
-    prompt = _build_prompt(constraints, tree_md, arch_snippets)
-    _LOG.debug("Task-planner prompt (chars=%s)", len(prompt))
 
-    assistant_reply = generate(
+# ──────────────────────────────────────────────────────────────────────────
+# Helpers
+# ──────────────────────────────────────────────────────────────────────────
+def _messages(mem: Memory) -> List[Dict[str, str]]:
+    """Read the blackboard and build the chat messages for the planning call."""
+    constraints = mem.get("constraints") or {}
+    tree_md = mem.get("tree") or "(no tree found)"
+    arch_snippets: List[str] | None = mem.get("architecture_snippets")
+
+    notes = "\n".join(f"- {snip}" for snip in arch_snippets or [])
+    symbol_index = mem.get("symbol_index")
+    symbols = ""
+    if symbol_index is not None:
+        query = f"{mem.get('user_prompt') or ''} {constraints}"
+        symbols = symbol_index.render(symbol_index.rank(query, _CFG.SYMBOL_PROMPT_K))
+    fitted, report = fit_sections(
         [
-            {
-                "role": "system",
-                "content": (
-                    "You are a senior software architect.  "
-                    "Given a codebase tree + user constraints, "
-                    "list the minimal numbered steps needed to apply those changes "
-                    "without breaking existing architecture.  "
-                    "Return ONLY the bullet list."
-                ),
-            },
-            {"role": "user", "content": prompt},
+            Section("constraints", str(constraints), keep="none"),
+            Section("tree", tree_md),
+            Section("design_notes", notes),
+            Section("symbols", symbols),
         ],
-        temperature=_CFG.LLM_TEMPERATURE,
+        _CFG.PROMPT_TOKEN_BUDGET,
+        phase="P3",
+        reserve=count_tokens(_SYSTEM_PROMPT) + count_tokens(_build_prompt("", "", "")),
+    )
+    report.publish(mem)
+
+    prompt = _build_prompt(
+        fitted["constraints"], fitted["tree"], fitted["design_notes"], fitted["symbols"]
     )
+    _LOG.debug("Task-planner prompt (chars=%s)", len(prompt))
+
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
 
+
+def _store_reply(mem: Memory, assistant_reply: str) -> None:
+    """Parse the bullet list, apply the guard-rails and publish `"tasks"`."""
     tasks = _extract_bullets(assistant_reply)
     if not tasks:
         raise RuntimeError("Task planner produced an empty or unparsable list.")
@@ -87,29 +121,43 @@ def run() -> None:
             f"Task planner returned {len(tasks)} items (max 25 allowed) – aborting."
         )
 
-    MEM.put("tasks", tasks)
+    mem.put("tasks", tasks)
     _LOG.info("Phase P3 completed – derived %s tasks", len(tasks))
 
 
-# ──────────────────────────────────────────────────────────────────────────
-# Helpers
-# ──────────────────────────────────────────────────────────────────────────
+_SYSTEM_PROMPT = (
+    "You are a senior software architect.  "
+    "Given a codebase tree + user constraints, "
+    "list the minimal numbered steps needed to apply those changes "
+    "without breaking existing architecture.  "
+    "Return ONLY the bullet list."
+)
+
+
 def _build_prompt(
-    constraints: dict,
+    constraints: str,
     tree_markdown: str,
-    arch_snippets: List[str] | None,
+    design_notes: str,
+    symbols: str = "",
 ) -> str:
-    """Assemble the user-visible prompt for the LLM."""
+    """
+    Assemble the user-visible prompt for the LLM from already-budgeted
+    sections (`design_notes` is a "- note" bullet block, `symbols` a ranked
+    outline from the symbol index; both possibly empty).
+    """
     lines: list[str] = []
     lines.append("## Current directory tree")
     lines.append(tree_markdown)
     lines.append("\n## Constraints JSON")
-    lines.append(str(constraints))
+    lines.append(constraints)
 
-    if arch_snippets:
+    if design_notes:
         lines.append("\n## Relevant design notes")
-        for snip in arch_snippets:
-            lines.append(f"- {snip}")
+        lines.append(design_notes)
+
+    if symbols:
+        lines.append("\n## Relevant existing code (most relevant first)")
+        lines.append(symbols)
 
     lines.append(
         "\n---\n"
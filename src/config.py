@@ -65,6 +65,32 @@ class Settings(BaseSettings):
         description="Sampling temperature passed to Watsonx; 0 = deterministic.",
     )
 
+    PROMPT_TOKEN_BUDGET: int = Field(
+        6000,
+        env="PROMPT_TOKEN_BUDGET",
+        ge=256,
+        description="Max prompt tokens per LLM call; largest sections are trimmed first.",
+    )
+
+    LLM_CACHE_SIZE: int = Field(
+        256,
+        env="LLM_CACHE_SIZE",
+        ge=0,
+        description="Entries kept in the in-memory LLM response LRU; 0 = off.",
+    )
+
+    LLM_CACHE_PATH: Optional[Path] = Field(
+        None,
+        env="LLM_CACHE_PATH",
+        description="Optional SQLite file backing the LLM response cache; blank = memory only.",
+    )
+
+    LLM_CACHE_ALL_TEMPERATURES: bool = Field(
+        False,
+        env="LLM_CACHE_ALL_TEMPERATURES",
+        description="Also cache completions sampled at temperature > 0.",
+    )
+
     # ──────────────────────────────────────────────────────────────────────
     # Workflow & tooling knobs
     # ──────────────────────────────────────────────────────────────────────
@@ -84,6 +110,188 @@ class Settings(BaseSettings):
         description="How many bytes of each file `file_scanner` shows as preview.",
     )
 
+    TREE_MAX_LINES: int = Field(
+        2000,
+        env="TREE_MAX_LINES",
+        ge=0,
+        description="Line budget for the phase-Z tree; 0 = unlimited.",
+    )
+
+    TREE_MAX_TOKENS: int = Field(
+        16000,
+        env="TREE_MAX_TOKENS",
+        ge=0,
+        description="Approximate token budget for the phase-Z tree; 0 = unlimited.",
+    )
+
+    SCAN_WORKERS: int = Field(
+        1,
+        env="SCAN_WORKERS",
+        ge=1,
+        le=64,
+        description="Processes used to read phase-Z previews; 1 = serial.",
+    )
+
+    TREE_RENDER: Literal["flat", "compact"] = Field(
+        "flat",
+        env="TREE_RENDER",
+        description="Phase-Z layout: one line per file, or a nested, collapsed tree.",
+    )
+
+    TREE_COLLAPSE_THRESHOLD: int = Field(
+        20,
+        env="TREE_COLLAPSE_THRESHOLD",
+        ge=1,
+        description="Compact mode summarises more than N same-extension files per dir.",
+    )
+
+    TREE_CACHE_DIR: Path = Field(
+        Path.home() / ".cache" / "ai-project-features" / "trees",
+        env="TREE_CACHE_DIR",
+        description="Directory of the content-addressed phase-Z tree cache.",
+    )
+
+    TREE_CACHE_MAX_BYTES: int = Field(
+        64 * 1024 * 1024,
+        env="TREE_CACHE_MAX_BYTES",
+        ge=0,
+        description="LRU size limit of the tree cache in bytes; 0 disables it.",
+    )
+
+    EMBED_INDEX_DIR: Path = Field(
+        Path.home() / ".cache" / "ai-project-features" / "embeddings",
+        env="EMBED_INDEX_DIR",
+        description="Directory of the persistent P2 embedding index (one subdir per model).",
+    )
+
+    TFIDF_INDEX_DIR: Path = Field(
+        Path.home() / ".cache" / "ai-project-features" / "tfidf",
+        env="TFIDF_INDEX_DIR",
+        description="Directory of the persisted P2 TF-IDF indexes (one subdir per corpus).",
+    )
+
+    TFIDF_MAX_CORPORA: int = Field(
+        16,
+        env="TFIDF_MAX_CORPORA",
+        ge=1,
+        description="TF-IDF corpus directories kept on disk; least recently used pruned first.",
+    )
+
+    P2_RETRIEVER: Literal["hybrid", "embedding", "tfidf", "bm25"] = Field(
+        "hybrid",
+        env="P2_RETRIEVER",
+        description="Architecture-recall ranking: BM25 fused with vectors, or one method alone.",
+    )
+
+    CHUNK_TOKENS: int = Field(
+        256,
+        env="CHUNK_TOKENS",
+        ge=32,
+        description="Target size of a P2 doc chunk in tokens.",
+    )
+
+    CHUNK_OVERLAP_TOKENS: int = Field(
+        32,
+        env="CHUNK_OVERLAP_TOKENS",
+        ge=0,
+        description="Tokens of trailing context repeated at the start of the next chunk.",
+    )
+
+    SYMBOL_CACHE_PATH: Optional[Path] = Field(
+        Path.home() / ".cache" / "ai-project-features" / "symbols.sqlite",
+        env="SYMBOL_CACHE_PATH",
+        description="SQLite file caching parsed modules per content hash; blank = in-process only.",
+    )
+
+    SYMBOL_PROMPT_K: int = Field(
+        60,
+        env="SYMBOL_PROMPT_K",
+        ge=0,
+        description="Ranked symbols offered to the planner / code writer (then token-budgeted).",
+    )
+
+    PHASE_WORKERS: int = Field(
+        4,
+        env="PHASE_WORKERS",
+        ge=1,
+        description="Independent workflow phases run concurrently; 1 = strictly in PHASES order.",
+    )
+
+    CHECKPOINT_DIR: Optional[Path] = Field(
+        Path.home() / ".cache" / "ai-project-features" / "runs",
+        env="CHECKPOINT_DIR",
+        description="Per-run phase checkpoints used by --resume; unset = no checkpoints.",
+    )
+
+    CHECKPOINT_MAX_RUNS: int = Field(
+        50,
+        env="CHECKPOINT_MAX_RUNS",
+        ge=1,
+        description="Run directories kept under CHECKPOINT_DIR; least recently written pruned first.",
+    )
+
+    P5_SPECULATIVE: bool = Field(
+        False,
+        env="P5_SPECULATIVE",
+        description="Generate several P5 candidates concurrently and commit the first clean one.",
+    )
+
+    P5_CANDIDATES: int = Field(
+        3,
+        env="P5_CANDIDATES",
+        ge=1,
+        le=8,
+        description="Concurrent candidates per speculative P5 round.",
+    )
+
+    P5_MAX_CANDIDATES: int = Field(
+        8,
+        env="P5_MAX_CANDIDATES",
+        ge=1,
+        description="Cost cap: candidate generations per run across the P5⇄D1 loop.",
+    )
+
+    P5_TEMPERATURE_STEP: float = Field(
+        0.2,
+        env="P5_TEMPERATURE_STEP",
+        ge=0.0,
+        le=1.0,
+        description="Temperature added per extra speculative candidate (capped at 1.0).",
+    )
+
+    D1_COLLECT_WORKER: bool = Field(
+        True,
+        env="D1_COLLECT_WORKER",
+        description="Collect tests in a warm worker process instead of a fresh subprocess per D1 attempt.",
+    )
+
+    D1_WORKER_MAX_RUNS: int = Field(
+        50,
+        env="D1_WORKER_MAX_RUNS",
+        ge=1,
+        description="Collections served before the D1 worker is recycled.",
+    )
+
+    D1_WORKER_CPU_SECONDS: int = Field(
+        60,
+        env="D1_WORKER_CPU_SECONDS",
+        ge=0,
+        description="CPU-time rlimit per D1 worker collection; 0 = unlimited.",
+    )
+
+    D1_WORKER_MEMORY_MB: int = Field(
+        4096,
+        env="D1_WORKER_MEMORY_MB",
+        ge=0,
+        description="Address-space rlimit of the D1 worker in MiB; 0 = unlimited.",
+    )
+
+    D1_ENV_PASSTHROUGH: List[str] = Field(
+        [],
+        env="D1_ENV_PASSTHROUGH",
+        description='Variables passed unchanged to D1 test collection, as JSON (e.g. ["DATABASE_URL"]).',
+    )
+
     LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = Field(
         "INFO",
         env="LOG_LEVEL",
@@ -109,6 +317,10 @@ class Settings(BaseSettings):
             raise ValueError("DEFAULT_LLM_MODEL_ID must not be empty.")
         return v
 
+    @validator("CHECKPOINT_DIR", "LLM_CACHE_PATH", "SYMBOL_CACHE_PATH", pre=True)
+    def _blank_path_disables(cls, v):  # noqa: N805
+        return None if isinstance(v, str) and not v.strip() else v
+
     # ──────────────────────────────────────────────────────────────────────
     # pydantic config
     # ──────────────────────────────────────────────────────────────────────
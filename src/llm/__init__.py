@@ -1,27 +1,44 @@
 """
 Low-level LLM helpers for *ai-project-features*.
 
-At the moment we expose just two call-sites:
+At the moment we expose three call-sites:
 
     from llm import client            # lazily-constructed singleton
     from llm import generate          # convenience wrapper
+    from llm import agenerate         # awaitable twin of `generate`
 
 `client` is an instance of :class:`WatsonClient` (see *watson_client.py*),
 pre-configured from environment variables via `config.Settings`.
 
+`generate()` consults a :class:`ResponseCache` (see *cache.py*) before
+calling the model.  The default cache is built from `Settings`
+(``LLM_CACHE_SIZE``, ``LLM_CACHE_PATH``, ``LLM_CACHE_ALL_TEMPERATURES``);
+swap it with ``set_cache(...)`` or disable it with ``set_cache(None)``.
+Hit-rate metrics are available via ``cache_stats()``.
+
 If you need multiple, differently-configured Watson Clients (e.g. one
 with deterministic temperature=0 and another with “creative” params),
 instantiate :class:`WatsonClient` directly.
 """
 from __future__ import annotations
 
+import logging
 from typing import List, Dict, Any
 
+from config import Settings
+
+from .cache import ResponseCache
 from .watson_client import WatsonClient
 
+_LOG = logging.getLogger(__name__)
+
 # A lazily-created singleton; instantiated when `generate()` is called
 _client: WatsonClient | None = None
 
+# Response cache (None = disabled); built from Settings on first use
+_cache: ResponseCache | None = None
+_cache_configured = False
+
 
 def _get_client() -> WatsonClient:
     global _client  # pylint: disable=global-statement
@@ -30,6 +47,33 @@ def _get_client() -> WatsonClient:
     return _client
 
 
+def _get_cache() -> ResponseCache | None:
+    global _cache, _cache_configured  # pylint: disable=global-statement
+    if not _cache_configured:
+        cfg = Settings()
+        if cfg.LLM_CACHE_SIZE > 0 or cfg.LLM_CACHE_PATH:
+            _cache = ResponseCache(
+                max_entries=cfg.LLM_CACHE_SIZE,
+                sqlite_path=cfg.LLM_CACHE_PATH,
+                cache_nonzero_temperature=cfg.LLM_CACHE_ALL_TEMPERATURES,
+            )
+        _cache_configured = True
+    return _cache
+
+
+def set_cache(cache: ResponseCache | None) -> None:
+    """Install a custom response cache, or pass ``None`` to disable caching."""
+    global _cache, _cache_configured  # pylint: disable=global-statement
+    _cache = cache
+    _cache_configured = True
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit / miss counters of the active response cache (empty if disabled)."""
+    cache = _get_cache()
+    return cache.stats() if cache is not None else {}
+
+
 def generate(
     messages: List[Dict[str, str]],
     *,
@@ -57,14 +101,84 @@ def generate(
     str
         The assistant’s reply *content*.
     """
-    return _get_client().chat(
+    llm = _get_client()
+    key, cached = _cache_lookup(llm, messages, temperature, model_id, max_tokens)
+    if cached is not None:
+        return cached
+
+    reply = llm.chat(
+        messages,
+        temperature=temperature,
+        model_id=model_id,
+        max_tokens=max_tokens,
+    )
+    _cache_store(key, reply)
+    return reply
+
+
+async def agenerate(
+    messages: List[Dict[str, str]],
+    *,
+    temperature: float | None = None,
+    model_id: str | None = None,
+    max_tokens: int | None = None,
+) -> str:
+    """
+    Awaitable twin of :pyfunc:`generate` (same parameters, same cache),
+    backed by :pymeth:`WatsonClient.achat`.
+    """
+    llm = _get_client()
+    key, cached = _cache_lookup(llm, messages, temperature, model_id, max_tokens)
+    if cached is not None:
+        return cached
+
+    reply = await llm.achat(
         messages,
         temperature=temperature,
         model_id=model_id,
         max_tokens=max_tokens,
     )
+    _cache_store(key, reply)
+    return reply
+
+
+def _cache_lookup(
+    llm: WatsonClient,
+    messages: List[Dict[str, str]],
+    temperature: float | None,
+    model_id: str | None,
+    max_tokens: int | None,
+) -> tuple[str | None, str | None]:
+    """Return ``(cache_key, cached_reply)``; the key is None when not cacheable."""
+    cache = _get_cache()
+    if cache is None:
+        return None, None
+
+    eff_temperature = temperature if temperature is not None else llm.default_temperature
+    if not cache.cacheable(eff_temperature):
+        return None, None
+
+    key = cache.key(model_id or llm.default_model_id, eff_temperature, max_tokens, messages)
+    cached = cache.get(key)
+    if cached is not None:
+        _LOG.info("llm cache hit (hit-rate %.0f%%)", 100 * cache.stats()["hit_rate"])
+    return key, cached
+
+
+def _cache_store(key: str | None, reply: str) -> None:
+    cache = _get_cache()
+    if key is not None and cache is not None:
+        cache.put(key, reply)
 
 
 # Re-export for direct use
 client = _get_client  # note: a *function* that returns the singleton
-__all__: list[str] = ["generate", "client", "WatsonClient"]
+__all__: list[str] = [
+    "generate",
+    "agenerate",
+    "client",
+    "WatsonClient",
+    "ResponseCache",
+    "set_cache",
+    "cache_stats",
+]
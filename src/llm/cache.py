@@ -0,0 +1,162 @@
+"""
+cache.py
+────────
+Response cache that sits in front of :pyfunc:`llm.generate`.
+
+Two tiers:
+
+* an in-process LRU (`OrderedDict`) bounded by entry count, and
+* an optional SQLite file so answers survive restarts and are shared
+  between worker processes.
+
+Keys are a SHA-256 over ``(model_id, temperature, max_tokens, messages)``.
+Sampling at a non-zero temperature is *not* cached unless the cache was
+created with ``cache_nonzero_temperature=True`` – otherwise retries would
+keep replaying the same (possibly bad) completion.
+
+Any object with the same ``cacheable / key / get / put / stats`` methods can
+be installed via :pyfunc:`llm.set_cache`.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_LOG = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU + optional SQLite cache of chat completions.
+
+    Example
+    -------
+    >>> cache = ResponseCache(max_entries=128)
+    >>> k = cache.key("granite-20b-chat", 0.0, None, [{"role": "user", "content": "hi"}])
+    >>> cache.put(k, "hello")
+    >>> cache.get(k)
+    'hello'
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        sqlite_path: Path | str | None = None,
+        *,
+        cache_nonzero_temperature: bool = False,
+    ):
+        self.max_entries = max_entries
+        self.cache_nonzero_temperature = cache_nonzero_temperature
+        self._lru: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if sqlite_path:
+            path = Path(sqlite_path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    # ------------------------------------------------------------------ #
+    # Keying
+    # ------------------------------------------------------------------ #
+    def cacheable(self, temperature: float) -> bool:
+        """Deterministic calls are always cacheable; sampled ones only on opt-in."""
+        return temperature == 0.0 or self.cache_nonzero_temperature
+
+    @staticmethod
+    def key(
+        model_id: str,
+        temperature: float,
+        max_tokens: int | None,
+        messages: List[Dict[str, str]],
+    ) -> str:
+        payload = json.dumps(
+            [model_id, float(temperature), max_tokens, messages],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------ #
+    # Lookup / store
+    # ------------------------------------------------------------------ #
+    def get(self, key: str) -> Optional[str]:
+        """Return a cached completion (memory first, then SQLite) or None."""
+        with self._lock:
+            value = self._lru.get(key)
+            if value is not None:
+                self._lru.move_to_end(key)
+                self._hits += 1
+                return value
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self._hits += 1
+                    self._disk_hits += 1
+                    return row[0]
+
+            self._misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._remember(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, response, created) "
+                    "VALUES (?, ?, ?)",
+                    (key, value, time.time()),
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers and reset the counters."""
+        with self._lock:
+            self._lru.clear()
+            self._hits = self._disk_hits = self._misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit / miss counters and the overall hit rate (0.0 – 1.0)."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "entries": len(self._lru),
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+    # ------------------------------------------------------------------ #
+    # Helpers
+    # ------------------------------------------------------------------ #
+    def _remember(self, key: str, value: str) -> None:
+        """Insert into the LRU tier (caller holds the lock)."""
+        if self.max_entries <= 0:
+            return
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
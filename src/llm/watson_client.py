@@ -21,15 +21,27 @@ LLM_TEMPERATURE        – float, default 0.2
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import os
+import sys
+import threading
 import time
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional
 
 import backoff  # type: ignore
 from ibm_watsonx_ai.foundation_models import Model
 
+try:  # newer SDKs: inference objects can share one authenticated APIClient
+    from ibm_watsonx_ai import APIClient, Credentials
+    from ibm_watsonx_ai.foundation_models import ModelInference
+except ImportError:  # pragma: no cover – older SDK
+    APIClient = Credentials = ModelInference = None  # type: ignore
+
 from config import Settings
+from tools.token_budget import count_tokens
 
 
 def _backoff_hdlr(details):
@@ -39,7 +51,8 @@ def _backoff_hdlr(details):
     exc = details["exception"]
     print(
         f"[watson_client] retry {tries} in {wait:.1f}s "
-        f"after exception: {exc!r}"
+        f"after exception: {exc!r}",
+        file=sys.stderr,
     )
 
 
@@ -47,6 +60,12 @@ class WatsonClient:
     """
     Stateless helper around IBM watsonx.ai chat completions.
     A single instance can be shared across threads or asyncio tasks.
+
+    Inference objects for ``model_id`` overrides are kept in a bounded,
+    thread-safe LRU registry (``max_models`` entries besides the default),
+    so multi-model workflows pay construction once per slug rather than
+    once per call.  All of them share one authenticated `APIClient` (and
+    thus one IAM token) when the SDK provides it.
     """
 
     def __init__(
@@ -56,19 +75,23 @@ class WatsonClient:
         url: str = "https://us-south.ml.cloud.ibm.com",
         default_model: str = "granite-20b-chat",
         default_temperature: float = 0.2,
+        max_models: int = 8,
     ):
         self._model_id = default_model
         self._temperature = default_temperature
+        self._max_models = max_models
+        self._models: "OrderedDict[str, ModelInference | Model]" = OrderedDict()
+        self._models_lock = threading.Lock()
+        self._project_id = project_id
+        self._credentials = {"url": url, "apikey": api_key}  # legacy `Model` form
 
-        # Initialise the official SDK model object
-        self._model = Model(
-            model_id=default_model,
-            params={
-                "project_id": project_id,
-                "url": url,
-                "api_key": api_key,
-            },
+        # One authenticated client shared by every inference object
+        self._api_client = (
+            APIClient(Credentials(url=url, api_key=api_key), project_id=project_id)
+            if APIClient is not None
+            else None
         )
+        self._model = self._build_model(default_model)
 
     # --------------------------------------------------------------------- #
     # Constructors
@@ -88,6 +111,16 @@ class WatsonClient:
     # --------------------------------------------------------------------- #
     # Public API
     # --------------------------------------------------------------------- #
+    @property
+    def default_model_id(self) -> str:
+        """Model slug used when `chat()` gets no ``model_id`` override."""
+        return self._model_id
+
+    @property
+    def default_temperature(self) -> float:
+        """Temperature used when `chat()` gets no ``temperature`` override."""
+        return self._temperature
+
     @backoff.on_exception(
         backoff.expo,
         Exception,  # noqa: BLE001  – watsonx SDK raises base Exception :-(
@@ -139,31 +172,88 @@ class WatsonClient:
         if max_tokens:
             params["max_new_tokens"] = max_tokens
 
-        # Create a *new* Model each request if the caller changed model_id
-        model_to_use = self._model
-        if model_id and model_id != self._model_id:
-            model_to_use = Model(
-                model_id=model_id,
-                params=self._model._params,  # reuse auth / project / url
-            )
+        model_to_use = self._get_model(model_id)
 
         start = time.time()
-        response = model_to_use.generate(prompt, **params)
+        response = model_to_use.generate(prompt=prompt, params=params)
 
         # Standardise to OpenAI-like str return
         elapsed = (time.time() - start) * 1000
         content = response["results"][0]["generated_text"].lstrip()
         print(
             f"[watson_client] model={model_to_use.model_id} "
-            f"tokens_in≈{len(prompt.split())} "
-            f"tokens_out≈{len(content.split())} "
-            f"{elapsed:.0f} ms"
+            f"tokens_in≈{count_tokens(prompt)} "
+            f"tokens_out≈{count_tokens(content)} "
+            f"{elapsed:.0f} ms",
+            file=sys.stderr,
         )
         return content
 
+    async def achat(
+        self,
+        messages: List[Dict[str, str]],
+        *,
+        temperature: float | None = None,
+        model_id: str | None = None,
+        max_tokens: int | None = None,
+    ) -> str:
+        """
+        Awaitable variant of :pymeth:`chat`.
+
+        The SDK call (including its retries) runs on the event loop's default
+        executor, so the loop stays free to drive other pipelines while the
+        request is in flight.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            functools.partial(
+                self.chat,
+                messages,
+                temperature=temperature,
+                model_id=model_id,
+                max_tokens=max_tokens,
+            ),
+        )
+
     # --------------------------------------------------------------------- #
     # Helpers
     # --------------------------------------------------------------------- #
+    def _get_model(self, model_id: str | None) -> ModelInference | Model:
+        """Return the default model, or the registry entry for *model_id*."""
+        if not model_id or model_id == self._model_id:
+            return self._model
+
+        with self._models_lock:
+            model = self._models.get(model_id)
+            if model is not None:
+                self._models.move_to_end(model_id)
+                return model
+
+            model = self._build_model(model_id)
+            self._models[model_id] = model
+            while len(self._models) > self._max_models:
+                self._models.popitem(last=False)
+            return model
+
+    def _build_model(self, model_id: str) -> ModelInference | Model:
+        """
+        Construct the inference object for *model_id* on the shared
+        `APIClient`; older SDKs without one get a `Model` built from the
+        same credentials and project.
+        """
+        if self._api_client is not None:
+            return ModelInference(
+                model_id=model_id,
+                api_client=self._api_client,
+                project_id=self._project_id,
+            )
+        return Model(
+            model_id=model_id,
+            credentials=self._credentials,
+            project_id=self._project_id,
+        )
+
     @staticmethod
     def _serialize_messages(messages: List[Dict[str, str]]) -> str:
         """
@@ -7,6 +7,8 @@ Command-line (and importable) entry point for *ai-project-features*.
             --prompt: Natural-language instruction string
             --max-attempts: Optional (default=4) retries for the P5⇆D1 loop
             --quiet : Suppress progress banners; only print the recap
+            --batch : JSONL file of jobs to run in this (warm) process
+            --resume: Run id of an earlier run to continue from its checkpoints
 
 * What it does*:
   1. Boots a `Settings` object from `config.py`
@@ -16,23 +18,54 @@ Command-line (and importable) entry point for *ai-project-features*.
 Exit code is **0** on success, **1** if static checks never pass or any
 unexpected exception bubbles up.
 
+Resume
+------
+Every run prints its id and checkpoints its phase outputs under
+``CHECKPOINT_DIR``.  `--resume RUN_ID` reruns it: `--zip` and `--prompt`
+default to the recorded ones, phases whose inputs are unchanged are
+restored, and work restarts at the first phase whose inputs differ (pass a
+new `--prompt` to retry with an edited instruction).
+
+Batch mode
+----------
+`--batch jobs.jsonl` runs many (zip, prompt) pairs in one process, so
+interpreter, `Settings` and SDK start-up are paid once.  Each line is a JSON
+object with a prompt (``prompt``, or ``title`` + ``body`` as in a backlog
+file), an optional ``zip`` (defaults to `--zip`) and an optional ``id`` /
+``request_id``.  Every distinct ZIP is scanned once and its tree shared by
+all jobs targeting it; the LLM response cache is shared by all jobs.  Jobs
+run with `--jobs` bounded concurrency and one JSON result line per job is
+written to `--output` (default stdout; banners and logs go to stderr).
+P5⇄D1 edits the shared working tree, so that loop runs one job at a time.
+Exit code is **1** if any job failed.
+
 Example
 -------
 python -m src --zip my_project.zip \
                --prompt "Add OpenTelemetry tracing but keep architecture"
+
+python -m src --resume 20260101-120000-a1b2c3 --prompt "… but skip metrics"
+
+python -m src --batch nightly.jsonl --jobs 8 --output results.jsonl
 """
 from __future__ import annotations
 
 import argparse
+import json
 import sys
 import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Any, Dict, List, TextIO
 
 # ────────────────────────────────────────────────────────────────────────────
 # Local imports
 # ────────────────────────────────────────────────────────────────────────────
 from config import Settings
-from workflows import run_all
+from memory import Memory
+from workflows import phase_Z, resume_inputs, run_all
 
 # ────────────────────────────────────────────────────────────────────────────
 # CLI Argument Parser
@@ -45,22 +78,48 @@ def build_parser() -> argparse.ArgumentParser:
             """
             Multi-agent refactor assistant powered by BeeAI + Watsonx.ai.
 
-            Required:
+            Required (single run):
               --zip <path>      Path to a .zip archive of the target code base
               --prompt "<text>" Natural-language instructions for the LLM
 
+            Required (batch run):
+              --batch <jobs>    JSONL file of jobs; --zip is the default archive
+
             Optional:
               --max-attempts N  P5⇆D1 retry budget (default 4)
               --quiet           Only print the final recap
+              --jobs N          Concurrent jobs in batch mode (default 4)
+              --output <path>   Batch results JSONL (default stdout)
+              --resume RUN_ID   Continue an earlier run from its checkpoints
             """
         ),
     )
-    p.add_argument("--zip", required=True, help="Path to the ZIP archive")
+    p.add_argument("--zip", help="Path to the ZIP archive")
     p.add_argument(
         "--prompt",
-        required=True,
         help="Instruction string. Enclose in quotes if it contains spaces.",
     )
+    p.add_argument(
+        "--batch",
+        metavar="JOBS_JSONL",
+        help="Run every job in this JSONL file instead of a single prompt.",
+    )
+    p.add_argument(
+        "--jobs",
+        type=int,
+        default=4,
+        help="Maximum number of batch jobs running concurrently.",
+    )
+    p.add_argument(
+        "--output",
+        metavar="RESULTS_JSONL",
+        help="Where batch mode writes one JSON result per job (default stdout).",
+    )
+    p.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Resume this run: unchanged phases are restored from checkpoints.",
+    )
     p.add_argument(
         "--max-attempts",
         type=int,
@@ -79,9 +138,12 @@ def build_parser() -> argparse.ArgumentParser:
 # Progress helpers
 # ────────────────────────────────────────────────────────────────────────────
 def banner(title: str) -> None:
-    """Pretty printer for phase banners (skipped when --quiet)."""
+    """
+    Pretty printer for phase banners (skipped when --quiet).  Banners go to
+    stderr so stdout carries only the recap / batch JSONL.
+    """
     if not banner.quiet:
-        print(f"\n── {title} {'─' * (70 - len(title))}", flush=True)
+        print(f"\n── {title} {'─' * (70 - len(title))}", file=sys.stderr, flush=True)
 
 
 banner.quiet = False  # dynamic attribute
@@ -98,6 +160,26 @@ def main(argv: list[str] | None = None) -> None:
     # Attach banner helper to user preference
     banner.quiet = bool(args.quiet)
 
+    if args.batch:
+        if args.jobs < 1:
+            parser.error("--jobs must be at least 1")
+        batch_path = Path(args.batch).expanduser()
+        if not batch_path.exists():
+            parser.error(f"--batch file not found: {batch_path}")
+        settings = Settings()  # validates env vars or raises ValueError
+        banner("Settings loaded")
+        sys.exit(1 if run_batch(batch_path, args) else 0)
+
+    if args.resume:
+        inputs = resume_inputs(args.resume)
+        if inputs is None:
+            parser.error(f"--resume: no checkpoints found for run {args.resume!r}")
+        args.zip = args.zip or inputs.get("zip_path")
+        args.prompt = args.prompt or inputs.get("user_prompt")
+
+    if not (args.zip and args.prompt):
+        parser.error("--zip and --prompt are required unless --batch is given")
+
     # Sanity-check inputs
     zip_path = Path(args.zip).expanduser().resolve()
     if not zip_path.exists():
@@ -106,15 +188,20 @@ def main(argv: list[str] | None = None) -> None:
     settings = Settings()  # validates env vars or raises ValueError
     banner("Settings loaded")
 
+    mem = Memory()
     try:
-        recap_md = run_all(str(zip_path), args.prompt)
+        recap_md = run_all(str(zip_path), args.prompt, mem=mem, run_id=args.resume)
         print("\n✅  Workflow completed successfully!\n")
         print(recap_md)
+        if mem.get("run_id"):
+            banner(f"Run id: {mem.get('run_id')} (use --resume to rerun from checkpoints)")
         sys.exit(0)
 
     except RuntimeError as rte:
         # Expected failure, e.g., static checker exhaustion
         print(f"\n❌  {rte}", file=sys.stderr)
+        if mem.get("run_id"):
+            print(f"    Retry with: --resume {mem.get('run_id')}", file=sys.stderr)
         sys.exit(1)
 
     except Exception as exc:  # noqa: BLE001
@@ -123,6 +210,92 @@ def main(argv: list[str] | None = None) -> None:
         raise
 
 
+# ────────────────────────────────────────────────────────────────────────────
+# Batch mode
+# ────────────────────────────────────────────────────────────────────────────
+def load_jobs(path: Path, default_zip: str | None) -> List[Dict[str, Any]]:
+    """
+    Parse a jobs JSONL file into ``{"id", "zip", "prompt"}`` dicts.
+
+    Blank lines are skipped; a missing ``zip`` falls back to `default_zip`,
+    a missing ``prompt`` is built from ``title`` + ``body``.
+    """
+    jobs: List[Dict[str, Any]] = []
+    for lineno, line in enumerate(path.read_text(encoding="utf-8").splitlines(), 1):
+        if not line.strip():
+            continue
+        raw = json.loads(line)
+        prompt = raw.get("prompt") or "\n\n".join(
+            part for part in (raw.get("title"), raw.get("body")) if part
+        )
+        zip_path = raw.get("zip") or raw.get("zip_path") or default_zip
+        if not prompt or not zip_path:
+            raise ValueError(f"{path}:{lineno}: job needs a prompt and a zip")
+        jobs.append(
+            {
+                "id": raw.get("id") or raw.get("request_id") or f"job-{lineno}",
+                "zip": str(Path(zip_path).expanduser().resolve()),
+                "prompt": prompt,
+            }
+        )
+    return jobs
+
+
+def run_batch(path: Path, args: argparse.Namespace) -> int:
+    """Run every job in `path`; return the number of failed jobs."""
+    jobs = load_jobs(path, args.zip)
+    banner(f"Batch: {len(jobs)} jobs, concurrency {args.jobs}")
+
+    # Scan every distinct archive once; jobs start from the shared tree.
+    trees: Dict[str, str] = {}
+    for zip_path in sorted({job["zip"] for job in jobs}):
+        try:
+            trees[zip_path] = phase_Z(zip_path, mem=Memory())
+        except (OSError, ValueError) as exc:  # missing / corrupt archive
+            print(f"[batch] cannot scan {zip_path}: {exc}", file=sys.stderr)
+
+    out: TextIO = (
+        open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    )
+    write_lock = threading.Lock()
+    failures = 0
+
+    def run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        result: Dict[str, Any] = {"id": job["id"], "zip": job["zip"]}
+        try:
+            if job["zip"] not in trees:
+                raise RuntimeError("archive could not be scanned")
+            mem = Memory()
+            mem.put("tree", trees[job["zip"]])
+            try:
+                result["recap"] = run_all(job["zip"], job["prompt"], mem=mem)
+            finally:
+                result["run_id"] = mem.get("run_id")
+            result["ok"] = True
+        except Exception as exc:  # noqa: BLE001 – one bad job must not stop the batch
+            result["ok"] = False
+            result["error"] = f"{type(exc).__name__}: {exc}"
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        return result
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            futures = [pool.submit(run_job, job) for job in jobs]
+            for fut in as_completed(futures):
+                result = fut.result()
+                failures += not result["ok"]
+                with write_lock:
+                    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    banner(f"Batch done: {len(jobs) - failures} ok, {failures} failed")
+    return failures
+
+
 # ────────────────────────────────────────────────────────────────────────────
 # `python -m src` entry-point behaviour
 # ────────────────────────────────────────────────────────────────────────────
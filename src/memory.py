@@ -1,29 +1,49 @@
 # src/memory.py
 # ─────────────────────────────────────────────────────────────────────────────
 # Shared blackboard-like in-memory key-value store for agents to exchange data.
-# Each agent reads/writes from this singleton dictionary without tight coupling.
+# Each agent reads/writes from this store without tight coupling.
 # Used in all phases: user_prompt, tree, constraints, tasks, feature_spec, etc.
+#
+# Every pipeline run gets its own `Memory` (created by `workflows.run_all`) and
+# passes it to each agent's `run(mem=...)`.  Code that still uses the
+# module-level `MEM` is routed to the memory of the run it executes in, via a
+# context variable, so concurrent runs never see each other's keys.
 
-from typing import Any
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
 
 
 class Memory:
     """
     Tiny in-process blackboard memory for cross-agent state sharing.
-    All data is stored in a dictionary that lives at module level.
+    All data is stored in a plain dictionary owned by the instance.
 
     Example:
-        MEM.put("constraints", {...})
-        value = MEM.get("constraints")
+        mem = Memory()
+        mem.put("constraints", {...})
+        value = mem.get("constraints")
     """
 
     def __init__(self):
         self._data: dict[str, Any] = {}
+        self._lock = threading.Lock()
 
     def put(self, key: str, value: Any) -> None:
         """Stores `value` under `key`."""
         self._data[key] = value
 
+    def update(self, key: str, fn: Callable[[Any], Any]) -> Any:
+        """
+        Atomically replace the value under `key` with `fn(old_value)` and
+        return it – for keys several concurrent phases merge into
+        (e.g. ``token_usage``).  `fn` receives None when the key is unset.
+        """
+        with self._lock:
+            value = self._data[key] = fn(self._data.get(key))
+            return value
+
     def get(self, key: str) -> Any:
         """Retrieves the value stored under `key`, or None if not found."""
         return self._data.get(key)
@@ -40,5 +60,53 @@ class Memory:
         return dict(self._data)
 
 
-# Global instance used by all agents
-MEM = Memory()
+# Fallback store for code running outside any pipeline run (REPL, old tests)
+_DEFAULT = Memory()
+
+_CURRENT: ContextVar[Memory] = ContextVar("current_memory", default=_DEFAULT)
+
+
+def current() -> Memory:
+    """Return the memory of the run executing in this context."""
+    return _CURRENT.get()
+
+
+def resolve(mem: Optional[Memory]) -> Memory:
+    """Agents call this on their `mem` argument: explicit wins, else `current()`."""
+    return mem if mem is not None else _CURRENT.get()
+
+
+@contextmanager
+def use_memory(mem: Memory) -> Iterator[Memory]:
+    """Make `mem` the current memory for the duration of the block."""
+    token = _CURRENT.set(mem)
+    try:
+        yield mem
+    finally:
+        _CURRENT.reset(token)
+
+
+class _MemoryProxy:
+    """Backwards-compatible `MEM` that forwards to the context's current memory."""
+
+    def put(self, key: str, value: Any) -> None:
+        current().put(key, value)
+
+    def get(self, key: str) -> Any:
+        return current().get(key)
+
+    def update(self, key: str, fn: Callable[[Any], Any]) -> Any:
+        return current().update(key, fn)
+
+    def clear(self) -> None:
+        current().clear()
+
+    def keys(self):
+        return current().keys()
+
+    def as_dict(self) -> dict[str, Any]:
+        return current().as_dict()
+
+
+# Global handle kept for existing callers; resolves per run via `use_memory`
+MEM = _MemoryProxy()
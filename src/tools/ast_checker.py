@@ -0,0 +1,206 @@
+# src/tools/ast_checker.py
+# ────────────────────────────────────────────────────────────────────────────
+# In-memory static checks for generated / patched Python buffers (phase D1).
+#
+# `check_source(source, path, ...)` never touches the filesystem:
+#
+#   syntax             `compile(source, path, "exec", dont_inherit=True)` –
+#                      catches parser errors and compile-time ones such as
+#                      `return` outside a function; no `.pyc` is written.
+#   undefined-name     a name read in some scope that resolves to the module
+#                      scope (per `symtable`) but is neither bound there nor a
+#                      builtin.  Skipped for modules with `from x import *`.
+#   unresolved-import  an import of a *local* module (one whose top-level
+#                      package is in `modules`) that does not exist, or a
+#                      `from m import name` where `m` defines no `name` and
+#                      has no submodule `name`.  Imports guarded by
+#                      `try: … except ImportError` are optional and skipped.
+#
+# `modules` maps dotted module names to the names they bind at top level
+# (`module_globals`), or to ``None`` when that is unknowable (star imports,
+# a module-level `__getattr__`, syntax errors); `tools.import_graph` keeps
+# this map current for the project tree.
+
+import ast
+import builtins
+import symtable
+from dataclasses import dataclass
+from typing import Iterator, List, Mapping, Optional, Set
+
+from tools.symbol_index import resolve_import
+
+_BUILTINS = frozenset(dir(builtins)) | {
+    "__file__", "__name__", "__doc__", "__spec__", "__loader__",
+    "__package__", "__builtins__", "__path__", "__annotations__",
+    "__dict__", "__cached__",
+}
+_IMPORT_ERRORS = {"ImportError", "ModuleNotFoundError", "Exception", "BaseException"}
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    path: str
+    line: int
+    col: int
+    code: str      # "syntax" | "undefined-name" | "unresolved-import"
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}:{self.line}:{self.col}: {self.code}: {self.message}"
+
+
+def _tables(table: symtable.SymbolTable) -> Iterator[symtable.SymbolTable]:
+    yield table
+    for child in table.get_children():
+        yield from _tables(child)
+
+
+def _has_star_import(tree: ast.Module) -> bool:
+    return any(
+        isinstance(node, ast.ImportFrom) and any(a.name == "*" for a in node.names)
+        for node in ast.walk(tree)
+    )
+
+
+def _bound_globals(table: symtable.SymbolTable) -> Set[str]:
+    names: Set[str] = set()
+    for scope in _tables(table):
+        for sym in scope.get_symbols():
+            if scope is table:
+                if sym.is_assigned() or sym.is_imported() or sym.is_namespace():
+                    names.add(sym.get_name())
+            elif sym.is_declared_global() and sym.is_assigned():
+                names.add(sym.get_name())
+    return names
+
+
+def module_globals(source: str, path: str = "<unknown>") -> Optional[Set[str]]:
+    """Names `source` binds at module level, or ``None`` if not statically known."""
+    try:
+        tree = ast.parse(source, path)
+        table = symtable.symtable(source, path, "exec")
+    except (SyntaxError, ValueError):
+        return None
+    names = _bound_globals(table)
+    if _has_star_import(tree) or "__getattr__" in names:
+        return None
+    return names
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Checks
+# ──────────────────────────────────────────────────────────────────────────
+def _undefined_names(tree: ast.Module, table: symtable.SymbolTable, path: str) -> List[Diagnostic]:
+    defined = _bound_globals(table) | _BUILTINS
+    missing: Set[str] = set()
+    for scope in _tables(table):
+        for sym in scope.get_symbols():
+            name = sym.get_name()
+            if sym.is_referenced() and sym.is_global() and name not in defined:
+                missing.add(name)
+    if not missing:
+        return []
+
+    first = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id in missing:
+            pos = (node.lineno, node.col_offset)
+            first[node.id] = min(first.get(node.id, pos), pos)
+    return [
+        Diagnostic(path, line, col + 1, "undefined-name", f"name '{name}' is not defined")
+        for name, (line, col) in sorted(first.items(), key=lambda kv: kv[1])
+    ]
+
+
+def _optional_imports(tree: ast.Module) -> Set[int]:
+    """ids of import nodes inside `try:` blocks that handle ImportError."""
+    guarded: Set[int] = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Try):
+            continue
+        caught: Set[str] = set()
+        for handler in node.handlers:
+            if handler.type is None:
+                caught.add("BaseException")
+            for exc in ast.walk(handler.type) if handler.type is not None else ():
+                if isinstance(exc, ast.Name):
+                    caught.add(exc.id)
+        if caught & _IMPORT_ERRORS:
+            for stmt in node.body:
+                guarded.update(
+                    id(n) for n in ast.walk(stmt) if isinstance(n, (ast.Import, ast.ImportFrom))
+                )
+    return guarded
+
+
+def _unresolved_imports(
+    tree: ast.Module,
+    path: str,
+    module: str,
+    is_package: bool,
+    modules: Mapping[str, Optional[Set[str]]],
+) -> List[Diagnostic]:
+    local_roots = {name.split(".")[0] for name in modules}
+    optional = _optional_imports(tree)
+    found: List[Diagnostic] = []
+
+    def report(node: ast.AST, message: str) -> None:
+        found.append(Diagnostic(path, node.lineno, node.col_offset + 1, "unresolved-import", message))
+
+    for node in ast.walk(tree):
+        if id(node) in optional:
+            continue
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name.split(".")[0] in local_roots and alias.name not in modules:
+                    report(node, f"no local module named '{alias.name}'")
+        elif isinstance(node, ast.ImportFrom):
+            base = resolve_import(module, is_package, node.level, node.module)
+            if not base or (node.level == 0 and base.split(".")[0] not in local_roots):
+                continue
+            if base not in modules:
+                report(node, f"no local module named '{base}'")
+                continue
+            exports = modules[base]
+            for alias in node.names:
+                if alias.name == "*" or f"{base}.{alias.name}" in modules:
+                    continue
+                if exports is not None and alias.name not in exports:
+                    report(node, f"cannot import name '{alias.name}' from '{base}'")
+    return found
+
+
+def check_source(
+    source: str,
+    path: str,
+    *,
+    module: str = "",
+    is_package: bool = False,
+    modules: Optional[Mapping[str, Optional[Set[str]]]] = None,
+    names: bool = True,
+) -> List[Diagnostic]:
+    """
+    Diagnostics for one buffer, sorted by position; empty means clean.
+    `module` (dotted name of `path`) is needed to resolve relative imports;
+    imports are only checked when `modules` is given; `names=False` skips
+    the undefined-name check (e.g. for untouched importers of a change).
+
+    Example:
+        for diag in check_source(code, "src/agents/new_agent.py",
+                                 module="agents.new_agent", modules=index):
+            print(diag)
+    """
+    try:
+        compile(source, path, "exec", dont_inherit=True)
+    except SyntaxError as exc:
+        return [Diagnostic(path, exc.lineno or 1, exc.offset or 1, "syntax", exc.msg)]
+    except ValueError as exc:  # e.g. null bytes
+        return [Diagnostic(path, 1, 1, "syntax", str(exc))]
+
+    tree = ast.parse(source, path)
+    found: List[Diagnostic] = []
+    if names and not _has_star_import(tree):
+        found += _undefined_names(tree, symtable.symtable(source, path, "exec"), path)
+    if modules is not None:
+        found += _unresolved_imports(tree, path, module, is_package, modules)
+    return sorted(found, key=lambda d: (d.line, d.col))
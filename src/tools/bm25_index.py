@@ -0,0 +1,145 @@
+# src/tools/bm25_index.py
+# ────────────────────────────────────────────────────────────────────────────
+# Compact in-memory BM25 inverted index plus reciprocal rank fusion, used by
+# the hybrid retriever of phase P2.
+#
+# Layout (CSC-style, all NumPy):
+#
+#   vocab      {term: term_id}
+#   indptr     int64[n_terms + 1]   postings of term t are indptr[t]:indptr[t+1]
+#   doc_ids    int32[n_postings]    chunk row of each posting
+#   weights    float32[n_postings]  precomputed BM25 contribution of the posting
+#
+# Because the whole BM25 term (idf × saturated, length-normalised tf) is
+# precomputed per posting, a query is one slice-and-add per query term plus
+# `argpartition` – no per-document Python work.
+#
+# Tokens are lower-cased words; identifiers are also split into their
+# snake_case / camelCase parts so `OrderRepository.get_by_id` matches a query
+# about "order repository".
+
+import logging
+import re
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple, TypeVar
+
+import numpy as np
+
+_LOG = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+# Too common in prose and code to carry any signal.
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have if in into is it its of on or "
+    "that the this to was were will with not no can should must self none true "
+    "false return def class import".split()
+)
+
+# Standard BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+# Rank constant of reciprocal rank fusion (Cormack et al. use 60).
+RRF_K = 60
+
+T = TypeVar("T", bound=Hashable)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens, with identifiers also split into their parts."""
+    tokens: List[str] = []
+    for word in _WORD_RE.findall(text):
+        lower = word.lower()
+        if lower not in STOPWORDS:
+            tokens.append(lower)
+        if "_" in word or (not word.islower() and not word.isupper()):
+            parts = [p.lower() for chunk in word.split("_") for p in _CAMEL_RE.findall(chunk)]
+            if len(parts) > 1:
+                tokens.extend(p for p in parts if p not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """
+    Immutable BM25 index over a list of texts (rows are list positions).
+
+    Example:
+        index = BM25Index([text for _, text in chunks])
+        rows = index.top_k("add order export endpoint", k=10)
+    """
+
+    def __init__(self, texts: Sequence[str], *, k1: float = K1, b: float = B):
+        self.n_docs = len(texts)
+        self.vocab: Dict[str, int] = {}
+
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        lengths = np.zeros(self.n_docs, dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[row] = sum(counts.values())
+            for term, tf in counts.items():
+                term_ids.append(self.vocab.setdefault(term, len(self.vocab)))
+                doc_ids.append(row)
+                tfs.append(tf)
+
+        terms = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(terms, kind="stable")
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int32)[order]
+        tf = np.asarray(tfs, dtype=np.float32)[order]
+        df = np.bincount(terms, minlength=len(self.vocab))
+        self.indptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=self.indptr[1:])
+
+        avgdl = float(lengths.mean()) if self.n_docs else 0.0
+        idf = np.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1.0 - b + b * lengths[self.doc_ids] / max(avgdl, 1e-8))
+        self.weights = (np.repeat(idf, df) * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every row for `query` (float32[n_docs])."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            tid = self.vocab.get(term)
+            if tid is None:
+                continue
+            lo, hi = self.indptr[tid], self.indptr[tid + 1]
+            # doc ids are unique within one term's postings, so += is safe
+            scores[self.doc_ids[lo:hi]] += self.weights[lo:hi]
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[int]:
+        """Rows of the `k` best-scoring texts (score > 0), best first."""
+        if self.n_docs == 0 or k <= 0:
+            return []
+        scores = self.scores(query)
+        hits = int(np.count_nonzero(scores))
+        k = min(k, hits)
+        if k == 0:
+            return []
+        top = np.argpartition(scores, self.n_docs - k)[self.n_docs - k:]
+        return top[np.argsort(-scores[top], kind="stable")].tolist()
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[Sequence[T]],
+    k: int,
+    *,
+    rrf_k: int = RRF_K,
+) -> List[T]:
+    """
+    Fuse several best-first rankings: each item scores ``Σ 1 / (rrf_k + rank)``
+    over the lists it appears in.  Ties keep first-seen order.
+    """
+    fused: Dict[T, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (rrf_k + rank)
+    ordered: List[Tuple[T, float]] = sorted(fused.items(), key=lambda kv: -kv[1])
+    return [item for item, _ in ordered[:k]]
@@ -0,0 +1,207 @@
+# src/tools/checkpoint.py
+# ────────────────────────────────────────────────────────────────────────────
+# Per-run checkpoints of phase outputs, so a rerun resumes where inputs changed.
+#
+# Layout under `root/<run_id>/`:
+#
+#   manifest.json     {"version", "run_id", "inputs": {...},
+#                      "phases": {phase: {"key", "outputs": {mem key: digest}}},
+#                      "created": [path, ...]}
+#   <phase>.json.gz   the memory keys the phase wrote, JSON-encoded
+#
+# `created` lists the files the run added to the project tree (P5 is not
+# checkpointed, but a resumed run must still treat its own files as ours).
+#
+# A phase's *key* hashes its id, caller-supplied `extra` (archive
+# fingerprint, prompt, model settings …) and the digests of the memory
+# values it reads.  Digests of values restored or saved here are remembered
+# (by object identity), so a large input such as the symbol index is hashed
+# once.  On a rerun a phase whose key matches the manifest is restored
+# instead of executed; editing the prompt changes `user_prompt`'s digest and
+# therefore the key of every phase downstream of it – and only those.
+#
+# Values that are not plain JSON need a codec (encode, decode) keyed by the
+# memory key, e.g. ``{"symbol_index": (SymbolIndex.to_dict,
+# SymbolIndex.from_dict)}``.  A phase whose outputs cannot be encoded is
+# simply not checkpointed.
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import secrets
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+_LOG = logging.getLogger(__name__)
+
+# Bump when the key derivation or file format changes (old runs then miss).
+CHECKPOINT_VERSION = 1
+
+Codec = Tuple[Callable[[Any], Any], Callable[[Any], Any]]
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+
+
+def prune_runs(root: Path, keep: int) -> int:
+    """
+    Delete all but the `keep` most recently written run directories under
+    `root` (those holding a ``manifest.json``); returns how many were removed.
+    """
+    try:
+        runs = [
+            ((d / "manifest.json").stat().st_mtime, d)
+            for d in Path(root).iterdir()
+            if (d / "manifest.json").is_file()
+        ]
+    except OSError:
+        return 0
+    removed = 0
+    for _, d in sorted(runs, key=lambda e: e[0], reverse=True)[max(keep, 0):]:
+        shutil.rmtree(d, ignore_errors=True)
+        removed += 1
+    if removed:
+        _LOG.info("checkpoints: pruned %d old runs under %s", removed, root)
+    return removed
+
+
+class CheckpointStore:
+    """
+    Example:
+        store = CheckpointStore(Path("~/.cache/runs").expanduser(), run_id)
+        key = store.phase_key("P1", ["user_prompt", "tree"], mem, extra=model)
+        if not store.restore("P1", key, mem):
+            request_parser_agent.run(mem=mem)
+            store.save("P1", key, {"constraints": mem.get("constraints")})
+    """
+
+    def __init__(self, root: Path, run_id: str, codecs: Optional[Dict[str, Codec]] = None):
+        self.run_id = run_id
+        self.dir = Path(root) / run_id
+        self._codecs = codecs or {}
+        self._lock = threading.Lock()
+        self._digests: Dict[str, Tuple[Any, str]] = {}  # mem key → (value, digest)
+        self._manifest = self.load_manifest(root, run_id) or {
+            "version": CHECKPOINT_VERSION,
+            "run_id": run_id,
+            "inputs": {},
+            "phases": {},
+        }
+
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def load_manifest(root: Path, run_id: str) -> Optional[Dict[str, Any]]:
+        """The manifest of `run_id`, or ``None`` if missing / unreadable / outdated."""
+        try:
+            manifest = json.loads((Path(root) / run_id / "manifest.json").read_text("utf-8"))
+        except (OSError, ValueError):
+            return None
+        return manifest if manifest.get("version") == CHECKPOINT_VERSION else None
+
+    def _write_manifest(self) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.dir / f"manifest.json.{os.getpid()}.{threading.get_ident()}"
+        tmp.write_text(json.dumps(self._manifest, indent=1, sort_keys=True), "utf-8")
+        os.replace(tmp, self.dir / "manifest.json")
+
+    @property
+    def inputs(self) -> Dict[str, Any]:
+        return dict(self._manifest["inputs"])
+
+    def set_inputs(self, **inputs: Any) -> None:
+        with self._lock:
+            self._manifest["inputs"].update(inputs)
+            self._write_manifest()
+
+    @property
+    def created(self) -> List[str]:
+        return list(self._manifest.get("created", []))
+
+    def add_created(self, paths: Iterable[str]) -> None:
+        """Remember files this run created in the project tree."""
+        with self._lock:
+            known = set(self._manifest.get("created", []))
+            merged = known.union(paths)
+            if merged == known:
+                return
+            self._manifest["created"] = sorted(merged)
+            self._write_manifest()
+
+    # ------------------------------------------------------------------ #
+    def _encode(self, key: str, value: Any) -> Any:
+        codec = self._codecs.get(key)
+        return codec[0](value) if codec and value is not None else value
+
+    def _decode(self, key: str, value: Any) -> Any:
+        codec = self._codecs.get(key)
+        return codec[1](value) if codec and value is not None else value
+
+    def digest(self, key: str, value: Any) -> str:
+        cached = self._digests.get(key)
+        if cached is not None and cached[0] is value:
+            return cached[1]
+        digest = _sha1(_dumps(self._encode(key, value)))
+        self._digests[key] = (value, digest)
+        return digest
+
+    def phase_key(self, phase_id: str, reads: Iterable[str], mem: Any, extra: str = "") -> str:
+        parts = [CHECKPOINT_VERSION, phase_id, extra]
+        parts += [[k, self.digest(k, mem.get(k))] for k in sorted(reads)]
+        return _sha1(_dumps(parts))
+
+    # ------------------------------------------------------------------ #
+    def restore(self, phase_id: str, key: str, mem: Any) -> bool:
+        """Put the saved outputs of `phase_id` into `mem` if its key matches."""
+        entry = self._manifest["phases"].get(phase_id)
+        if not entry or entry.get("key") != key:
+            return False
+        try:
+            with gzip.open(self.dir / f"{phase_id}.json.gz", "rt", encoding="utf-8") as fh:
+                encoded = json.load(fh)
+            values = {k: self._decode(k, v) for k, v in encoded.items()}
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            _LOG.warning("checkpoint %s/%s unreadable (%s) – rerunning", self.run_id, phase_id, exc)
+            return False
+        for k, value in values.items():
+            mem.put(k, value)
+            if k in entry.get("outputs", {}):
+                self._digests[k] = (value, entry["outputs"][k])
+        _LOG.info("Phase %s restored from checkpoint %s", phase_id, self.run_id)
+        return True
+
+    def save(self, phase_id: str, key: str, outputs: Dict[str, Any]) -> bool:
+        """Persist `outputs` (mem key → value) as the result of `phase_id`."""
+        try:
+            encoded = {k: self._encode(k, v) for k, v in outputs.items()}
+            texts = {k: _dumps(v) for k, v in encoded.items()}
+        except (TypeError, ValueError) as exc:
+            _LOG.warning("phase %s outputs are not serialisable (%s) – no checkpoint", phase_id, exc)
+            return False
+        digests = {k: _sha1(t) for k, t in texts.items()}
+        for k, value in outputs.items():
+            self._digests[k] = (value, digests[k])
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self.dir / f"{phase_id}.json.gz"
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=5) as fh:
+            fh.write("{" + ",".join(f"{json.dumps(k)}:{t}" for k, t in texts.items()) + "}")
+        os.replace(tmp, path)
+        with self._lock:
+            self._manifest["phases"][phase_id] = {"key": key, "outputs": digests}
+            self._write_manifest()
+        return True
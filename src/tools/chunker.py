@@ -0,0 +1,292 @@
+# src/tools/chunker.py
+# ────────────────────────────────────────────────────────────────────────────
+# Structure-aware splitting of documentation into retrieval chunks (phase P2).
+#
+# 1. The text is cut into *sections* at Markdown headings (ATX `## Title` and
+#    setext underlines) or reStructuredText section titles (a title line with
+#    an under- and optional overline of one punctuation character).  Headings
+#    inside fenced code blocks are ignored.
+# 2. Each section is cut into *blocks* at blank lines, except that a fenced
+#    code block (``` / ~~~) or an indented reST literal block stays whole.
+# 3. Blocks are packed into chunks of at most `max_tokens`, never crossing a
+#    heading unless the running chunk is still smaller than `min_tokens`.
+#    Consecutive chunks of one section share up to `overlap_tokens` of text.
+#    A single block larger than the window is split at line boundaries.
+# 4. Every chunk is prefixed with its heading path ("Deploy › Docker") and
+#    identified by the SHA-1 of its text, which is stable across processes
+#    and equal to the key `tools.vector_index` stores its embedding under.
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import List, NamedTuple, Optional, Tuple
+
+from tools.token_budget import count_tokens
+
+# Bump when the output for the same input changes (invalidates chunk caches).
+CHUNKER_VERSION = 1
+
+DEFAULT_MAX_TOKENS = 256
+DEFAULT_OVERLAP_TOKENS = 32
+DEFAULT_MIN_TOKENS = 24
+
+# Chunks whose body is shorter than this many characters carry no signal.
+MIN_BODY_CHARS = 40
+
+_ATX_RE = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+_FENCE_RE = re.compile(r"^\s*(`{3,}|~{3,})")
+_RST_ADORN_RE = re.compile(r"^([=\-`:'\"~^_*+#<>.])\1{2,}\s*$")
+_SETEXT_RE = re.compile(r"^(=+|-+)\s*$")
+
+
+class Chunk(NamedTuple):
+    id: str        # sha1 of `text`
+    source: str    # "<doc name>:<id prefix>"
+    heading: str   # heading path, "" before the first heading
+    text: str
+
+
+def chunk_id(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Section:
+    path: List[str]
+    lines: List[str]
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Sections
+# ──────────────────────────────────────────────────────────────────────────
+def _is_rst(name: str) -> bool:
+    return name.lower().endswith(".rst")
+
+
+def _sections(lines: List[str], rst: bool) -> List[_Section]:
+    sections = [_Section(path=[], lines=[])]
+    stack: List[Tuple[object, str]] = []  # (level key, title)
+    rst_levels: List[str] = []            # adornment styles in order of first use
+    fence: Optional[str] = None
+    i = 0
+
+    def open_section(level: object, title: str) -> None:
+        while stack and _deeper_or_equal(stack[-1][0], level, rst_levels):
+            stack.pop()
+        stack.append((level, title.strip()))
+        sections.append(_Section(path=[t for _, t in stack], lines=[]))
+
+    while i < len(lines):
+        line = lines[i]
+        if fence is not None:
+            if line.strip().startswith(fence):
+                fence = None
+            sections[-1].lines.append(line)
+            i += 1
+            continue
+        m = _FENCE_RE.match(line)
+        if m:
+            fence = m.group(1)
+            sections[-1].lines.append(line)
+            i += 1
+            continue
+
+        nxt = lines[i + 1] if i + 1 < len(lines) else ""
+        if rst:
+            # overline + title + underline
+            if (
+                _RST_ADORN_RE.match(line)
+                and i + 2 < len(lines)
+                and lines[i + 1].strip()
+                and lines[i + 2].strip() == line.strip()
+            ):
+                style = "over" + line.strip()[0]
+                if style not in rst_levels:
+                    rst_levels.append(style)
+                open_section(style, lines[i + 1])
+                i += 3
+                continue
+            # title + underline
+            if (
+                line.strip()
+                and not _RST_ADORN_RE.match(line)
+                and _RST_ADORN_RE.match(nxt)
+                and len(nxt.strip()) >= len(line.strip())
+            ):
+                style = nxt.strip()[0]
+                if style not in rst_levels:
+                    rst_levels.append(style)
+                open_section(style, line)
+                i += 2
+                continue
+        else:
+            m = _ATX_RE.match(line)
+            if m:
+                open_section(len(m.group(1)), m.group(2))
+                i += 1
+                continue
+            # setext: a one-line paragraph underlined with === or ---
+            prev_blank = i == 0 or not lines[i - 1].strip()
+            if (
+                line.strip()
+                and prev_blank
+                and _SETEXT_RE.match(nxt)
+                and not line.lstrip().startswith(("-", "*", ">", "|"))
+            ):
+                open_section(1 if nxt.strip()[0] == "=" else 2, line)
+                i += 2
+                continue
+
+        sections[-1].lines.append(line)
+        i += 1
+    return sections
+
+
+def _deeper_or_equal(a: object, b: object, rst_levels: List[str]) -> bool:
+    """True if heading level `a` is at least as deep as `b` (so `b` closes it)."""
+    if isinstance(a, int) and isinstance(b, int):
+        return a >= b
+    return rst_levels.index(a) >= rst_levels.index(b)  # type: ignore[arg-type]
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Blocks
+# ──────────────────────────────────────────────────────────────────────────
+def _blocks(lines: List[str], rst: bool) -> List[str]:
+    blocks: List[List[str]] = []
+    current: List[str] = []
+    fence: Optional[str] = None
+    literal = False  # inside an indented reST literal block
+
+    def flush() -> None:
+        if any(line.strip() for line in current):
+            blocks.append(list(current))
+        current.clear()
+
+    for line in lines:
+        if fence is not None:
+            current.append(line)
+            if line.strip().startswith(fence):
+                fence = None
+                flush()
+            continue
+        m = _FENCE_RE.match(line)
+        if m:
+            flush()
+            fence = m.group(1)
+            current.append(line)
+            continue
+
+        if literal:
+            if not line.strip() or line[:1].isspace():
+                current.append(line)
+                continue
+            literal = False
+            flush()
+        if not line.strip():
+            flush()
+            continue
+        if (
+            rst
+            and not current
+            and line[:1].isspace()
+            and blocks
+            and blocks[-1][-1].rstrip().endswith("::")
+        ):
+            # the literal block stays with the paragraph that introduces it
+            current.extend(blocks.pop() + [""])
+            literal = True
+        current.append(line)
+    flush()
+    return ["\n".join(b).strip("\n") for b in blocks]
+
+
+def _split_oversized(block: str, max_tokens: int) -> List[str]:
+    """Split one block at line boundaries into pieces of ≤ max_tokens."""
+    pieces: List[str] = []
+    current: List[str] = []
+    used = 0
+    for line in block.splitlines():
+        cost = count_tokens(line) + 1
+        if current and used + cost > max_tokens:
+            pieces.append("\n".join(current))
+            current, used = [], 0
+        current.append(line)
+        used += cost
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Packing
+# ──────────────────────────────────────────────────────────────────────────
+def chunk_document(
+    name: str,
+    text: str,
+    *,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    min_tokens: int = DEFAULT_MIN_TOKENS,
+) -> List[Chunk]:
+    """
+    Split the document `name` (Markdown, reST or plain text) into chunks.
+
+    Example:
+        for c in chunk_document("docs/deploy.md", text, max_tokens=256):
+            print(c.id[:8], c.heading, count_tokens(c.text))
+    """
+    rst = _is_rst(name)
+    chunks: List[Chunk] = []
+    current: List[Tuple[str, int]] = []  # (block, tokens) of the running chunk
+    heading = ""
+    used = 0
+
+    def emit() -> None:
+        body = "\n\n".join(b for b, _ in current).strip()
+        if len(body) >= MIN_BODY_CHARS:
+            full = f"{heading}\n\n{body}" if heading else body
+            cid = chunk_id(full)
+            chunks.append(Chunk(cid, f"{name}:{cid[:12]}", heading, full))
+
+    for section in _sections(text.splitlines(), rst):
+        blocks = [
+            piece
+            for block in _blocks(section.lines, rst)
+            for piece in (
+                _split_oversized(block, max_tokens)
+                if count_tokens(block) > max_tokens
+                else [block]
+            )
+        ]
+        if not blocks:
+            continue  # heading-only sections live on in their children's path
+        path = " › ".join(section.path)
+        if current and used >= min_tokens:
+            emit()
+            current, used = [], 0
+        if not current:
+            heading = path
+        elif section.path:
+            # a tiny section is merged into this one; keep this one's title inline
+            title = section.path[-1]
+            current.append((title, count_tokens(title)))
+            used += current[-1][1]
+
+        for block in blocks:
+            cost = count_tokens(block)
+            if current and used + cost > max_tokens:
+                emit()
+                carried: List[Tuple[str, int]] = []
+                room = min(overlap_tokens, max_tokens - cost)
+                for prev, prev_cost in reversed(current):
+                    if prev_cost > room:
+                        break
+                    carried.insert(0, (prev, prev_cost))
+                    room -= prev_cost
+                current, used, heading = carried, sum(c for _, c in carried), path
+            current.append((block, cost))
+            used += cost
+    if current:
+        emit()
+    return chunks
@@ -0,0 +1,305 @@
+# src/tools/collect_worker.py
+# ────────────────────────────────────────────────────────────────────────────
+# Long-lived `pytest --collect-only` worker for phase D1.
+#
+# A fresh `python -m pytest --collect-only` pays for importing pytest, the
+# project and its third-party dependencies on every P5⇄D1 attempt.  The
+# worker is a separate (spawned, not forked) process that imports pytest
+# once and then serves collection requests over a pipe:
+#
+#   request   {"paths": [...], "evict": [...] | None}
+#   response  {"exit_code", "collected", "errors": {file: text}, "output"}
+#
+# Before each collection the worker drops from `sys.modules` every module
+# whose file lives under a watched root and is listed in `evict`, or whose
+# file changed since it was imported (`evict=None` drops all watched
+# modules).  Third-party packages stay imported, which is where the warm-up
+# cost lives.  Results come from a small pytest plugin rather than from
+# parsing terminal output.
+#
+# The project code runs in the worker, not in the orchestrator, and in a
+# light sandbox: the worker keeps its cwd at the project `root` (pytest
+# needs it) but replaces its environment with `_ENV_KEEP`, PYTHONPATH and
+# the caller's explicit `env` (e.g. placeholder settings that modules read
+# on import), so API keys never reach test modules unless passed on
+# purpose; on POSIX each collection also gets a CPU-seconds and
+# address-space rlimit.
+# A worker that hangs past `timeout` is killed; one that dies (including
+# on SIGXCPU / MemoryError) raises `WorkerError` so the caller can fall
+# back to a one-shot subprocess.  The worker is recycled after `max_runs`
+# collections to bound state drift.
+
+import importlib
+import io
+import logging
+import multiprocessing
+import os
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover – not on Windows
+    resource = None
+
+_LOG = logging.getLogger(__name__)
+
+# Variables the worker inherits from the orchestrator; everything else is dropped.
+_ENV_KEEP = ("PATH", "HOME", "TMPDIR", "TEMP", "TMP", "LANG", "LC_ALL", "LC_CTYPE", "SYSTEMROOT")
+
+
+class WorkerError(RuntimeError):
+    """The worker died, timed out or could not be started."""
+
+
+class CollectResult(NamedTuple):
+    exit_code: int
+    collected: int
+    errors: Dict[str, str]  # file / node id → failure text
+    output: str             # pytest's own (quiet) terminal output
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Worker side
+# ──────────────────────────────────────────────────────────────────────────
+class _Collector:
+    """pytest plugin recording the collection outcome."""
+
+    def __init__(self) -> None:
+        self.collected = 0
+        self.errors: Dict[str, str] = {}
+
+    def pytest_collectreport(self, report) -> None:
+        if report.failed:
+            key = str(getattr(report, "fspath", "") or report.nodeid or "<session>")
+            self.errors[key] = report.longreprtext
+
+    def pytest_collection_finish(self, session) -> None:
+        self.collected = len(session.items)
+
+
+def _under(path: Optional[str], roots: List[Path]) -> Optional[Path]:
+    if not path:
+        return None
+    resolved = Path(path).resolve()
+    return resolved if any(resolved.is_relative_to(r) for r in roots) else None
+
+
+def _mtime(path: Path) -> int:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return -1
+
+
+def _evict(evict: Optional[Iterable[str]], roots: List[Path], loaded: Dict[str, int]) -> int:
+    wanted = None if evict is None else {Path(p).resolve() for p in evict}
+    dropped = 0
+    for name, module in list(sys.modules.items()):
+        path = _under(getattr(module, "__file__", None), roots)
+        if path is None:
+            continue
+        if wanted is None or path in wanted or loaded.get(name) != _mtime(path):
+            del sys.modules[name]
+            dropped += 1
+    return dropped
+
+
+def _snapshot(roots: List[Path]) -> Dict[str, int]:
+    snap: Dict[str, int] = {}
+    for name, module in list(sys.modules.items()):
+        path = _under(getattr(module, "__file__", None), roots)
+        if path is not None:
+            snap[name] = _mtime(path)
+    return snap
+
+
+def sandbox_env(
+    pythonpath: Iterable[str], extra: Optional[Mapping[str, str]] = None
+) -> Dict[str, str]:
+    """The orchestrator's `_ENV_KEEP` variables, `extra` and `pythonpath`, nothing else."""
+    env = {k: os.environ[k] for k in _ENV_KEEP if k in os.environ}
+    env.update(extra or {})
+    env["PYTHONPATH"] = os.pathsep.join(pythonpath)
+    return env
+
+
+def _limit_memory(max_bytes: int) -> None:
+    if resource is None or max_bytes <= 0:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        max_bytes = min(max_bytes, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (max_bytes, hard))
+
+
+def _limit_cpu(seconds: int) -> None:
+    """Allow `seconds` more CPU time from now (soft limit → SIGXCPU)."""
+    if resource is None or seconds <= 0:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(usage.ru_utime + usage.ru_stime) + seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(
+    conn,
+    root: str,
+    pythonpath: List[str],
+    watch: List[str],
+    cpu_seconds: int = 0,
+    memory_bytes: int = 0,
+    env: Optional[Dict[str, str]] = None,
+) -> None:
+    os.chdir(root)
+    os.environ.clear()
+    os.environ.update(sandbox_env(pythonpath, env))
+    sys.path[:0] = [p for p in pythonpath if p not in sys.path]
+    _limit_memory(memory_bytes)
+    roots = [Path(w).resolve() for w in watch]
+
+    import pytest  # the expensive import we keep warm
+
+    loaded: Dict[str, int] = {}
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+
+        _limit_cpu(cpu_seconds)
+        _evict(request.get("evict"), roots, loaded)
+        importlib.invalidate_caches()
+        plugin = _Collector()
+        out = io.StringIO()
+        args = ["--collect-only", "-q", "-p", "no:cacheprovider", *request.get("paths", [])]
+        with redirect_stdout(out), redirect_stderr(out):
+            try:
+                exit_code = int(pytest.main(args, plugins=[plugin]))
+            except BaseException:  # noqa: BLE001 – report anything, keep serving
+                exit_code = -1
+                plugin.errors["<session>"] = traceback.format_exc()
+        loaded = _snapshot(roots)
+        conn.send(
+            {
+                "exit_code": exit_code,
+                "collected": plugin.collected,
+                "errors": plugin.errors,
+                "output": out.getvalue(),
+            }
+        )
+    conn.close()
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Orchestrator side
+# ──────────────────────────────────────────────────────────────────────────
+class CollectWorker:
+    """
+    Example:
+        worker = CollectWorker(Path("."), pythonpath=["."], watch=[Path("src"), Path("tests")])
+        result = worker.collect(["tests/test_app.py"], evict=["src/app.py"])
+        print(result.ok, result.collected, result.errors)
+        worker.close()
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        *,
+        pythonpath: Iterable[str],
+        watch: Iterable[Path],
+        timeout: float = 120.0,
+        max_runs: int = 50,
+        cpu_seconds: int = 0,
+        memory_bytes: int = 0,
+        env: Optional[Mapping[str, str]] = None,
+    ):
+        self.root = str(Path(root).resolve())
+        self.pythonpath = [str(p) for p in pythonpath]
+        self.watch = [str(Path(w).resolve()) for w in watch]
+        self.timeout = timeout
+        self.max_runs = max_runs
+        self.cpu_seconds = cpu_seconds     # per collection; 0 = unlimited
+        self.memory_bytes = memory_bytes   # address space; 0 = unlimited
+        self.env = dict(env or {})         # on top of the sandboxed environment
+        self._proc = None
+        self._conn = None
+        self._runs = 0
+
+    def _start(self) -> None:
+        ctx = multiprocessing.get_context("spawn")
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(
+            target=_worker_main,
+            args=(
+                child, self.root, self.pythonpath, self.watch,
+                self.cpu_seconds, self.memory_bytes, self.env,
+            ),
+            name="d1-collect-worker",
+            daemon=True,
+        )
+        try:
+            proc.start()
+        except (OSError, RuntimeError) as exc:
+            raise WorkerError(f"cannot start collection worker: {exc}") from exc
+        child.close()
+        self._proc, self._conn, self._runs = proc, parent, 0
+        _LOG.debug("collect worker started (pid %s)", proc.pid)
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.is_alive()
+
+    def collect(self, paths: Iterable[str] = (), evict: Optional[Iterable[str]] = None) -> CollectResult:
+        """Collect `paths` (all configured tests if empty); see module notes for `evict`."""
+        if self.alive and self._runs >= self.max_runs:
+            self.close()
+        if not self.alive:
+            self.close()
+            self._start()
+        request = {
+            "paths": [str(p) for p in paths],
+            "evict": None if evict is None else [str(p) for p in evict],
+        }
+        try:
+            self._conn.send(request)
+            if not self._conn.poll(self.timeout):
+                self.close(kill=True)
+                raise WorkerError(f"collection did not finish within {self.timeout:.0f}s")
+            reply = self._conn.recv()
+        except (EOFError, OSError) as exc:
+            self.close(kill=True)
+            raise WorkerError(f"collection worker died: {exc!r}") from exc
+        self._runs += 1
+        return CollectResult(
+            reply["exit_code"], reply["collected"], reply["errors"], reply["output"]
+        )
+
+    def close(self, kill: bool = False) -> None:
+        proc, conn = self._proc, self._conn
+        self._proc = self._conn = None
+        if proc is None:
+            return
+        if not kill and proc.is_alive():
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            proc.join(5)
+        if proc.is_alive():
+            proc.kill()
+            proc.join(5)
+        conn.close()
@@ -26,9 +26,11 @@ def create_patch(old_text: str, new_text: str, filename: str) -> str:
         A unified diff string with lines prefixed by '-', '+', or ' '.
         If there are no differences, the returned string will be empty.
     """
-    # Split lines preserving newline characters for accurate diffing
-    old_lines: List[str] = old_text.splitlines(keepends=True)
-    new_lines: List[str] = new_text.splitlines(keepends=True)
+    # Split without line endings; headers and body are joined with "\n"
+    # below (keeping the endings would glue the ---/+++/@@ headers, which
+    # carry none with lineterm="", onto the following line)
+    old_lines: List[str] = old_text.splitlines()
+    new_lines: List[str] = new_text.splitlines()
 
     # Prefixes "a/filename" and "b/filename" mimic Git-style diff headers
     fromfile = f"a/{filename}"
@@ -42,4 +44,4 @@ def create_patch(old_text: str, new_text: str, filename: str) -> str:
         lineterm=""
     )
 
-    return "".join(diff_lines)
+    return "\n".join(diff_lines)
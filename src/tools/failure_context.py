@@ -0,0 +1,113 @@
+# src/tools/failure_context.py
+# ────────────────────────────────────────────────────────────────────────────
+# Compact failure context for the P5⇄D1 retry prompt (self_refine_agent).
+#
+# Instead of the whole diff and the whole pytest log, the refinement prompt
+# gets:
+#
+#   failing_hunks   only the diff lines within `context` lines of a failing
+#                   line of the patched file, each piece headed by
+#                   "@@ +<first new line> @@" so line numbers stay readable
+#                   (a brand-new file is one huge hunk – this keeps a window)
+#   error_excerpt   D1 diagnostics as-is, or from a pytest log the
+#                   "ERROR collecting" headers, traceback frames and
+#                   "E   …" lines, capped at `max_lines`
+#
+# Failing line numbers come from D1's structured diagnostics when present,
+# otherwise from "path:line" / 'File "path", line N' locations in the log.
+
+import re
+from pathlib import PurePath
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+_HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+_LOCATION_RE = re.compile(r'File "([^"]+\.py)", line (\d+)|([\w./\\-]+\.py):(\d+)')
+_DIAGNOSTIC_RE = re.compile(r"^\S+\.py:\d+:\d+: [\w-]+: ")
+
+
+class Hunk(NamedTuple):
+    new_start: int
+    lines: List[str]  # body lines, each starting with ' ', '+' or '-'
+
+
+def parse_hunks(diff: str) -> List[Hunk]:
+    hunks: List[Hunk] = []
+    for line in diff.splitlines():
+        m = _HUNK_RE.match(line)
+        if m:
+            hunks.append(Hunk(int(m.group(1)), []))
+        elif hunks and line[:1] in (" ", "+", "-"):
+            hunks[-1].lines.append(line)
+    return hunks
+
+
+def _same_file(a: str, b: str) -> bool:
+    pa, pb = PurePath(a).as_posix().lstrip("./"), PurePath(b).as_posix().lstrip("./")
+    return pa == pb or pa.endswith("/" + pb) or pb.endswith("/" + pa)
+
+
+def failing_lines(
+    path: str,
+    log: str,
+    diagnostics: Optional[Iterable[dict]] = None,
+) -> Set[int]:
+    """Line numbers of `path` blamed by D1 (diagnostics first, else the log)."""
+    lines = {d["line"] for d in diagnostics or () if _same_file(d["path"], path)}
+    if lines:
+        return lines
+    for m in _LOCATION_RE.finditer(log or ""):
+        where, line = (m.group(1), m.group(2)) if m.group(1) else (m.group(3), m.group(4))
+        if _same_file(where, path):
+            lines.add(int(line))
+    return lines
+
+
+def failing_hunks(diff: str, lines: Iterable[int], *, context: int = 6, max_lines: int = 80) -> str:
+    """
+    The parts of `diff` near `lines` (new-file numbering).  Without any
+    usable line, the head of the first hunk is returned.
+    """
+    hunks = parse_hunks(diff)
+    wanted = sorted(set(lines))
+    out: List[str] = []
+    for hunk in hunks:
+        new_no = hunk.new_start
+        last_kept = None  # index in hunk.lines of the previous kept line
+        for i, line in enumerate(hunk.lines):
+            near = any(abs(new_no - n) <= context for n in wanted)
+            if near:
+                if last_kept is None or last_kept != i - 1:
+                    out.append(f"@@ +{new_no} @@")
+                out.append(line)
+                last_kept = i
+            if line[:1] != "-":
+                new_no += 1
+    if not out and hunks:
+        out = [f"@@ +{hunks[0].new_start} @@", *hunks[0].lines]
+    if len(out) > max_lines:
+        out = out[:max_lines] + ["…"]
+    return "\n".join(out)
+
+
+def error_excerpt(log: str, *, max_lines: int = 20) -> str:
+    """The informative lines of a D1 failure, at most `max_lines` of them."""
+    lines = [line.rstrip() for line in (log or "").splitlines() if line.strip()]
+    if lines and all(_DIAGNOSTIC_RE.match(line) for line in lines):
+        kept = lines
+    else:
+        kept: List[str] = []
+        seen: Dict[str, None] = {}
+        for line in lines:
+            stripped = line.strip(" _=")  # pytest's section rulers
+            if (
+                stripped.startswith(("E ", "ERROR collecting", "ImportError", "SyntaxError"))
+                or _DIAGNOSTIC_RE.match(stripped)
+                or re.search(r"\.py:\d+: in ", stripped)
+            ) and stripped not in seen:
+                seen[stripped] = None
+                kept.append(stripped)
+        if not kept:
+            kept = lines[-max_lines:]
+    if len(kept) > max_lines:
+        kept = kept[:max_lines] + [f"… ({len(kept) - max_lines} more)"]
+    return "\n".join(kept)
@@ -2,12 +2,422 @@
 # ────────────────────────────────────────────────────────────────────────────
 # Deterministic, stateless utility. Given a ZIP path, returns a Markdown-formatted
 # directory tree plus the first line of each file (size-capped). Implements phase Z.
+#
+# The tree is produced by `iter_tree()`, a generator that yields one line at a
+# time so callers never hold more than the rendered budget in memory.  Previews
+# are skipped for binary / vendored paths, and rendering stops once the optional
+# line or token budget is exhausted.
+#
+# With `workers > 1` the previews of large archives are decompressed by a
+# process pool: the sorted central directory is sharded into contiguous runs,
+# each worker opens its own `zipfile.ZipFile` handle, and the results are merged
+# back in sorted order, so the rendered tree is byte-identical to the serial path.
+# The pool uses the `spawn` start method: phases Z and S run in concurrent threads,
+# and forking a multi-threaded process can copy a lock another thread holds.
+#
+# `render="compact"` builds a trie of the member paths instead: each directory
+# is printed once, single-child directory chains are merged, and runs of more
+# than `collapse_threshold` same-extension files in one directory become a
+# summary line ("… 812 *.json files, 3.1 MB").  The size saved versus the flat
+# layout is logged.
 
-import zipfile
+import logging
+import math
+import multiprocessing
+import posixpath
 import textwrap
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from tools.token_budget import count_tokens
+
+_LOG = logging.getLogger(__name__)
+
+# Default number of bytes read per member for the one-line preview
+# (mirrors `Settings.PREVIEW_BYTES`).
+DEFAULT_PREVIEW_BYTES = 120
+
+# Width of the preview line after `textwrap.shorten`
+PREVIEW_WIDTH = 100
+
+# Below this many members a process pool costs more than it saves.
+PARALLEL_MIN_MEMBERS = 2000
+
+# Shards handed to each worker; >1 evens out members of uneven size.
+SHARDS_PER_WORKER = 4
+
+# Pool workers are spawned, never forked (see the module notes).
+_SPAWN = multiprocessing.get_context("spawn")
+
+# Same-extension files per directory above which compact mode summarises them.
+DEFAULT_COLLAPSE_THRESHOLD = 20
+
+RENDER_MODES = ("flat", "compact")
+
+# Path components whose contents never get a preview (still listed).
+SKIP_PREVIEW_DIRS = frozenset(
+    {
+        "node_modules",
+        "vendor",
+        "third_party",
+        "site-packages",
+        "bower_components",
+        ".git",
+        ".hg",
+        ".svn",
+        ".venv",
+        "venv",
+        "__pycache__",
+        ".mypy_cache",
+        ".pytest_cache",
+        ".tox",
+        "dist",
+        "build",
+    }
+)
+
+# File extensions treated as binary; listed without decompressing anything.
+SKIP_PREVIEW_EXTS = frozenset(
+    {
+        ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".svgz",
+        ".pdf", ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".jar",
+        ".whl", ".egg", ".so", ".dll", ".dylib", ".exe", ".bin", ".o", ".a",
+        ".pyc", ".pyo", ".class", ".wasm", ".ttf", ".otf", ".woff", ".woff2",
+        ".mp3", ".mp4", ".wav", ".ogg", ".mov", ".avi", ".db", ".sqlite",
+        ".npy", ".npz", ".pkl", ".pt", ".onnx", ".h5", ".parquet",
+    }
+)
+
+
+def wants_preview(name: str) -> bool:
+    """
+    Preview policy: return False for binary extensions and for anything
+    living under a vendored / generated directory (see `SKIP_PREVIEW_DIRS`).
+    """
+    if posixpath.splitext(name)[1].lower() in SKIP_PREVIEW_EXTS:
+        return False
+    parts = name.split("/")[:-1]
+    return not any(part in SKIP_PREVIEW_DIRS for part in parts)
+
+
+def read_preview(
+    zf: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    preview_bytes: int = DEFAULT_PREVIEW_BYTES,
+) -> Optional[str]:
+    """
+    Return the shortened first line of *info* (at most `preview_bytes` are
+    decompressed), or None if the member has no printable first line or
+    looks binary.
+    """
+    with zf.open(info) as fp:
+        raw = fp.read(preview_bytes)
+    if b"\x00" in raw:  # binary content despite a text-looking name
+        return None
+    snippet = raw.decode(errors="ignore").splitlines()[:1]
+    if not snippet:
+        return None
+    shortened = textwrap.shorten(snippet[0], width=PREVIEW_WIDTH)
+    return shortened or None
+
+
+# Per-process archive handle, opened once by `_init_worker`.
+_WORKER_ZF: Optional[zipfile.ZipFile] = None
+
+
+def _init_worker(zip_path: str) -> None:
+    """Pool initializer: each worker opens its own `ZipFile` handle exactly once."""
+    global _WORKER_ZF  # pylint: disable=global-statement
+    _WORKER_ZF = zipfile.ZipFile(zip_path)
+
+
+def _read_shard(job: Tuple[List[str], int]) -> List[Optional[str]]:
+    """Worker: preview each member name of one shard using the process-local handle."""
+    names, preview_bytes = job
+    zf = _WORKER_ZF
+    return [read_preview(zf, zf.getinfo(name), preview_bytes) for name in names]
+
+
+def read_previews_parallel(
+    zip_path: str,
+    names: List[str],
+    *,
+    preview_bytes: int = DEFAULT_PREVIEW_BYTES,
+    workers: int = 2,
+) -> Dict[str, Optional[str]]:
+    """
+    Decompress the previews of `names` across `workers` processes.
 
+    `names` is split into contiguous shards (order preserved), so the returned
+    mapping can be rendered in the original sorted order.
+    """
+    if not names:
+        return {}
+    shard_size = math.ceil(len(names) / (workers * SHARDS_PER_WORKER))
+    shards = [names[i : i + shard_size] for i in range(0, len(names), shard_size)]
+    previews: Dict[str, Optional[str]] = {}
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=_SPAWN,
+        initializer=_init_worker,
+        initargs=(zip_path,),
+    ) as pool:
+        results = pool.map(_read_shard, [(shard, preview_bytes) for shard in shards])
+        for shard, shard_previews in zip(shards, results):
+            previews.update(zip(shard, shard_previews))
+    return previews
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Rendering
+# ──────────────────────────────────────────────────────────────────────────
+# A block is the lines for one renderable item plus the number of archive
+# members it accounts for; budgets are applied block by block.
+_Block = Tuple[List[str], int]
+
+
+def _human_size(num: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if num < 1024 or unit == "GB":
+            return f"{num:.0f} {unit}" if unit == "B" else f"{num:.1f} {unit}"
+        num /= 1024
+    return f"{num:.1f} GB"  # pragma: no cover
 
-def scan_zip(zip_path: str) -> str:
+
+def _preview_reader(
+    zf: zipfile.ZipFile,
+    zip_path: str,
+    shown: List[zipfile.ZipInfo],
+    preview_bytes: int,
+    workers: int,
+) -> Callable[[zipfile.ZipInfo], Optional[str]]:
+    """
+    Return a callable giving the preview of a member (None if the policy skips
+    it).  With `workers > 1` and a large enough `shown` list, every preview is
+    prefetched in a process pool; otherwise members are read lazily.
+    """
+    previews: Optional[Dict[str, Optional[str]]] = None
+    if workers > 1 and len(shown) >= PARALLEL_MIN_MEMBERS:
+        previews = read_previews_parallel(
+            zip_path,
+            [i.filename for i in shown if wants_preview(i.filename)],
+            preview_bytes=preview_bytes,
+            workers=workers,
+        )
+
+    def preview_of(info: zipfile.ZipInfo) -> Optional[str]:
+        if not wants_preview(info.filename):
+            return None
+        # Renderers may look one member past `shown` before the budget stops
+        # them; anything not prefetched is read lazily.
+        if previews is not None and info.filename in previews:
+            return previews[info.filename]
+        return read_preview(zf, info, preview_bytes)
+
+    return preview_of
+
+
+def _budgeted(
+    blocks: Iterator[_Block],
+    total_files: int,
+    max_lines: Optional[int],
+    max_tokens: Optional[int],
+) -> Iterator[str]:
+    """Yield block lines until the next block would exceed a budget."""
+    used_lines = used_tokens = done = 0
+    for lines, n_files in blocks:
+        cost = sum(count_tokens(line) for line in lines)
+        if (max_lines is not None and used_lines + len(lines) > max_lines) or (
+            max_tokens is not None and used_tokens + cost > max_tokens
+        ):
+            yield f"… (truncated: {total_files - done} more files)"
+            return
+        used_lines += len(lines)
+        used_tokens += cost
+        done += n_files
+        yield from lines
+
+
+def _flat_blocks(
+    members: List[zipfile.ZipInfo],
+    preview_of: Callable[[zipfile.ZipInfo], Optional[str]],
+) -> Iterator[_Block]:
+    for info in members:
+        lines = [f"├── {info.filename}  ({info.file_size} B)"]
+        preview = preview_of(info)
+        if preview:
+            lines.append(f"      {preview}")
+        yield lines, 1
+
+
+class _Dir:
+    """One trie node: sub-directories by name and the files directly inside."""
+
+    __slots__ = ("dirs", "files")
+
+    def __init__(self):
+        self.dirs: Dict[str, "_Dir"] = {}
+        self.files: List[zipfile.ZipInfo] = []
+
+
+def _build_trie(members: List[zipfile.ZipInfo]) -> _Dir:
+    root = _Dir()
+    for info in members:
+        node = root
+        for part in info.filename.split("/")[:-1]:
+            node = node.dirs.setdefault(part, _Dir())
+        node.files.append(info)
+    return root
+
+
+def _compact_layout(
+    node: _Dir, depth: int, collapse_threshold: int
+) -> Iterator[Tuple[str, int, object]]:
+    """
+    Walk the trie and yield ``(kind, depth, payload)`` items, where kind is
+    ``"dir"`` (payload: display name), ``"file"`` (payload: ZipInfo) or
+    ``"summary"`` (payload: (extension, count, total bytes)).
+    """
+    by_ext: Dict[str, List[zipfile.ZipInfo]] = {}
+    for info in node.files:
+        by_ext.setdefault(posixpath.splitext(info.filename)[1].lower(), []).append(info)
+
+    collapsed = {ext for ext, infos in by_ext.items() if len(infos) > collapse_threshold}
+    for info in node.files:
+        if posixpath.splitext(info.filename)[1].lower() not in collapsed:
+            yield "file", depth, info
+    for ext in sorted(collapsed):
+        infos = by_ext[ext]
+        yield "summary", depth, (ext, len(infos), sum(i.file_size for i in infos))
+
+    for name in sorted(node.dirs):
+        child = node.dirs[name]
+        # Merge chains of directories that contain nothing but one sub-directory.
+        while not child.files and len(child.dirs) == 1:
+            (sub, child), = child.dirs.items()
+            name = f"{name}/{sub}"
+        yield "dir", depth, name
+        yield from _compact_layout(child, depth + 1, collapse_threshold)
+
+
+def _compact_blocks(
+    layout: List[Tuple[str, int, object]],
+    preview_of: Callable[[zipfile.ZipInfo], Optional[str]],
+) -> Iterator[_Block]:
+    for kind, depth, payload in layout:
+        indent = "    " * depth
+        if kind == "dir":
+            yield [f"{indent}{payload}/"], 0
+        elif kind == "summary":
+            ext, count, size = payload
+            pattern = f"*{ext}" if ext else "extension-less"
+            yield [f"{indent}… {count} {pattern} files, {_human_size(size)}"], count
+        else:
+            info = payload
+            lines = [f"{indent}├── {posixpath.basename(info.filename)}  ({info.file_size} B)"]
+            preview = preview_of(info)
+            if preview:
+                lines.append(f"{indent}      {preview}")
+            yield lines, 1
+
+
+def iter_tree(
+    zip_path: str,
+    *,
+    preview_bytes: int = DEFAULT_PREVIEW_BYTES,
+    max_lines: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    workers: int = 1,
+    render: str = "flat",
+    collapse_threshold: int = DEFAULT_COLLAPSE_THRESHOLD,
+) -> Iterator[str]:
+    """
+    Lazily yield the lines of the tree for the archive at `zip_path`.
+
+    ``render="flat"`` (default) emits one entry per member, in sorted order:
+
+      ├── <filename>  (<size> B)
+            <first line of content, truncated to 100 chars>
+
+    ``render="compact"`` nests entries under their directories (printed once)
+    and summarises directories holding more than `collapse_threshold` files
+    of the same extension.
+
+    When `max_lines` or `max_tokens` would be exceeded, a single
+    ``… (truncated: N more files)`` marker is yielded and iteration stops.
+
+    `workers > 1` prefetches previews in a process pool for archives with at
+    least `PARALLEL_MIN_MEMBERS` members; the output is unchanged.
+    """
+    if render not in RENDER_MODES:
+        raise ValueError(f"unknown render mode {render!r}; expected one of {RENDER_MODES}")
+
+    with zipfile.ZipFile(zip_path) as zf:
+        members = sorted(
+            (i for i in zf.infolist() if not i.is_dir()),
+            key=lambda i: i.filename,
+        )
+
+        if render == "flat":
+            # Every member costs at least one line, so never prefetch past the budget.
+            shown = members if max_lines is None else members[:max_lines]
+            preview_of = _preview_reader(zf, zip_path, shown, preview_bytes, workers)
+            yield from _budgeted(
+                _flat_blocks(members, preview_of), len(members), max_lines, max_tokens
+            )
+            return
+
+        layout = list(_compact_layout(_build_trie(members), 0, collapse_threshold))
+        shown = [payload for kind, _, payload in layout if kind == "file"]
+        if max_lines is not None:
+            shown = shown[:max_lines]
+        read = _preview_reader(zf, zip_path, shown, preview_bytes, workers)
+        preview_chars = 0
+
+        def preview_of(info: zipfile.ZipInfo) -> Optional[str]:
+            nonlocal preview_chars
+            preview = read(info)
+            if preview:
+                preview_chars += len(preview) + 7  # "      " indent + newline
+            return preview
+
+        compact_chars = 0
+        truncated = False
+        for line in _budgeted(
+            _compact_blocks(layout, preview_of), len(members), max_lines, max_tokens
+        ):
+            compact_chars += len(line) + 1
+            truncated = line.startswith("… (truncated:")
+            yield line
+        if truncated:
+            return
+
+        # The flat layout would repeat every full path; previews are counted
+        # only for files compact mode showed, so this is a lower bound.
+        flat_chars = sum(
+            len(f"├── {i.filename}  ({i.file_size} B)") + 1 for i in members
+        ) + preview_chars
+        if flat_chars:
+            _LOG.info(
+                "compact tree: %d chars (~%d tokens) vs >= %d chars flat – %.0f%% smaller",
+                compact_chars,
+                (compact_chars + 3) // 4,
+                flat_chars,
+                100.0 * (1 - compact_chars / flat_chars),
+            )
+
+
+def scan_zip(
+    zip_path: str,
+    *,
+    preview_bytes: int = DEFAULT_PREVIEW_BYTES,
+    max_lines: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    workers: int = 1,
+    render: str = "flat",
+    collapse_threshold: int = DEFAULT_COLLAPSE_THRESHOLD,
+) -> str:
     """
     Open the ZIP archive at `zip_path`, list all non-directory files in sorted order,
     and for each file output:
@@ -15,29 +425,17 @@ def scan_zip(zip_path: str) -> str:
             <first line of content, truncated to 100 chars>
 
     Returns a single Markdown-formatted string representing the tree with previews.
+    See `iter_tree()` for the meaning of the keyword arguments (including the
+    nested ``render="compact"`` layout).
     """
-    lines = []
-    with zipfile.ZipFile(zip_path) as zf:
-        for name in sorted(zf.namelist()):
-            # Skip directory entries (they end with '/')
-            if name.endswith("/"):
-                continue
-
-            info = zf.getinfo(name)
-            size_bytes = info.file_size
-            prefix = f"├── {name}"
-            lines.append(f"{prefix}  ({size_bytes} B)")
-
-            # Read up to 120 bytes to show as a one-line preview
-            with zf.open(name) as fp:
-                raw = fp.read(120)
-                try:
-                    snippet = raw.decode(errors="ignore").splitlines()[:1]
-                    if snippet:
-                        shortened = textwrap.shorten(snippet[0], width=100)
-                        lines.append(f"      {shortened}")
-                except Exception:
-                    # If decoding fails, skip the preview
-                    continue
-
-    return "\n".join(lines)
+    return "\n".join(
+        iter_tree(
+            zip_path,
+            preview_bytes=preview_bytes,
+            max_lines=max_lines,
+            max_tokens=max_tokens,
+            workers=workers,
+            render=render,
+            collapse_threshold=collapse_threshold,
+        )
+    )
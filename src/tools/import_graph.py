@@ -0,0 +1,177 @@
+# src/tools/import_graph.py
+# ────────────────────────────────────────────────────────────────────────────
+# Reverse-import graph of a source tree, kept up to date between D1 attempts.
+#
+# `ImportGraph(roots)` scans `*.py` files under each root (module names are
+# relative to their root, matching how the roots sit on `sys.path`), parses
+# only their import statements, and maps every module to the local modules it
+# imports.  `refresh()` re-stats the tree and re-parses only files whose
+# (mtime, size) changed, so keeping the graph current costs one `stat` per
+# file.  `affected(paths)` returns the changed files plus everything that
+# imports them, transitively.
+#
+# The graph also keeps the top-level names each module binds
+# (`tools.ast_checker.module_globals`) so `modules()` can serve as the module
+# index for the in-memory import check.
+#
+# A refresh that *removes* files, or that adds modules other than those the
+# caller reports as changed, marks the graph `invalidated`: imports may now
+# resolve differently, so the caller should fall back to a full check.
+
+import ast
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from tools.ast_checker import module_globals
+from tools.file_scanner import SKIP_PREVIEW_DIRS
+from tools.symbol_index import module_name, resolve_import
+
+_LOG = logging.getLogger(__name__)
+
+_SKIP_DIRS = SKIP_PREVIEW_DIRS | {"__pycache__", ".venv", "venv", ".tox", ".mypy_cache"}
+
+
+def import_targets(source: str, module: str, is_package: bool) -> Set[str]:
+    """
+    Dotted names a module may depend on: ``import a.b`` gives ``a.b``;
+    ``from a import b`` gives both ``a`` and ``a.b`` (``b`` may be a module).
+    """
+    tree = ast.parse(source)
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = resolve_import(module, is_package, node.level, node.module)
+            if base:
+                names.add(base)
+            names.update(f"{base}.{a.name}" if base else a.name for a in node.names)
+    return names
+
+
+class ImportGraph:
+    """
+    Example:
+        graph = ImportGraph([Path("src"), Path("tests")])
+        graph.refresh(expected={Path("src/agents/new_agent.py")})
+        if not graph.invalidated:
+            targets = graph.affected([Path("src/agents/new_agent.py")])
+    """
+
+    def __init__(self, roots: Iterable[Path]):
+        self.roots = [Path(r).resolve() for r in roots]
+        self._stat: Dict[Path, Tuple[int, int]] = {}
+        self._module: Dict[Path, str] = {}      # file → dotted name
+        self._by_module: Dict[str, Path] = {}   # dotted name → file
+        self._targets: Dict[Path, Set[str]] = {}
+        self._exports: Dict[Path, Optional[Set[str]]] = {}
+        self._importers: Optional[Dict[Path, Set[Path]]] = None
+        self.invalidated = True                 # nothing scanned yet
+        self.built = False
+
+    # ------------------------------------------------------------------ #
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        found: Dict[Path, Tuple[int, int]] = {}
+        for root in self.roots:
+            if not root.is_dir():
+                continue
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if d not in _SKIP_DIRS]
+                for name in filenames:
+                    if name.endswith(".py"):
+                        path = Path(dirpath) / name
+                        try:
+                            st = path.stat()
+                        except OSError:
+                            continue
+                        found[path] = (st.st_mtime_ns, st.st_size)
+        return found
+
+    def _root_of(self, path: Path) -> Path:
+        return next(r for r in self.roots if path.is_relative_to(r))
+
+    def refresh(self, expected: Iterable[Path] = ()) -> Set[Path]:
+        """
+        Bring the graph up to date; returns the files that were (re)parsed.
+        `expected` are files the caller knows it created or modified – adding
+        those does not invalidate the graph.
+        """
+        expected_set = {Path(p).resolve() for p in expected}
+        current = self._scan()
+        removed = self._stat.keys() - current.keys()
+        added = current.keys() - self._stat.keys()
+        dirty = {p for p, sig in current.items() if self._stat.get(p) != sig}
+
+        self.invalidated = not self.built or bool(removed) or bool(added - expected_set)
+        for path in removed:
+            self._by_module.pop(self._module.pop(path, ""), None)
+            self._targets.pop(path, None)
+            self._exports.pop(path, None)
+            self._stat.pop(path, None)
+        for path in dirty:
+            rel = path.relative_to(self._root_of(path)).as_posix()
+            module = module_name(rel)
+            self._module[path] = module
+            self._by_module[module] = path
+            self._targets[path], self._exports[path] = set(), None
+            try:
+                source = path.read_text(encoding="utf-8", errors="replace")
+                self._targets[path] = import_targets(source, module, rel.endswith("__init__.py"))
+                self._exports[path] = module_globals(source, str(path))
+            except (OSError, SyntaxError, ValueError):
+                pass  # the syntax check reports it
+            self._stat[path] = current[path]
+        if dirty or removed:
+            self._importers = None
+        self.built = True
+        _LOG.debug(
+            "import graph: %d files, %d reparsed, %d removed, invalidated=%s",
+            len(current), len(dirty), len(removed), self.invalidated,
+        )
+        return dirty
+
+    def files(self) -> List[Path]:
+        return sorted(self._module)
+
+    def module_of(self, path: Path) -> Optional[str]:
+        return self._module.get(Path(path).resolve())
+
+    def modules(self) -> Dict[str, Optional[Set[str]]]:
+        """Dotted module name → names it binds at top level (``None`` = unknown)."""
+        return {name: self._exports.get(path) for name, path in self._by_module.items()}
+
+    def _resolve(self, name: str) -> Optional[Path]:
+        """Longest local module that `name` (or a parent package of it) refers to."""
+        parts = name.split(".")
+        for end in range(len(parts), 0, -1):
+            path = self._by_module.get(".".join(parts[:end]))
+            if path is not None:
+                return path
+        return None
+
+    def importers(self) -> Dict[Path, Set[Path]]:
+        """Reverse edges: file → files that import it directly."""
+        if self._importers is None:
+            rev: Dict[Path, Set[Path]] = {p: set() for p in self._module}
+            for src, names in self._targets.items():
+                for name in names:
+                    dst = self._resolve(name)
+                    if dst is not None and dst != src:
+                        rev[dst].add(src)
+            self._importers = rev
+        return self._importers
+
+    def affected(self, changed: Iterable[Path]) -> List[Path]:
+        """`changed` plus all transitive importers, sorted."""
+        rev = self.importers()
+        seen: Set[Path] = set()
+        stack = [Path(p).resolve() for p in changed]
+        while stack:
+            path = stack.pop()
+            if path in seen:
+                continue
+            seen.add(path)
+            stack.extend(rev.get(path, ()))
+        return sorted(seen)
@@ -0,0 +1,187 @@
+# src/tools/phase_graph.py
+# ────────────────────────────────────────────────────────────────────────────
+# Dependency-driven execution of workflow phases.
+#
+# Each phase declares the memory keys it reads and writes.  Walking the
+# phases in their declared order, phase B depends on an earlier phase A when
+#
+#   A writes a key B reads      (B needs A's result)
+#   A reads a key B writes      (B must not clobber A's input)
+#   A and B write the same key  (keep the declared order)
+#
+# A phase that declares nothing (`reads=None`) is a barrier: it depends on
+# every earlier phase and every later phase depends on it, which is exactly
+# the old sequential behaviour.  Keys only ever merged atomically (e.g.
+# `token_usage` via `Memory.update`) need not be declared.
+#
+# `run_graph` executes the phases on a thread pool as soon as their
+# dependencies finish (`arun_graph` is the asyncio twin).  Both return a
+# timing report: start / end per phase relative to the run start, the wall
+# time, the serial sum, and the critical path – the chain of dependent
+# phases with the largest total duration, i.e. what bounds the wall time.
+
+import asyncio
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Set
+
+_LOG = logging.getLogger(__name__)
+
+
+class PhaseSpec(NamedTuple):
+    id: str
+    reads: Optional[FrozenSet[str]] = None   # None = undeclared → barrier
+    writes: Optional[FrozenSet[str]] = None
+
+
+def _conflict(a: PhaseSpec, b: PhaseSpec) -> bool:
+    if a.reads is None or b.reads is None:
+        return True
+    a_w, b_w = a.writes or frozenset(), b.writes or frozenset()
+    return bool(a_w & (b.reads | b_w)) or bool(a.reads & b_w)
+
+
+def dependencies(specs: List[PhaseSpec]) -> Dict[str, Set[str]]:
+    """Phase id → ids of the earlier phases it must wait for."""
+    return {
+        b.id: {a.id for a in specs[:j] if _conflict(a, b)}
+        for j, b in enumerate(specs)
+    }
+
+
+def critical_path(deps: Dict[str, Set[str]], durations: Dict[str, float]) -> List[str]:
+    """Longest-duration chain through `deps` (phases given in topological order)."""
+    best: Dict[str, float] = {}
+    prev: Dict[str, Optional[str]] = {}
+    for pid in deps:
+        parent = max(deps[pid], key=lambda d: best[d], default=None)
+        best[pid] = durations.get(pid, 0.0) + (best[parent] if parent else 0.0)
+        prev[pid] = parent
+    if not best:
+        return []
+    node: Optional[str] = max(best, key=best.get)
+    path: List[str] = []
+    while node is not None:
+        path.append(node)
+        node = prev[node]
+    return path[::-1]
+
+
+def _report(deps: Dict[str, Set[str]], spans: Dict[str, tuple], wall: float) -> Dict[str, Any]:
+    durations = {pid: end - start for pid, (start, end) in spans.items()}
+    path = critical_path(deps, durations)
+    report = {
+        "wall_s": round(wall, 4),
+        "serial_s": round(sum(durations.values()), 4),
+        "critical_path": path,
+        "critical_path_s": round(sum(durations[p] for p in path), 4),
+        "phases": {
+            pid: {
+                "start_s": round(start, 4),
+                "end_s": round(end, 4),
+                "duration_s": round(end - start, 4),
+                "after": sorted(deps[pid]),
+            }
+            for pid, (start, end) in spans.items()
+        },
+    }
+    _LOG.info(
+        "Phases: wall %.2fs, serial %.2fs; critical path %s = %.2fs",
+        report["wall_s"],
+        report["serial_s"],
+        " → ".join(path),
+        report["critical_path_s"],
+    )
+    return report
+
+
+def run_graph(
+    specs: List[PhaseSpec],
+    call: Callable[[PhaseSpec], Any],
+    *,
+    max_workers: int = 4,
+) -> Dict[str, Any]:
+    """
+    Run `call(spec)` for every phase, dependencies first, up to
+    `max_workers` at a time (each in a copy of the caller's context, so
+    `use_memory` carries over).  The first failure stops new phases from
+    starting, waits for the running ones and is re-raised.
+
+    Example:
+        report = run_graph(specs, lambda spec: PHASES[spec.id](mem=mem))
+        print(report["critical_path"], report["wall_s"])
+    """
+    deps = dependencies(specs)
+    by_id = {s.id: s for s in specs}
+    pending = [s.id for s in specs]
+    done: Set[str] = set()
+    spans: Dict[str, tuple] = {}
+    running: Dict[Future, str] = {}
+    error: Optional[BaseException] = None
+    t0 = time.perf_counter()
+
+    def timed(spec: PhaseSpec) -> None:
+        start = time.perf_counter() - t0
+        try:
+            call(spec)
+        finally:
+            spans[spec.id] = (start, time.perf_counter() - t0)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="phase") as pool:
+        while pending or running:
+            if error is None:
+                for pid in [p for p in pending if deps[p] <= done]:
+                    if len(running) >= max_workers:
+                        break
+                    pending.remove(pid)
+                    ctx = contextvars.copy_context()
+                    running[pool.submit(ctx.run, timed, by_id[pid])] = pid
+            elif not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                pid = running.pop(future)
+                exc = future.exception()
+                if exc is not None:
+                    error = error or exc
+                else:
+                    done.add(pid)
+    if error is not None:
+        raise error
+    return _report(deps, spans, time.perf_counter() - t0)
+
+
+async def arun_graph(
+    specs: List[PhaseSpec],
+    acall: Callable[[PhaseSpec], Awaitable[Any]],
+    *,
+    max_workers: int = 4,
+) -> Dict[str, Any]:
+    """Asyncio twin of :func:`run_graph`: one task per phase awaiting its dependencies."""
+    deps = dependencies(specs)
+    slots = asyncio.Semaphore(max_workers)
+    spans: Dict[str, tuple] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+    t0 = time.perf_counter()
+
+    async def one(spec: PhaseSpec) -> None:
+        await asyncio.gather(*(tasks[d] for d in deps[spec.id]))
+        async with slots:
+            start = time.perf_counter() - t0
+            try:
+                await acall(spec)
+            finally:
+                spans[spec.id] = (start, time.perf_counter() - t0)
+
+    for spec in specs:
+        tasks[spec.id] = asyncio.ensure_future(one(spec))
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return _report(deps, spans, time.perf_counter() - t0)
@@ -0,0 +1,373 @@
+# src/tools/symbol_index.py
+# ────────────────────────────────────────────────────────────────────────────
+# AST-based symbol index of the uploaded codebase (phase S, after Z).
+#
+# Every `.py` member of the archive (outside vendored dirs) is parsed into a
+# compact `ModuleInfo`: module docstring, imported module names, and its
+# classes / functions / methods with signatures and first docstring lines.
+#
+# * Parsing results are cached per *file content* – the key is the member's
+#   CRC-32 and size from the ZIP central directory – in an optional SQLite
+#   file, so a re-uploaded project only re-parses the files that changed.
+#   Identical files can live at different paths, so cached entries hold the
+#   import statements as written (level, module, names); relative imports
+#   are resolved against the member's path when the entry is loaded.
+# * Cache misses are parsed in a process pool when there are many of them;
+#   each worker opens its own `zipfile.ZipFile` handle.  The pool is spawned,
+#   not forked, because phase S runs in a thread alongside phase Z.
+# * `SymbolIndex.rank()` scores symbols against a query with BM25 and
+#   `SymbolIndex.render()` prints a ranked subset grouped by module, ready to
+#   be budgeted into a prompt.
+
+import ast
+import json
+import logging
+import multiprocessing
+import sqlite3
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tools.bm25_index import BM25Index
+from tools.file_scanner import SKIP_PREVIEW_DIRS
+
+_LOG = logging.getLogger(__name__)
+
+# Bump when `ModuleInfo` or the cached form changes (invalidates cached parses).
+INDEX_VERSION = 2
+
+# Larger `.py` files are not parsed (usually generated code).
+MAX_SOURCE_BYTES = 512 * 1024
+
+# Below this many cache misses a process pool costs more than it saves.
+PARALLEL_MIN_FILES = 200
+
+# Pool workers are spawned, never forked from the threaded orchestrator.
+_SPAWN = multiprocessing.get_context("spawn")
+
+
+@dataclass
+class Symbol:
+    qualname: str           # "Repo.get"
+    kind: str               # "class" | "def" | "async def"
+    signature: str          # "(self, key: str) -> Row" or "(Base)" for classes
+    doc: str = ""           # first docstring line
+    lineno: int = 0
+
+
+@dataclass
+class ModuleInfo:
+    path: str               # archive member name
+    module: str             # dotted name derived from the path
+    doc: str = ""
+    imports: List[str] = field(default_factory=list)
+    symbols: List[Symbol] = field(default_factory=list)
+    error: str = ""         # syntax error message, if the file did not parse
+
+
+def module_name(path: str) -> str:
+    """`pkg/sub/mod.py` → `pkg.sub.mod`; `pkg/__init__.py` → `pkg`."""
+    dotted = path[:-3].replace("/", ".") if path.endswith(".py") else path.replace("/", ".")
+    return dotted[: -len(".__init__")] if dotted.endswith(".__init__") else dotted
+
+
+def _first_line(node: ast.AST) -> str:
+    doc = ast.get_docstring(node, clean=True)  # type: ignore[arg-type]
+    return doc.strip().splitlines()[0] if doc and doc.strip() else ""
+
+
+def resolve_import(module: str, is_package: bool, level: int, name: Optional[str]) -> str:
+    """Absolute dotted name of a (possibly relative) `from … import` target."""
+    if level == 0:
+        return name or ""
+    parts = module.split(".")
+    base = parts if is_package else parts[:-1]
+    base = base[: len(base) - (level - 1)] if level > 1 else base
+    return ".".join(base + ([name] if name else []))
+
+
+# An import statement as written: (level, module, names).  `names` is only
+# kept for "from . import a, b", whose targets are the submodules a and b.
+ImportSpec = Tuple[int, Optional[str], List[str]]
+
+
+def _import_specs(tree: ast.Module) -> List[ImportSpec]:
+    specs: List[ImportSpec] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            specs.extend((0, alias.name, []) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            names = [a.name for a in node.names] if node.module is None else []
+            specs.append((node.level, node.module, names))
+    return specs
+
+
+def _resolve_imports(path: str, specs: Iterable[ImportSpec]) -> List[str]:
+    """Absolute module names imported by the module at `path`."""
+    module, is_package = module_name(path), path.endswith("__init__.py")
+    imports: List[str] = []
+    for level, name, names in specs:
+        base = resolve_import(module, is_package, level, name)
+        if name is None:  # "from . import a, b" → the submodules
+            imports.extend(f"{base}.{n}" if base else n for n in names)
+        elif base:
+            imports.append(base)
+    return sorted(set(i for i in imports if i))
+
+
+def parse_module(path: str, source: str) -> ModuleInfo:
+    """Parse one source file into a `ModuleInfo` (never raises on bad code)."""
+    return _parse(path, source)[0]
+
+
+def _parse(path: str, source: str) -> Tuple[ModuleInfo, List[ImportSpec]]:
+    info = ModuleInfo(path=path, module=module_name(path))
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as exc:
+        info.error = f"{type(exc).__name__}: {exc}"
+        return info, []
+
+    info.doc = _first_line(tree)
+    specs = _import_specs(tree)
+    info.imports = _resolve_imports(path, specs)
+
+    def describe(node: ast.AST, qualname: str) -> Symbol:
+        if isinstance(node, ast.ClassDef):
+            bases = ", ".join(ast.unparse(b) for b in node.bases)
+            sig = f"({bases})" if bases else ""
+            return Symbol(qualname, "class", sig, _first_line(node), node.lineno)
+        kind = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+        ret = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+        sig = f"({ast.unparse(node.args)}){ret}"
+        return Symbol(qualname, kind, sig, _first_line(node), node.lineno)
+
+    funcs = (ast.FunctionDef, ast.AsyncFunctionDef)
+    for node in tree.body:
+        if isinstance(node, funcs + (ast.ClassDef,)):
+            info.symbols.append(describe(node, node.name))
+        if isinstance(node, ast.ClassDef):
+            info.symbols.extend(
+                describe(child, f"{node.name}.{child.name}")
+                for child in node.body
+                if isinstance(child, funcs)
+            )
+    return info, specs
+
+
+def _to_json(info: ModuleInfo, specs: List[ImportSpec]) -> str:
+    data = asdict(info)
+    # Content-keyed: everything derived from the path is re-attached on load.
+    del data["path"], data["module"], data["imports"]
+    data["import_specs"] = specs
+    return json.dumps(data, separators=(",", ":"))
+
+
+def _from_json(path: str, text: str) -> ModuleInfo:
+    data = json.loads(text)
+    data["symbols"] = [Symbol(**s) for s in data["symbols"]]
+    imports = _resolve_imports(path, data.pop("import_specs"))
+    return ModuleInfo(path=path, module=module_name(path), imports=imports, **data)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Per-file parse cache
+# ──────────────────────────────────────────────────────────────────────────
+class SymbolCache:
+    """
+    Map of ``"v<version>:<crc32>:<size>"`` → parsed module (JSON), stored in
+    SQLite, or – with `path=None` – in an in-process dict.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self._lock = threading.Lock()
+        self._mem: Dict[str, str] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            path = Path(path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS modules (key TEXT PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key(info: zipfile.ZipInfo) -> str:
+        return f"v{INDEX_VERSION}:{info.CRC:08x}:{info.file_size}"
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(keys)
+        with self._lock:
+            found = {k: self._mem[k] for k in keys if k in self._mem}
+            missing = [k for k in keys if k not in found]
+            if self._db is not None and missing:
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    marks = ",".join("?" * len(batch))
+                    rows = self._db.execute(
+                        f"SELECT key, data FROM modules WHERE key IN ({marks})", batch
+                    ).fetchall()
+                    found.update(rows)
+        return found
+
+    def put_many(self, items: Dict[str, str]) -> None:
+        with self._lock:
+            if self._db is None:
+                self._mem.update(items)
+            elif items:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO modules (key, data) VALUES (?, ?)", items.items()
+                )
+                self._db.commit()
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Index
+# ──────────────────────────────────────────────────────────────────────────
+class SymbolIndex:
+    """
+    All modules of one archive, with BM25 ranking over their symbols.
+
+    Example:
+        index = build_symbol_index("project.zip")
+        print(index.render(index.rank("export orders as CSV", k=40)))
+    """
+
+    def __init__(self, modules: List[ModuleInfo]):
+        self.modules: Dict[str, ModuleInfo] = {m.path: m for m in modules}
+        self._entries: List[Tuple[ModuleInfo, Symbol]] = [
+            (m, s) for m in modules for s in m.symbols
+        ]
+        self._bm25: Optional[BM25Index] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def rank(self, query: str, k: int = 50) -> List[Tuple[ModuleInfo, Symbol]]:
+        """The `k` symbols most relevant to `query`, best first."""
+        if self._bm25 is None:
+            self._bm25 = BM25Index([
+                f"{m.module} {s.qualname} {s.signature} {s.doc}" for m, s in self._entries
+            ])
+        return [self._entries[i] for i in self._bm25.top_k(query, k)]
+
+    @staticmethod
+    def render(entries: List[Tuple[ModuleInfo, Symbol]]) -> str:
+        """Ranked symbols grouped by module (modules in order of their best symbol)."""
+        groups: Dict[str, List[Symbol]] = {}
+        owners: Dict[str, ModuleInfo] = {}
+        for mod, sym in entries:
+            groups.setdefault(mod.path, []).append(sym)
+            owners[mod.path] = mod
+        lines: List[str] = []
+        for path, symbols in groups.items():
+            mod = owners[path]
+            lines.append(f"{path}" + (f" – {mod.doc}" if mod.doc else ""))
+            for sym in sorted(symbols, key=lambda s: s.lineno):
+                doc = f"  # {sym.doc}" if sym.doc else ""
+                lines.append(f"  {sym.kind} {sym.qualname}{sym.signature}{doc}")
+        return "\n".join(lines)
+
+    def outline(self) -> List[Tuple[str, str]]:
+        """``("<path>::<qualname>", one-line description)`` for every symbol."""
+        return [
+            (
+                f"{m.path}::{s.qualname}",
+                f"{m.path}: {s.kind} {s.qualname}{s.signature}" + (f" – {s.doc}" if s.doc else ""),
+            )
+            for m, s in self._entries
+        ]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"modules": [asdict(m) for m in self.modules.values()]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, object]) -> "SymbolIndex":
+        modules = []
+        for m in data["modules"]:  # type: ignore[union-attr]
+            m = dict(m)
+            m["symbols"] = [Symbol(**s) for s in m["symbols"]]
+            modules.append(ModuleInfo(**m))
+        return cls(modules)
+
+
+# ── process-pool workers (one ZipFile handle per process) ────────────────
+_WORKER_ZF: Optional[zipfile.ZipFile] = None
+
+
+def _init_worker(zip_path: str) -> None:
+    global _WORKER_ZF  # pylint: disable=global-statement
+    _WORKER_ZF = zipfile.ZipFile(zip_path)
+
+
+def _parse_member(zf: zipfile.ZipFile, name: str) -> str:
+    with zf.open(name) as fp:
+        source = fp.read(MAX_SOURCE_BYTES).decode("utf-8", errors="replace")
+    return _to_json(*_parse(name, source))
+
+
+def _parse_shard(names: List[str]) -> List[str]:
+    assert _WORKER_ZF is not None
+    return [_parse_member(_WORKER_ZF, n) for n in names]
+
+
+def _python_members(zf: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    return sorted(
+        (
+            i
+            for i in zf.infolist()
+            if i.filename.endswith(".py")
+            and not i.is_dir()
+            and i.file_size <= MAX_SOURCE_BYTES
+            and not any(p in SKIP_PREVIEW_DIRS for p in i.filename.split("/")[:-1])
+        ),
+        key=lambda i: i.filename,
+    )
+
+
+def build_symbol_index(
+    zip_path: str,
+    *,
+    cache: Optional[SymbolCache] = None,
+    workers: int = 1,
+) -> SymbolIndex:
+    """Parse (or fetch from `cache`) every `.py` member of `zip_path`."""
+    cache = cache or SymbolCache()
+    with zipfile.ZipFile(zip_path) as zf:
+        members = _python_members(zf)
+        keys = {m.filename: SymbolCache.key(m) for m in members}
+        cached = cache.get_many(set(keys.values()))
+        todo = [m.filename for m in members if keys[m.filename] not in cached]
+
+        parsed: Dict[str, str] = {}
+        if workers > 1 and len(todo) >= PARALLEL_MIN_FILES:
+            shards = [todo[i::workers * 4] for i in range(workers * 4)]
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=_SPAWN,
+                initializer=_init_worker,
+                initargs=(zip_path,),
+            ) as pool:
+                for names, results in zip(shards, pool.map(_parse_shard, shards)):
+                    parsed.update(zip(names, results))
+        else:
+            for name in todo:
+                parsed[name] = _parse_member(zf, name)
+
+    cache.put_many({keys[name]: data for name, data in parsed.items()})
+    modules = [
+        _from_json(m.filename, parsed.get(m.filename) or cached[keys[m.filename]])
+        for m in members
+    ]
+    _LOG.info(
+        "symbol index: %d modules (%d parsed, %d cached), %d symbols",
+        len(modules),
+        len(parsed),
+        len(members) - len(parsed),
+        sum(len(m.symbols) for m in modules),
+    )
+    return SymbolIndex(modules)
@@ -0,0 +1,206 @@
+# src/tools/tfidf_index.py
+# ────────────────────────────────────────────────────────────────────────────
+# Persisted, incrementally updated TF-IDF index – the P2 fallback ranker when
+# BeeAI embeddings are unavailable.
+#
+# Terms are mapped with a stateless `HashingVectorizer`, so there is no
+# vocabulary to refit: adding or removing a chunk only touches that chunk's
+# row of raw term counts and the document-frequency vector.  Per corpus the
+# index stores
+#
+#   tf.npz     scipy CSR matrix of raw term counts, one row per chunk
+#   ids.json   chunk ids (content hashes) in row order
+#
+# Document frequencies and the idf-weighted, L2-normalised matrix are rebuilt
+# in memory only when the chunk set changes (the latter kept column-major).
+# At request time just the query is transformed and scored against the
+# columns of its own terms, i.e. only the postings of those terms are read.
+#
+# Corpora are keyed by a caller-chosen identity (e.g. archive name plus
+# fingerprint); syncing a corpus only adds / removes the chunks that changed.
+# `search` syncs and queries atomically, for indexes shared by concurrent
+# runs; `prune_indexes` drops the least recently used corpus directories.
+
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+_LOG = logging.getLogger(__name__)
+
+# Hash space of the vectorizer; collisions are negligible for doc-sized corpora.
+N_FEATURES = 2 ** 18
+
+_VECTORIZER = HashingVectorizer(
+    n_features=N_FEATURES,
+    stop_words="english",
+    alternate_sign=False,
+    norm=None,
+)
+
+
+class TfidfIndex:
+    """
+    TF-IDF index over ``(chunk_id, text)`` pairs.
+
+    Example:
+        index = TfidfIndex(Path("~/.cache/ai-project-features/tfidf/<corpus>"))
+        index.sync(chunks)                  # only new / removed ids are touched
+        best_ids = index.top_k("add a REST endpoint", k=5)
+
+    With ``directory=None`` nothing is persisted.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.directory = Path(directory).expanduser() if directory else None
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._tf = sparse.csr_matrix((0, N_FEATURES), dtype=np.float32)
+        self._df = np.zeros(N_FEATURES, dtype=np.int64)
+        self._weighted: Optional[sparse.csc_matrix] = None
+        self._idf: Optional[np.ndarray] = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    # ------------------------------------------------------------------ #
+    # Updates
+    # ------------------------------------------------------------------ #
+    def sync(self, chunks: Sequence[Tuple[str, str]]) -> Tuple[int, int]:
+        """
+        Make the index contain exactly `chunks` (``(chunk_id, text)`` pairs).
+        Returns ``(added, removed)``; persists only if something changed.
+        """
+        wanted: Dict[str, str] = {}
+        for cid, text in chunks:
+            wanted.setdefault(cid, text)
+
+        with self._lock:
+            present = set(self._ids)
+            removed = present - wanted.keys()
+            new_ids = [cid for cid in wanted if cid not in present]
+            if not removed and not new_ids:
+                return 0, 0
+
+            if removed:
+                keep = np.array([cid not in removed for cid in self._ids], dtype=bool)
+                self._df -= _doc_freq(self._tf[~keep])
+                self._tf = self._tf[keep]
+                self._ids = [cid for cid in self._ids if cid not in removed]
+            if new_ids:
+                rows = _VECTORIZER.transform([wanted[cid] for cid in new_ids]).astype(np.float32)
+                self._df += _doc_freq(rows)
+                self._tf = sparse.vstack([self._tf, rows], format="csr")
+                self._ids.extend(new_ids)
+
+            self._weighted = None
+            self._save()
+        _LOG.info(
+            "tfidf index: +%d / -%d chunks (%d total)", len(new_ids), len(removed), len(self)
+        )
+        return len(new_ids), len(removed)
+
+    # ------------------------------------------------------------------ #
+    # Queries
+    # ------------------------------------------------------------------ #
+    def search(self, chunks: Sequence[Tuple[str, str]], query: str, k: int) -> List[str]:
+        """`sync(chunks)` then `top_k(query, k)` with no other sync in between."""
+        with self._lock:
+            self.sync(chunks)
+            if self.directory is not None and self.directory.exists():
+                os.utime(self.directory)  # recency for `prune_indexes`
+            return self.top_k(query, k)
+
+    def top_k(self, query: str, k: int) -> List[str]:
+        """Ids of the `k` chunks most similar to `query`, best first."""
+        with self._lock:
+            n = len(self._ids)
+            if n == 0 or k <= 0:
+                return []
+            matrix, idf = self._matrix()
+            q = normalize(sparse.csr_matrix(_VECTORIZER.transform([query]).multiply(idf)))
+            # Column slice of the CSC matrix = postings of the query's terms only.
+            scores = matrix[:, q.indices] @ q.data
+            ids = self._ids
+
+        k = min(k, n)
+        top = np.argpartition(scores, n - k)[n - k:] if k < n else np.arange(n)
+        return [ids[i] for i in top[np.argsort(-scores[top], kind="stable")]]
+
+    # ------------------------------------------------------------------ #
+    # Helpers
+    # ------------------------------------------------------------------ #
+    def _matrix(self) -> Tuple[sparse.csc_matrix, np.ndarray]:
+        """Idf-weighted, row-normalised matrix in CSC form (rebuilt after a change)."""
+        if self._weighted is None:
+            n = len(self._ids)
+            # Same smoothing as sklearn's TfidfTransformer(smooth_idf=True).
+            self._idf = (np.log((1 + n) / (1 + self._df)) + 1).astype(np.float32)
+            weighted = self._tf @ sparse.diags(self._idf, format="csr")
+            self._weighted = normalize(sparse.csr_matrix(weighted)).tocsc()
+        return self._weighted, self._idf
+
+    def _load(self) -> None:
+        if self.directory is None:
+            return
+        try:
+            ids = json.loads((self.directory / "ids.json").read_text(encoding="utf-8"))
+            tf = sparse.load_npz(self.directory / "tf.npz").tocsr()
+        except (OSError, ValueError):
+            return
+        if tf.shape != (len(ids), N_FEATURES):
+            _LOG.info("tfidf index: %s is stale; rebuilding", self.directory)
+            return
+        self._ids, self._tf = ids, tf.astype(np.float32)
+        self._df = _doc_freq(self._tf)
+
+    def _save(self) -> None:
+        if self.directory is None:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+            tmp_tf = self.directory / f"tf{suffix}.npz"
+            sparse.save_npz(tmp_tf, self._tf)
+            tmp_ids = self.directory / f"ids{suffix}"
+            tmp_ids.write_text(json.dumps(self._ids), encoding="utf-8")
+            os.replace(tmp_tf, self.directory / "tf.npz")
+            os.replace(tmp_ids, self.directory / "ids.json")
+        except OSError as exc:
+            _LOG.warning("tfidf index: could not persist – %s", exc)
+
+
+def prune_indexes(root: Path, keep: int) -> int:
+    """
+    Delete all but the `keep` most recently used corpus directories under
+    `root`; returns how many were removed.
+    """
+    try:
+        dirs = [(d.stat().st_mtime, d) for d in Path(root).expanduser().iterdir() if d.is_dir()]
+    except OSError:
+        return 0
+    removed = 0
+    for _, d in sorted(dirs, key=lambda e: e[0], reverse=True)[max(keep, 0):]:
+        shutil.rmtree(d, ignore_errors=True)
+        removed += 1
+    if removed:
+        _LOG.info("tfidf index: pruned %d unused corpora under %s", removed, root)
+    return removed
+
+
+def _doc_freq(rows: sparse.csr_matrix) -> np.ndarray:
+    """Number of rows in which each feature occurs."""
+    return np.bincount(rows.indices, minlength=N_FEATURES).astype(np.int64)
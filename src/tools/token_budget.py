@@ -0,0 +1,195 @@
+# src/tools/token_budget.py
+# ────────────────────────────────────────────────────────────────────────────
+# Token-aware prompt budgeting shared by every prompt builder.
+#
+# * `count_tokens()` uses a real BPE tokenizer (tiktoken, cl100k_base) when it
+#   is installed and its vocabulary is available, and otherwise a local
+#   approximation that splits text into word / punctuation / newline pieces
+#   the way BPE vocabularies do, erring on the high side.
+# * `fit_sections()` gives each prompt section a share of the budget: fixed
+#   sections are kept verbatim, the rest are water-filled so the *largest*
+#   sections are trimmed first, each according to its own strategy
+#   (keep head, keep tail, or keep both ends).
+# * The returned `BudgetReport` carries pre/post token counts and can publish
+#   them into the run's memory under ``"token_usage"``.
+
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+_LOG = logging.getLogger(__name__)
+
+# Text pieces as a BPE tokenizer sees them: runs of word characters,
+# single punctuation marks, and line breaks.
+_PIECE_RE = re.compile(r"\w+|[^\w\s]|\n+")
+
+# Average characters per token for long identifiers / words.
+_CHARS_PER_TOKEN = 4
+
+_ENCODER: Any = None
+_ENCODER_LOADED = False
+
+
+def _encoder() -> Any:
+    """Return a tiktoken encoder, or None if unavailable (not installed / offline)."""
+    global _ENCODER, _ENCODER_LOADED  # pylint: disable=global-statement
+    if not _ENCODER_LOADED:
+        _ENCODER_LOADED = True
+        try:
+            import tiktoken  # type: ignore
+
+            _ENCODER = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # noqa: BLE001 – missing package or vocabulary download
+            _ENCODER = None
+    return _ENCODER
+
+
+def approx_tokens(text: str) -> int:
+    """Tokenizer-free estimate: one token per short piece, ~4 chars per token for long words."""
+    return sum(
+        math.ceil(len(piece) / _CHARS_PER_TOKEN) if piece[0].isalnum() or piece[0] == "_" else 1
+        for piece in _PIECE_RE.findall(text)
+    )
+
+
+def count_tokens(text: str) -> int:
+    """Count the tokens of `text` with the best tokenizer available."""
+    if not text:
+        return 0
+    enc = _encoder()
+    if enc is not None:
+        return len(enc.encode(text, disallowed_special=()))
+    return approx_tokens(text)
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Trimming
+# ──────────────────────────────────────────────────────────────────────────
+TRIM_MODES = ("head", "tail", "ends", "none")
+
+
+def trim_text(text: str, max_tokens: int, keep: str = "head") -> str:
+    """
+    Cut `text` at line boundaries so it fits `max_tokens`.
+
+    keep="head" keeps the first lines, "tail" the last lines (e.g. error logs),
+    "ends" both ends (e.g. diffs).  The dropped part is replaced by a single
+    ``… (N lines trimmed)`` marker.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    lines = text.splitlines()
+    marker_cost = count_tokens(f"… ({len(lines)} lines trimmed)")
+    room = max(max_tokens - marker_cost, 0)
+
+    def take(seq: List[str], limit: int) -> List[str]:
+        kept: List[str] = []
+        used = 0
+        for line in seq:
+            cost = count_tokens(line) + 1  # + line break
+            if used + cost > limit:
+                break
+            kept.append(line)
+            used += cost
+        return kept
+
+    if keep == "tail":
+        tail = take(lines[::-1], room)[::-1]
+        return "\n".join([f"… ({len(lines) - len(tail)} lines trimmed)"] + tail)
+    if keep == "ends":
+        head = take(lines, room // 2)
+        tail = take(lines[len(head):][::-1], room - room // 2)[::-1]
+        dropped = len(lines) - len(head) - len(tail)
+        return "\n".join(head + [f"… ({dropped} lines trimmed)"] + tail)
+
+    head = take(lines, room)
+    return "\n".join(head + [f"… ({len(lines) - len(head)} lines trimmed)"])
+
+
+# ──────────────────────────────────────────────────────────────────────────
+# Budget allocation
+# ──────────────────────────────────────────────────────────────────────────
+@dataclass
+class Section:
+    """One named part of a prompt and how it may be shortened."""
+
+    name: str
+    text: str
+    keep: str = "head"   # one of TRIM_MODES; "none" = never trimmed
+    min_tokens: int = 0  # trimmable sections are never cut below this
+
+
+@dataclass
+class BudgetReport:
+    """Pre/post token counts for one prompt, per section and in total."""
+
+    phase: str
+    budget: int
+    before: int = 0
+    after: int = 0
+    sections: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+
+    def publish(self, mem: Any) -> None:
+        """Log the counts and merge them into ``mem["token_usage"][phase]``."""
+        entry = {
+            "budget": self.budget,
+            "before": self.before,
+            "after": self.after,
+            "sections": {k: {"before": b, "after": a} for k, (b, a) in self.sections.items()},
+        }
+        # phases may run concurrently – merge atomically
+        mem.update("token_usage", lambda usage: {**(usage or {}), self.phase: entry})
+        _LOG.info(
+            "%s prompt: %d → %d tokens (budget %d)",
+            self.phase,
+            self.before,
+            self.after,
+            self.budget,
+        )
+
+
+def fit_sections(
+    sections: List[Section],
+    budget: int,
+    *,
+    phase: str = "prompt",
+    reserve: int = 0,
+) -> Tuple[Dict[str, str], BudgetReport]:
+    """
+    Fit `sections` into `budget` tokens (minus `reserve` for fixed template
+    text) and return ``({name: text}, report)``.
+
+    Fixed sections (``keep="none"``) are charged first.  The remaining room
+    is shared by water-filling: sections smaller than an equal share keep all
+    their tokens and hand the surplus on, so only the largest sections are
+    trimmed.
+    """
+    counts = {s.name: count_tokens(s.text) for s in sections}
+    report = BudgetReport(phase=phase, budget=budget, before=reserve + sum(counts.values()))
+
+    room = budget - reserve - sum(counts[s.name] for s in sections if s.keep == "none")
+    trimmable = sorted((s for s in sections if s.keep != "none"), key=lambda s: counts[s.name])
+
+    allowance: Dict[str, Optional[int]] = {s.name: None for s in sections}
+    if reserve + sum(counts.values()) > budget:
+        for idx, sec in enumerate(trimmable):
+            share = max(room, 0) // (len(trimmable) - idx)
+            if counts[sec.name] <= share:
+                room -= counts[sec.name]
+            else:
+                allowance[sec.name] = max(share, sec.min_tokens)
+                room -= allowance[sec.name]
+
+    fitted: Dict[str, str] = {}
+    for sec in sections:
+        limit = allowance[sec.name]
+        text = sec.text if limit is None else trim_text(sec.text, limit, sec.keep)
+        fitted[sec.name] = text
+        after = counts[sec.name] if limit is None else count_tokens(text)
+        report.sections[sec.name] = (counts[sec.name], after)
+
+    report.after = reserve + sum(a for _, a in report.sections.values())
+    return fitted, report
@@ -0,0 +1,139 @@
+# src/tools/tree_cache.py
+# ────────────────────────────────────────────────────────────────────────────
+# Content-addressed, on-disk cache of rendered phase-Z trees.
+#
+# The key is a fast hash of the ZIP's *central directory* (member names, CRCs
+# and sizes) plus the rendering options, so resubmitting the same archive with a
+# different prompt skips the scan entirely without decompressing anything.
+# Entries are plain UTF-8 files; the cache is trimmed least-recently-used first
+# (by mtime, bumped on every hit) until it fits in `max_bytes`.
+
+import hashlib
+import logging
+import os
+import threading
+import zipfile
+from pathlib import Path
+from typing import Any, Optional
+
+_LOG = logging.getLogger(__name__)
+
+_SUFFIX = ".tree"
+
+
+def archive_fingerprint(zip_path: str) -> str:
+    """
+    Hash the central directory of `zip_path`.
+
+    Only metadata is read (name, CRC-32, compressed and uncompressed size of
+    every member), which is enough to detect any content change.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in zf.infolist():
+            h.update(
+                f"{info.filename}\0{info.CRC:08x}\0{info.file_size}\0"
+                f"{info.compress_size}\n".encode("utf-8", "surrogateescape")
+            )
+    return h.hexdigest()
+
+
+class TreeCache:
+    """
+    LRU-by-bytes directory cache for rendered trees.
+
+    Example:
+        cache = TreeCache(Path("~/.cache/trees").expanduser(), max_bytes=64 << 20)
+        key = cache.key(archive_fingerprint(zip_path), preview_bytes=120)
+        tree = cache.get(key)
+        if tree is None:
+            tree = scan_zip(zip_path, preview_bytes=120)
+            cache.put(key, tree)
+
+    A `max_bytes` of 0 disables the cache (every lookup is a miss, nothing
+    is written).
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(fingerprint: str, **options: Any) -> str:
+        """Combine an archive fingerprint with the options that affect rendering."""
+        opts = ";".join(f"{k}={options[k]!r}" for k in sorted(options))
+        return hashlib.blake2b(
+            f"{fingerprint}|{opts}".encode("utf-8"), digest_size=20
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached tree for `key` (refreshing its LRU position) or None."""
+        path = self.cache_dir / f"{key}{_SUFFIX}"
+        tree: Optional[str] = None
+        if self.enabled:
+            try:
+                tree = path.read_text(encoding="utf-8")
+                os.utime(path)  # mark as most recently used
+            except OSError:
+                tree = None
+
+        with self._lock:
+            if tree is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            hits, misses = self.hits, self.misses
+        _LOG.info(
+            "tree cache %s %s… (hits=%d misses=%d)",
+            "hit" if tree is not None else "miss",
+            key[:12],
+            hits,
+            misses,
+        )
+        return tree
+
+    def put(self, key: str, tree: str) -> None:
+        """Store `tree` under `key`, then evict old entries beyond `max_bytes`."""
+        if not self.enabled:
+            return
+        data = tree.encode("utf-8")
+        if len(data) > self.max_bytes:
+            _LOG.info("tree cache: entry of %d B exceeds budget; not stored", len(data))
+            return
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self.cache_dir / f"{key}{_SUFFIX}"
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)  # atomic for concurrent writers
+            self._evict()
+        except OSError as exc:
+            _LOG.warning("tree cache: could not store entry – %s", exc)
+
+    def _evict(self) -> None:
+        """Delete least-recently-used entries until the total fits `max_bytes`."""
+        entries = []
+        for p in self.cache_dir.glob(f"*{_SUFFIX}"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue  # removed by a concurrent evictor
+            entries.append((st.st_mtime, st.st_size, p))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+                total -= size
+                _LOG.debug("tree cache: evicted %s (%d B)", p.name, size)
+            except OSError:
+                continue
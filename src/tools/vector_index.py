@@ -0,0 +1,219 @@
+# src/tools/vector_index.py
+# ────────────────────────────────────────────────────────────────────────────
+# Persistent embedding index used by architecture recall (phase P2).
+#
+# Vectors are stored once per *paragraph content hash*, so re-running P2 only
+# embeds paragraphs that are new or changed.  On disk each index directory
+# holds:
+#
+#   vectors.f32   raw little-endian float32 rows, appended as new text arrives
+#   keys.json     {"dim": <int>, "normalized": true,
+#                  "keys": [<sha1 of row 0>, <sha1 of row 1>, …]}
+#
+# Rows are L2-normalised before they are written, so cosine similarity is a
+# plain dot product at query time.  The matrix is opened with `numpy.memmap`,
+# so only the rows that are scored are paged in; ranking is a single
+# matrix-vector product followed by `argpartition` for the top-k.
+#
+# The directory is shared by every process using the same cache dir.  New
+# rows are appended under an exclusive `flock` on `.lock`, after re-reading
+# `keys.json` so row numbers follow what other processes appended meanwhile;
+# bytes past the last row listed in `keys.json` (a torn append) are cut off
+# first.  Without `fcntl` (Windows) only the in-process lock applies.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover – Windows
+    fcntl = None
+
+_LOG = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """Stable (cross-process) identifier of a paragraph's text."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Return a float32 copy of `matrix` with every row scaled to unit length."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        return matrix / max(float(np.linalg.norm(matrix)), 1e-8)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-8)
+
+
+def top_k_cosine(
+    matrix: np.ndarray,
+    query: np.ndarray,
+    k: int,
+    *,
+    normalized: bool = False,
+) -> List[int]:
+    """
+    Return the row indices of the `k` rows of `matrix` most cosine-similar to
+    `query`, best first.
+
+    Pass ``normalized=True`` when the rows are already unit length (as those
+    returned by `EmbeddingIndex.embed`); the scores are then one mat-vec.
+    """
+    n = matrix.shape[0]
+    if n == 0 or k <= 0:
+        return []
+    if not normalized:
+        matrix = normalize_rows(matrix)
+    scores = matrix @ normalize_rows(query)
+
+    k = min(k, n)
+    if k < n:
+        top = np.argpartition(scores, n - k)[n - k:]
+    else:
+        top = np.arange(n)
+    return top[np.argsort(-scores[top], kind="stable")].tolist()
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Exclusive advisory lock on `path` across processes (no-op without fcntl)."""
+    if fcntl is None:  # pragma: no cover
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as fp:
+        fcntl.flock(fp, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+class EmbeddingIndex:
+    """
+    Content-addressed, append-only store of embedding vectors.
+
+    Example:
+        index = EmbeddingIndex(Path("~/.cache/ai-project-features/embeddings/mini"))
+        vectors = index.embed(paragraphs, embedder.encode)   # only new ones encoded
+        best = top_k_cosine(vectors, query_vec, k=5, normalized=True)
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory).expanduser()
+        self._vec_path = self.directory / "vectors.f32"
+        self._key_path = self.directory / "keys.json"
+        self._lock_path = self.directory / ".lock"
+        self._lock = threading.Lock()
+        self._dim: Optional[int] = None
+        self._rows: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    # ------------------------------------------------------------------ #
+    def embed(
+        self,
+        texts: Sequence[str],
+        encode: Callable[[List[str]], Any],
+    ) -> np.ndarray:
+        """
+        Return a ``(len(texts), dim)`` matrix of unit-length float32 rows for
+        `texts`, calling `encode` only for texts whose hash is not stored yet
+        (here or, as of the last look at the files, by another process).
+        """
+        hashes = [content_hash(t) for t in texts]
+        with self._lock:
+            missing: Dict[str, str] = {}
+            for h, t in zip(hashes, texts):
+                if h not in self._rows and h not in missing:
+                    missing[h] = t
+            if missing:
+                self._load()  # pick up rows other processes appended meanwhile
+                missing = {h: t for h, t in missing.items() if h not in self._rows}
+            if missing:
+                vectors = np.asarray(encode(list(missing.values())), dtype=np.float32)
+                with _file_lock(self._lock_path):
+                    self._load()
+                    fresh = [i for i, h in enumerate(missing) if h not in self._rows]
+                    self._append([list(missing)[i] for i in fresh], vectors[fresh])
+                _LOG.info(
+                    "embedding index: encoded %d new paragraphs (%d cached)",
+                    len(missing),
+                    len(set(hashes)) - len(missing),
+                )
+            if not hashes:
+                return np.zeros((0, self._dim or 0), dtype=np.float32)
+            return self._matrix[[self._rows[h] for h in hashes]]
+
+    # ------------------------------------------------------------------ #
+    # Storage helpers
+    # ------------------------------------------------------------------ #
+    def _load(self) -> None:
+        """(Re)read the on-disk state; safe without the file lock (rows precede keys)."""
+        try:
+            meta = json.loads(self._key_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not meta.get("normalized"):
+            _LOG.info("embedding index: %s predates row normalisation; rebuilding", self.directory)
+            self._vec_path.unlink(missing_ok=True)
+            return
+        dim = int(meta["dim"])
+        keys: List[str] = meta["keys"]
+        # Tolerate a torn append: trust only rows fully present in both files.
+        stored = self._vec_path.stat().st_size // (4 * dim) if self._vec_path.exists() else 0
+        keys = keys[:stored]
+        self._dim = dim
+        self._rows = {k: i for i, k in enumerate(keys)}
+        self._remap()
+
+    def _append(self, keys: List[str], vectors: np.ndarray) -> None:
+        if vectors.ndim != 2 or vectors.shape[0] != len(keys):
+            raise ValueError("encode() must return one vector per text")
+        if self._dim is None:
+            self._dim = int(vectors.shape[1])
+        elif vectors.shape[1] != self._dim:
+            raise ValueError(
+                f"embedding dimension changed ({self._dim} → {vectors.shape[1]}); "
+                f"delete {self.directory} to rebuild"
+            )
+
+        if not keys:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._vec_path, "ab") as fp:
+            fp.truncate(len(self._rows) * 4 * self._dim)  # drop a torn tail
+            fp.write(np.ascontiguousarray(normalize_rows(vectors), dtype="<f4").tobytes())
+
+        start = len(self._rows)
+        for offset, key in enumerate(keys):
+            self._rows[key] = start + offset
+        ordered = sorted(self._rows, key=self._rows.__getitem__)
+        tmp = self._key_path.with_suffix(f".{os.getpid()}.tmp")
+        meta = {"dim": self._dim, "normalized": True, "keys": ordered}
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self._key_path)
+        self._remap()
+
+    def _remap(self) -> None:
+        n = len(self._rows)
+        if n == 0 or self._dim is None:
+            self._matrix = np.zeros((0, self._dim or 0), dtype=np.float32)
+            return
+        self._matrix = np.memmap(
+            self._vec_path, dtype="<f4", mode="r", shape=(n, self._dim)
+        )
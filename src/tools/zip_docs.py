@@ -0,0 +1,124 @@
+# src/tools/zip_docs.py
+# ────────────────────────────────────────────────────────────────────────────
+# Design documentation streamed straight out of an uploaded project archive.
+# Used by phase P2 (architecture recall); nothing is extracted to disk.
+#
+# A member counts as documentation when it is
+#
+#   * a README / ARCHITECTURE / CONTRIBUTING / DESIGN file at any depth,
+#   * any .md / .rst / .txt / .adoc file under a `docs/` or `doc/` directory,
+#   * an architecture decision record (under an `adr/`, `adrs/` or
+#     `decisions/` directory, or named like `0007-use-postgres.md`),
+#   * or, for `.py` files, the module docstring only.
+#
+# Vendored / generated trees (`file_scanner.SKIP_PREVIEW_DIRS`) are ignored.
+# Each member is read through `ZipFile.open()` with a byte cap, so a huge
+# generated doc or source file costs at most `max_bytes` of decompression.
+
+import ast
+import io
+import logging
+import posixpath
+import re
+import tokenize
+import zipfile
+from typing import Iterator, Optional, Tuple
+
+from tools.file_scanner import SKIP_PREVIEW_DIRS
+
+_LOG = logging.getLogger(__name__)
+
+DOC_EXTS = frozenset({".md", ".markdown", ".rst", ".txt", ".adoc"})
+
+# Largest prefix read from a single documentation member.
+MAX_DOC_BYTES = 256 * 1024
+
+# Bytes of a `.py` file scanned for its module docstring.
+DOCSTRING_PEEK_BYTES = 16 * 1024
+
+_DOC_DIRS = frozenset({"docs", "doc", "documentation"})
+_ADR_DIRS = frozenset({"adr", "adrs", "decisions", "architecture-decisions"})
+_TOP_LEVEL_STEMS = frozenset({"readme", "architecture", "contributing", "design", "hacking"})
+_ADR_EXTS = frozenset({".md", ".markdown", ".rst", ".adoc"})
+_ADR_NAME_RE = re.compile(r"^\d{3,4}[-_].+")
+
+
+def doc_kind(name: str) -> Optional[str]:
+    """
+    Classify a ZIP member: "readme", "doc", "adr", "module" (a `.py` file whose
+    docstring is wanted) or None when it is not documentation.
+    """
+    parts = name.split("/")
+    if name.endswith("/") or any(part in SKIP_PREVIEW_DIRS for part in parts[:-1]):
+        return None
+    base = parts[-1]
+    stem, ext = posixpath.splitext(base.lower())
+    dirs = {p.lower() for p in parts[:-1]}
+
+    if ext == ".py":
+        return "module"
+    if ext not in DOC_EXTS and ext:
+        return None
+    if dirs & _ADR_DIRS or (ext in _ADR_EXTS and _ADR_NAME_RE.match(base)):
+        return "adr"
+    if stem in _TOP_LEVEL_STEMS:
+        return "readme"
+    if dirs & _DOC_DIRS and ext in DOC_EXTS:
+        return "doc"
+    return None
+
+
+def module_docstring(source: str) -> Optional[str]:
+    """
+    Return the docstring at the top of `source` (which may be truncated), or
+    None.  Only the leading tokens are examined, so the rest of the file need
+    not be valid Python.
+    """
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+            if tok.type in (tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.ENCODING):
+                continue
+            if tok.type != tokenize.STRING:
+                return None
+            value = ast.literal_eval(tok.string)
+            return value.strip() if isinstance(value, str) and value.strip() else None
+    except (tokenize.TokenError, SyntaxError, ValueError):
+        return None
+    return None
+
+
+def _read_capped(zf: zipfile.ZipFile, info: zipfile.ZipInfo, limit: int) -> str:
+    with zf.open(info) as fp:
+        return fp.read(limit).decode("utf-8", errors="ignore")
+
+
+def iter_docs(
+    zip_path: str,
+    *,
+    max_bytes: int = MAX_DOC_BYTES,
+    docstrings: bool = True,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yield ``(member_name, text)`` for every documentation member of the
+    archive, in sorted member order.  `.py` members yield their module
+    docstring (skipped with ``docstrings=False``).
+    """
+    with zipfile.ZipFile(zip_path) as zf:
+        members = sorted(
+            (i for i in zf.infolist() if not i.is_dir()), key=lambda i: i.filename
+        )
+        for info in members:
+            kind = doc_kind(info.filename)
+            if kind is None or (kind == "module" and not docstrings):
+                continue
+            try:
+                if kind == "module":
+                    text = module_docstring(_read_capped(zf, info, DOCSTRING_PEEK_BYTES))
+                else:
+                    text = _read_capped(zf, info, max_bytes)
+            except (OSError, zipfile.BadZipFile, NotImplementedError, RuntimeError) as exc:
+                _LOG.debug("zip_docs: cannot read %s – %s", info.filename, exc)
+                continue
+            if text and text.strip():
+                yield info.filename, text
+
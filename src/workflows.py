@@ -4,7 +4,7 @@ src/workflows.py
 Declaratively maps the logical phases described in the security-oriented
 Mermaid flowchart
 
-    Z → LST → P0 → P1 → P2 → P3 → P4 → P5 → D1 → P6 → OUT
+    Z → S → LST → P0 → P1 → P2 → P3 → P4 → P5 → D1 → P6 → OUT
 
 to concrete Python functions.  The mapping lives in the OrderedDict
 `PHASES`, so you can swap agents in or out by editing that one object.
@@ -13,22 +13,75 @@ The file also exposes a `run_all()` helper that executes the entire
 pipeline end-to-end and returns the Markdown recap generated in phase
 P6.  `run_all()` is what both the CLI driver (`src/main.py`) and the
 Flask façade (`app.py`) import.
+
+`arun_all()` is the asyncio-native twin: LLM-bound phases await
+`llm.agenerate`, every other phase runs in a worker thread, so one event
+loop can drive many pipelines without dedicating a thread to each.
+
+Each invocation creates its own `memory.Memory` and hands it to every
+phase as ``mem=...`` (it is also made the context's current memory, so
+code using the global `MEM` sees the same store).  Concurrent runs in one
+process are therefore isolated from each other.
+
+Phases do not simply run one after another: `PHASE_IO` declares the
+memory keys each phase reads and writes, and `tools.phase_graph` starts a
+phase as soon as the phases it depends on have finished (up to
+`PHASE_WORKERS` at a time).  Z, S and P0 run together, and P2 overlaps
+P1.  A phase added to `PHASES` without a `PHASE_IO` entry acts as a
+barrier.  Every run stores a timing report, including the critical path,
+under ``mem["timing_report"]``.
+
+Runs are checkpointed (`tools.checkpoint`, under ``CHECKPOINT_DIR``): after
+each phase in `CHECKPOINT_PHASES` its `PHASE_IO` writes are saved, keyed by
+the digests of its reads plus the archive fingerprint, prompt and the
+settings that shape its output (tree layout for Z, model and retrieval for
+P1–P4).  Only the newest ``CHECKPOINT_MAX_RUNS`` runs are kept.  Passing
+the same ``run_id`` again restores every phase whose key still matches and
+reruns from the first invalidated one – e.g. with an edited prompt, Z and S
+are restored and P1 onwards run again.  Files P5 created are recorded in
+the run's manifest and seeded into ``mem["p5_created"]`` on resume, so a
+rerun after a failed P5 may revise them despite ``nonDestructive``.
 """
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import sqlite3
+import threading
 from collections import OrderedDict
-from typing import Callable, Any
+from typing import Awaitable, Callable, Any, Dict
 
 # ────────────────────────────────────────────────────────────────────────────
 # Core shared state (“blackboard”)
 # ────────────────────────────────────────────────────────────────────────────
-from memory import MEM  # a simple module-level dict shared by all agents
+from memory import Memory, resolve, use_memory  # one blackboard per run
+from config import Settings
+
+_CFG = Settings()
+_LOG = logging.getLogger(__name__)
 
 # ────────────────────────────────────────────────────────────────────────────
 # Deterministic tools (no LLMs involved)
 # ────────────────────────────────────────────────────────────────────────────
+from tools.checkpoint import CheckpointStore, new_run_id, prune_runs
+from tools.failure_context import error_excerpt
 from tools.file_scanner import scan_zip
+from tools.phase_graph import PhaseSpec, arun_graph, run_graph
+from tools.symbol_index import SymbolCache, SymbolIndex, build_symbol_index
+from tools.tree_cache import TreeCache, archive_fingerprint
+
+# Rendered trees keyed by archive content; shared by every run in this process.
+TREE_CACHE = TreeCache(_CFG.TREE_CACHE_DIR, _CFG.TREE_CACHE_MAX_BYTES)
+
+# Parsed modules keyed by file content (CRC-32 + size); shared likewise.
+# Opened by the first phase S, so importing this module touches no files.
+SYMBOL_CACHE: SymbolCache | None = None
+_SYMBOL_CACHE_LOCK = threading.Lock()
+
+# P5 writes into, and D1 checks, the one working tree of this process, so
+# concurrent runs (batch jobs, `arun_all` callers) take turns at P5⇄D1.
+WORKTREE_LOCK = threading.Lock()
 
 # ────────────────────────────────────────────────────────────────────────────
 # Agents for each phase
@@ -40,41 +93,112 @@ from agents import (
     feature_instantiation_agent,  # P4
     code_writer_agent,            # P5 (part)
     static_checker_agent,         # D1
+    self_refine_agent,            # P5⇄D1 retries
     doc_assembler_agent,          # P6
 )
 
 # ────────────────────────────────────────────────────────────────────────────
 # Phase helpers
 # ────────────────────────────────────────────────────────────────────────────
-def phase_Z(zip_path: str) -> str:
+def phase_Z(zip_path: str, mem: Memory | None = None) -> str:
     """
     Z  – Deterministic “file_search.tree(zip)” step.
     Reads the provided archive *read-only*, constructs a Markdown-formatted
-    directory tree with one-line previews, and stores it in shared memory
+    directory tree with one-line previews, and stores it in the run's memory
     under key ``"tree"``.  Returns the tree string so callers may log it.
+
+    Preview size, the line / token budget and the preview worker count come
+    from `Settings` (``PREVIEW_BYTES``, ``TREE_MAX_LINES``, ``TREE_MAX_TOKENS``,
+    ``SCAN_WORKERS``); ``TREE_RENDER=compact`` selects the nested layout.
+    Previously rendered trees are served from `TREE_CACHE`, keyed by the
+    archive's central directory.  A tree already present in `mem` (e.g.
+    pre-seeded by batch mode) is reused as-is.  The archive path itself is
+    kept under ``"zip_path"`` so P2 can read the project's docs from it.
     """
-    tree = scan_zip(zip_path)
-    MEM.put("tree", tree)
+    mem = resolve(mem)
+    mem.put("zip_path", zip_path)
+    if mem.get("tree") is not None:
+        return mem.get("tree")
+
+    options = dict(
+        preview_bytes=_CFG.PREVIEW_BYTES,
+        max_lines=_CFG.TREE_MAX_LINES or None,
+        max_tokens=_CFG.TREE_MAX_TOKENS or None,
+        render=_CFG.TREE_RENDER,
+        collapse_threshold=_CFG.TREE_COLLAPSE_THRESHOLD,
+    )
+    key = TREE_CACHE.key(archive_fingerprint(zip_path), **options)
+    tree = TREE_CACHE.get(key)
+    if tree is None:
+        tree = scan_zip(zip_path, workers=_CFG.SCAN_WORKERS, **options)
+        TREE_CACHE.put(key, tree)
+    mem.put("tree", tree)
     return tree
 
 
-def phase_P0(user_prompt: str) -> None:
+def phase_S(zip_path: str, mem: Memory | None = None) -> None:
     """
-    P0 – Attach the user-supplied natural-language prompt to shared memory.
+    S  – Deterministic symbol index of the archive's Python code.
+    Parses every `.py` member into modules / classes / functions /
+    signatures / imports (`tools.symbol_index`) and stores the index under
+    ``"symbol_index"`` for the planner and code writer.  Unchanged files are
+    served from `SYMBOL_CACHE`; misses are parsed by ``SCAN_WORKERS``
+    processes.
+    """
+    mem = resolve(mem)
+    if mem.get("symbol_index") is not None:
+        return
+    mem.put(
+        "symbol_index",
+        build_symbol_index(zip_path, cache=_symbol_cache(), workers=_CFG.SCAN_WORKERS),
+    )
+
+
+def _symbol_cache() -> SymbolCache:
+    """`SYMBOL_CACHE`, opened on first use; in-process only if the file cannot be opened."""
+    global SYMBOL_CACHE  # pylint: disable=global-statement
+    with _SYMBOL_CACHE_LOCK:
+        if SYMBOL_CACHE is None:
+            try:
+                SYMBOL_CACHE = SymbolCache(_CFG.SYMBOL_CACHE_PATH)
+            except (OSError, sqlite3.Error) as exc:
+                _LOG.warning(
+                    "symbol cache %s unusable (%s) – in-process only",
+                    _CFG.SYMBOL_CACHE_PATH,
+                    exc,
+                )
+                SYMBOL_CACHE = SymbolCache(None)
+        return SYMBOL_CACHE
+
+
+def phase_P0(user_prompt: str, mem: Memory | None = None) -> None:
+    """
+    P0 – Attach the user-supplied natural-language prompt to the run's memory.
 
     Only data transfer here; *no LLM calls* and definitely *no code exec*.
     """
-    MEM.put("user_prompt", user_prompt)
+    resolve(mem).put("user_prompt", user_prompt)
 
 
-def phase_P5_loop_until_clean(max_attempts: int = 4) -> None:
+def phase_P5_loop_until_clean(
+    max_attempts: int = 4, mem: Memory | None = None
+) -> None:
     """
     Combined P5 + D1 loop.
 
-    • Runs ``code_writer_agent.run()`` (phase P5) to produce or patch files.  
+    • Runs ``code_writer_agent.run()`` (phase P5) to produce or patch files
+      – or ``run_speculative()`` with `P5_SPECULATIVE`, which races several
+      candidates and writes the first one that passes the in-memory checks.  
     • Immediately invokes ``static_checker_agent.run()`` (phase D1).  
       – On success, returns and the pipeline proceeds to P6.  
-      – On failure, the loop repeats up to *max_attempts* times.
+      – On failure, ``self_refine_agent.run()`` rewrites the tasks from the
+        failing hunk + error excerpt and the loop repeats, up to
+        *max_attempts* times.
+
+    The number of attempts is stored under ``mem["p5_attempts"]`` and one
+    entry per attempt under ``mem["p5_history"]`` (shown in the P6 recap).
+    The whole loop holds `WORKTREE_LOCK`: concurrent runs never write or
+    check the working tree at the same time.
 
     Raises
     ------
@@ -82,11 +206,30 @@ def phase_P5_loop_until_clean(max_attempts: int = 4) -> None:
         If static checks have not passed after the configured number of
         attempts, signalling a hard failure to the orchestrator.
     """
+    mem = resolve(mem)
+    with WORKTREE_LOCK:
+        _p5_loop(max_attempts, mem)
+
+
+def _p5_loop(max_attempts: int, mem: Memory) -> None:
+    history: list = []
     for attempt in range(1, max_attempts + 1):
-        code_writer_agent.run()           # P5  – generate / patch code
-        if static_checker_agent.run():    # D1 – inline import & lint
+        if attempt > 1:
+            try:
+                self_refine_agent.run(mem=mem)  # rewrite tasks from the failure
+            except RuntimeError as exc:
+                _LOG.warning("[P5/D1] self-refine failed (%s) – retrying with old tasks", exc)
+        if _CFG.P5_SPECULATIVE:
+            code_writer_agent.run_speculative(mem=mem)  # P5 – race candidates
+        else:
+            code_writer_agent.run(mem=mem)     # P5  – generate / patch code
+        passed = static_checker_agent.run(mem=mem)  # D1 – inline import & lint
+        error = "" if passed else error_excerpt(mem.get("lint_error") or "", max_lines=1)
+        history.append({"attempt": attempt, "passed": passed, "error": error})
+        mem.put("p5_attempts", attempt)
+        mem.put("p5_history", history)
+        if passed:
             return                        # good to proceed
-        # Otherwise, let the next iteration try to self-refine
     raise RuntimeError(
         f"[P5/D1] Static check never passed after {max_attempts} attempts."
     )
@@ -99,6 +242,7 @@ def phase_P5_loop_until_clean(max_attempts: int = 4) -> None:
 PHASES: "OrderedDict[str, Callable[..., Any]]" = OrderedDict(
     [
         ("Z",  phase_Z),                       # deterministic tree extractor
+        ("S",  phase_S),                       # deterministic symbol index
         ("P0", phase_P0),                      # attach prompt + tree
         ("P1", request_parser_agent.run),      # constraint / intent extraction
         ("P2", architecture_lookup_agent.run), # architecture recall
@@ -106,17 +250,69 @@ PHASES: "OrderedDict[str, Callable[..., Any]]" = OrderedDict(
         ("P4", feature_instantiation_agent.run),  # feature design
         ("P5", phase_P5_loop_until_clean),     # code gen + self-check loop
         ("P6", doc_assembler_agent.run),       # recap / re-enumeration
-        # OUT is implicit: run_all() returns MEM["final_answer"]
+        # OUT is implicit: run_all() returns mem["final_answer"]
     ]
 )
 
+# Memory keys each phase reads / writes; the scheduler derives the
+# dependencies from these (see `tools.phase_graph`).  `token_usage` is only
+# merged via `Memory.update` and therefore not listed.
+PHASE_IO: Dict[str, tuple] = {
+    "Z":  ((), ("zip_path", "tree")),
+    "S":  ((), ("symbol_index",)),
+    "P0": ((), ("user_prompt",)),
+    "P1": (("user_prompt", "tree"), ("constraints",)),
+    "P2": (("user_prompt", "tree", "zip_path", "symbol_index"), ("architecture_snippets",)),
+    "P3": (
+        ("constraints", "tree", "architecture_snippets", "symbol_index", "user_prompt"),
+        ("tasks",),
+    ),
+    "P4": (("constraints", "tasks"), ("feature_spec",)),
+    "P5": (
+        ("feature_spec", "constraints", "tasks", "symbol_index", "user_prompt"),
+        (
+            "tasks", "patch_summary", "latest_diff", "changed_files", "changed_sources",
+            "p5_created", "p5_attempts", "p5_history", "p5_candidates",
+            "lint_error", "d1_scope", "d1_diagnostics", "d1_state",
+        ),
+    ),
+    "P6": (
+        ("constraints", "feature_spec", "patch_summary", "p5_attempts", "p5_history",
+         "p5_candidates"),
+        ("final_answer",),
+    ),
+}
+
+# Phases whose outputs are checkpointed.  P5 writes to the project tree and
+# P6 summarises it, so both always run.
+CHECKPOINT_PHASES = ("Z", "S", "P0", "P1", "P2", "P3", "P4")
+
+# Memory values that are not plain JSON: (encode, decode).
+CHECKPOINT_CODECS = {"symbol_index": (SymbolIndex.to_dict, SymbolIndex.from_dict)}
+
+# Awaitable twins of the synchronous phase callables above.  `arun_all()`
+# awaits these directly and runs any other phase in a worker thread.
+ASYNC_TWINS: Dict[Callable[..., Any], Callable[..., Awaitable[Any]]] = {
+    request_parser_agent.run: request_parser_agent.arun,
+    task_planner_agent.run: task_planner_agent.arun,
+    feature_instantiation_agent.run: feature_instantiation_agent.arun,
+}
+
+
 # ────────────────────────────────────────────────────────────────────────────
 # Public orchestrator helper
 # ────────────────────────────────────────────────────────────────────────────
-def run_all(zip_path: str, user_prompt: str) -> str:
+def run_all(
+    zip_path: str,
+    user_prompt: str,
+    mem: Memory | None = None,
+    run_id: str | None = None,
+) -> str:
     """
-    Execute every workflow phase in the declared order and return the
-    final, human-readable recap stored under ``MEM["final_answer"]``.
+    Execute every workflow phase – dependencies first, independent phases
+    concurrently – and return the final, human-readable recap stored under
+    ``mem["final_answer"]``.  The per-phase timings and the critical path
+    are left in ``mem["timing_report"]``.
 
     Parameters
     ----------
@@ -124,19 +320,182 @@ def run_all(zip_path: str, user_prompt: str) -> str:
         Path to the codebase archive to refactor.
     user_prompt : str
         Natural-language instructions from the user.
+    mem : Memory, optional
+        Blackboard for this run; a fresh one is created when omitted.
+        Pass your own to inspect intermediate results afterwards.
+    run_id : str, optional
+        Checkpoint id of an earlier run to resume; a new id is minted when
+        omitted.  Either way it is left in ``mem["run_id"]``.
 
     Returns
     -------
     str
         Markdown recap produced by ``doc_assembler_agent`` in phase P6.
     """
-    for phase_id, func in PHASES.items():
-        # Functions have varying signatures; dispatch on phase key.
+    mem = mem if mem is not None else Memory()
+    phases = dict(PHASES)  # snapshot: specs and callables must agree
+    store = _checkpoint_store(run_id, zip_path, user_prompt, mem)
+    extras = _CheckpointExtras(zip_path, user_prompt)
+
+    def call(spec: PhaseSpec) -> None:
+        key = _checkpoint_key(store, spec, mem, extras)
+        if key is not None and store.restore(spec.id, key, mem):
+            return
+        try:
+            phases[spec.id](*_phase_args(spec.id, zip_path, user_prompt), mem=mem)
+        finally:
+            _record_created(store, mem)
+        if key is not None:
+            store.save(spec.id, key, {k: mem.get(k) for k in spec.writes})
+
+    with use_memory(mem):  # each phase thread starts from a copy of this context
+        report = run_graph(_phase_specs(phases), call, max_workers=_CFG.PHASE_WORKERS)
+    mem.put("timing_report", report)
+
+    return mem.get("final_answer")
+
+
+async def arun_all(
+    zip_path: str,
+    user_prompt: str,
+    mem: Memory | None = None,
+    run_id: str | None = None,
+) -> str:
+    """
+    Coroutine version of :func:`run_all` (same parameters and result).
+
+    Phases listed in ``ASYNC_TWINS`` are awaited natively; the rest
+    (zip scan, retrieval, code writing, static checks) are CPU / subprocess
+    bound and run via ``asyncio.to_thread`` so the event loop never blocks.
+    Independent phases are in flight at the same time, as in `run_all`.
+    """
+    mem = mem if mem is not None else Memory()
+    phases = dict(PHASES)
+    store = _checkpoint_store(run_id, zip_path, user_prompt, mem)
+    extras = _CheckpointExtras(zip_path, user_prompt)
+
+    async def acall(spec: PhaseSpec) -> None:
+        key = await asyncio.to_thread(_checkpoint_key, store, spec, mem, extras)
+        if key is not None and await asyncio.to_thread(store.restore, spec.id, key, mem):
+            return
+        func = phases[spec.id]
+        args = _phase_args(spec.id, zip_path, user_prompt)
+        twin = ASYNC_TWINS.get(func)
+        try:
+            if twin is not None:
+                await twin(*args, mem=mem)
+            else:
+                await asyncio.to_thread(func, *args, mem=mem)
+        finally:
+            await asyncio.to_thread(_record_created, store, mem)
+        if key is not None:
+            outputs = {k: mem.get(k) for k in spec.writes}
+            await asyncio.to_thread(store.save, spec.id, key, outputs)
+
+    with use_memory(mem):  # tasks and to_thread copy the context
+        report = await arun_graph(
+            _phase_specs(phases), acall, max_workers=_CFG.PHASE_WORKERS
+        )
+    mem.put("timing_report", report)
+
+    return mem.get("final_answer")
+
+
+def resume_inputs(run_id: str) -> Dict[str, Any] | None:
+    """``{"zip_path", "user_prompt"}`` recorded for `run_id`, or ``None`` if unknown."""
+    if _CFG.CHECKPOINT_DIR is None:
+        return None
+    manifest = CheckpointStore.load_manifest(_CFG.CHECKPOINT_DIR, run_id)
+    return manifest["inputs"] if manifest else None
+
+
+def _checkpoint_store(
+    run_id: str | None, zip_path: str, user_prompt: str, mem: Memory
+) -> CheckpointStore | None:
+    """Open (or start) the run's checkpoints; ``None`` when disabled."""
+    if _CFG.CHECKPOINT_DIR is None:
+        return None
+    store = CheckpointStore(_CFG.CHECKPOINT_DIR, run_id or new_run_id(), CHECKPOINT_CODECS)
+    try:
+        store.set_inputs(zip_path=zip_path, user_prompt=user_prompt)
+    except OSError as exc:
+        _LOG.warning("checkpoints disabled for this run: %s", exc)
+        return None
+    prune_runs(_CFG.CHECKPOINT_DIR, _CFG.CHECKPOINT_MAX_RUNS)  # this run was just written
+    mem.put("run_id", store.run_id)
+    if store.created:
+        mem.put("p5_created", store.created)
+    return store
+
+
+def _record_created(store: CheckpointStore | None, mem: Memory) -> None:
+    """Persist ``mem["p5_created"]`` so a resumed run still owns those files."""
+    if store is None or not mem.get("p5_created"):
+        return
+    try:
+        store.add_created(mem.get("p5_created"))
+    except OSError as exc:
+        _LOG.warning("could not record created files for run %s: %s", store.run_id, exc)
+
+
+class _CheckpointExtras:
+    """Phase inputs that do not live in memory, computed at most once per run."""
+
+    def __init__(self, zip_path: str, user_prompt: str):
+        self.zip_path = zip_path
+        self.user_prompt = user_prompt
+        self._archive: str | None = None
+
+    def archive(self) -> str:
+        if self._archive is None:
+            try:
+                self._archive = archive_fingerprint(self.zip_path)
+            except (OSError, ValueError):  # missing / corrupt: Z will report it
+                self._archive = ""
+        return self._archive
+
+    def __call__(self, phase_id: str) -> str:
         if phase_id == "Z":
-            func(zip_path)
-        elif phase_id == "P0":
-            func(user_prompt)
+            return repr((
+                self.zip_path, self.archive(), _CFG.PREVIEW_BYTES, _CFG.TREE_MAX_LINES,
+                _CFG.TREE_MAX_TOKENS, _CFG.TREE_RENDER, _CFG.TREE_COLLAPSE_THRESHOLD,
+            ))
+        if phase_id == "S":
+            return self.archive()
+        if phase_id == "P0":
+            return self.user_prompt
+        return repr((
+            _CFG.DEFAULT_LLM_MODEL_ID, _CFG.LLM_TEMPERATURE, _CFG.PROMPT_TOKEN_BUDGET,
+            _CFG.P2_RETRIEVER, _CFG.CHUNK_TOKENS, _CFG.CHUNK_OVERLAP_TOKENS,
+            _CFG.SYMBOL_PROMPT_K,
+        ))
+
+
+def _checkpoint_key(
+    store: CheckpointStore | None, spec: PhaseSpec, mem: Memory, extras: _CheckpointExtras
+) -> str | None:
+    """The phase's checkpoint key, or ``None`` if it is not checkpointed."""
+    if store is None or spec.id not in CHECKPOINT_PHASES or spec.reads is None:
+        return None
+    return store.phase_key(spec.id, spec.reads, mem, extras(spec.id))
+
+
+def _phase_specs(phases: Dict[str, Callable[..., Any]]) -> list:
+    """`PhaseSpec`s in `PHASES` order; phases missing from `PHASE_IO` are barriers."""
+    specs = []
+    for phase_id in phases:
+        io = PHASE_IO.get(phase_id)
+        if io is None:
+            specs.append(PhaseSpec(phase_id))
         else:
-            func()  # remaining phases take no positional args
+            specs.append(PhaseSpec(phase_id, frozenset(io[0]), frozenset(io[1])))
+    return specs
+
 
-    return MEM.get("final_answer")
+def _phase_args(phase_id: str, zip_path: str, user_prompt: str) -> tuple:
+    """Functions have varying signatures; dispatch on phase key."""
+    if phase_id in ("Z", "S"):
+        return (zip_path,)
+    if phase_id == "P0":
+        return (user_prompt,)
+    return ()  # remaining phases take only `mem`
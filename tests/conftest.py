@@ -0,0 +1,11 @@
+# tests/conftest.py
+
+# The application modules import each other as top-level packages
+# (`from memory import MEM`, `from tools.file_scanner import scan_zip`), so
+# make `src/` importable the same way the CLI does.
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
@@ -0,0 +1,63 @@
+from tools.ast_checker import check_source, module_globals
+
+MODULES = {
+    "pkg": set(),
+    "pkg.util": {"helper", "CONST"},
+    "pkg.plugins": None,  # exports unknown
+}
+
+
+def _codes(source, **kw):
+    return [(d.line, d.code) for d in check_source(source, "pkg/new.py", **kw)]
+
+
+def test_syntax_errors_are_located():
+    [diag] = check_source("x = 1\nreturn x\n", "a.py")
+    assert (diag.line, diag.code) == (2, "syntax")
+    assert str(diag).startswith("a.py:2:")
+
+
+def test_undefined_names_respect_scopes():
+    source = (
+        "import os\n"
+        "class A:\n"
+        "    attr = 1\n"
+        "    def f(self):\n"
+        "        global LATE\n"
+        "        LATE = os.sep\n"
+        "        return attr + missing + len([i for i in range(2)])\n"
+        "def g():\n"
+        "    return LATE, A, later\n"
+        "later = 1\n"
+    )
+    assert _codes(source) == [(7, "undefined-name"), (7, "undefined-name")]
+    assert {d.message.split("'")[1] for d in check_source(source, "a.py")} == {"attr", "missing"}
+    assert _codes("from os.path import *\nprint(anything)\n") == []
+
+
+def test_local_imports_are_resolved_against_the_index():
+    source = (
+        "import json\n"
+        "from pkg.util import helper, gone\n"
+        "from . import util, nothing_here\n"
+        "from pkg.plugins import whatever\n"
+        "import pkg.absent\n"
+        "try:\n"
+        "    from pkg.optional import thing\n"
+        "except ImportError:\n"
+        "    thing = None\n"
+    )
+    found = check_source(source, "pkg/new.py", module="pkg.new", modules=MODULES, names=False)
+    assert [(d.line, d.message) for d in found] == [
+        (2, "cannot import name 'gone' from 'pkg.util'"),
+        (3, "cannot import name 'nothing_here' from 'pkg'"),
+        (5, "no local module named 'pkg.absent'"),
+    ]
+
+
+def test_module_globals():
+    assert module_globals("import os\nfrom a import b as c\ndef f():\n    global g\n    g = 1\nclass K: pass\n") == {
+        "os", "c", "f", "g", "K"
+    }
+    assert module_globals("from x import *\n") is None
+    assert module_globals("def __getattr__(name): ...\n") is None
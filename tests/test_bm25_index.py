@@ -0,0 +1,22 @@
+from tools.bm25_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("OrderRepository.get_by_id") == [
+        "orderrepository", "order", "repository", "get_by_id", "get", "id",
+    ]
+
+
+def test_bm25_ranks_matching_rows_only():
+    index = BM25Index([
+        "orders are stored through the repository layer",
+        "logo colours and branding",
+        "class OrderRepository: load and save orders",
+    ])
+    assert index.top_k("order repository", 5) == [2, 0]
+    assert index.top_k("branding", 5) == [1]
+    assert index.top_k("unknown words", 5) == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], 2) == ["a", "c"]
@@ -0,0 +1,87 @@
+import os
+
+from memory import Memory
+from tools.checkpoint import CheckpointStore, new_run_id, prune_runs
+
+
+class Boxed:
+    def __init__(self, items):
+        self.items = items
+
+    def to_dict(self):
+        return {"items": self.items}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["items"])
+
+
+CODECS = {"box": (Boxed.to_dict, Boxed.from_dict)}
+
+
+def _run(store, mem, prompt, calls):
+    """Two chained phases: P1 reads user_prompt, P2 reads constraints."""
+    mem.put("user_prompt", prompt)
+    for pid, reads, writes, produce in (
+        ("P1", ["user_prompt"], ["constraints"], lambda: {"goal": mem.get("user_prompt").upper()}),
+        ("P2", ["constraints"], ["box"], lambda: Boxed([mem.get("constraints")["goal"]])),
+    ):
+        key = store.phase_key(pid, reads, mem)
+        if store.restore(pid, key, mem):
+            continue
+        calls.append(pid)
+        mem.put(writes[0], produce())
+        assert store.save(pid, key, {writes[0]: mem.get(writes[0])})
+
+
+def test_resume_restores_unchanged_phases(tmp_path):
+    run_id = new_run_id()
+    calls = []
+    _run(CheckpointStore(tmp_path, run_id, CODECS), Memory(), "add tracing", calls)
+    assert calls == ["P1", "P2"]
+
+    calls.clear()
+    mem = Memory()
+    _run(CheckpointStore(tmp_path, run_id, CODECS), mem, "add tracing", calls)
+    assert calls == []
+    assert mem.get("constraints") == {"goal": "ADD TRACING"}
+    assert isinstance(mem.get("box"), Boxed) and mem.get("box").items == ["ADD TRACING"]
+
+
+def test_edited_prompt_invalidates_downstream(tmp_path):
+    calls = []
+    _run(CheckpointStore(tmp_path, "r1", CODECS), Memory(), "add tracing", calls)
+    calls.clear()
+    mem = Memory()
+    _run(CheckpointStore(tmp_path, "r1", CODECS), mem, "add metrics", calls)
+    assert calls == ["P1", "P2"]
+    assert mem.get("box").items == ["ADD METRICS"]
+
+
+def test_inputs_and_unserialisable_outputs(tmp_path):
+    store = CheckpointStore(tmp_path, "r2")
+    store.set_inputs(zip_path="a.zip", user_prompt="p")
+    assert CheckpointStore.load_manifest(tmp_path, "r2")["inputs"]["zip_path"] == "a.zip"
+    assert CheckpointStore.load_manifest(tmp_path, "missing") is None
+
+    assert not store.save("P1", "k", {"obj": object()})
+    assert not store.restore("P1", "k", Memory())
+
+
+def test_created_files_survive_a_new_store(tmp_path):
+    CheckpointStore(tmp_path, "r3").add_created(["/p/b.py", "/p/a.py"])
+    store = CheckpointStore(tmp_path, "r3")
+    assert store.created == ["/p/a.py", "/p/b.py"]
+    store.add_created(["/p/a.py"])
+    assert CheckpointStore.load_manifest(tmp_path, "r3")["created"] == ["/p/a.py", "/p/b.py"]
+
+
+def test_prune_runs_keeps_most_recent(tmp_path):
+    for i, run_id in enumerate(["old", "mid", "new"]):
+        CheckpointStore(tmp_path, run_id).set_inputs(user_prompt=run_id)
+        os.utime(tmp_path / run_id / "manifest.json", (1000 + i, 1000 + i))
+    (tmp_path / "not-a-run").mkdir()
+
+    assert prune_runs(tmp_path, keep=2) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["mid", "new", "not-a-run"]
+    assert prune_runs(tmp_path / "missing", keep=1) == 0
@@ -0,0 +1,65 @@
+from tools.chunker import chunk_document, chunk_id
+from tools.token_budget import count_tokens
+
+MARKDOWN = """# Guide
+
+An introduction that is long enough to form a chunk of its own here.
+
+## Install
+
+Run the installer with the following command, it needs network access:
+
+```bash
+pip install foo
+
+# not a heading
+foo --init
+```
+"""
+
+RST = """Usage
+=====
+
+Start the service with the example below, it listens on port 8080::
+
+    serve --port 8080
+
+    serve --debug
+
+Options
+-------
+
+The configuration file is read from the current directory by default.
+"""
+
+
+def test_markdown_sections_and_fences():
+    chunks = chunk_document("README.md", MARKDOWN, max_tokens=200, min_tokens=5)
+    assert [c.heading for c in chunks] == ["Guide", "Guide › Install"]
+    install = chunks[1].text
+    assert install.startswith("Guide › Install\n\n")
+    assert "pip install foo\n\n# not a heading\nfoo --init\n```" in install
+
+
+def test_rst_sections_keep_literal_blocks():
+    chunks = chunk_document("docs/usage.rst", RST, max_tokens=200, min_tokens=5)
+    assert [c.heading for c in chunks] == ["Usage", "Usage › Options"]
+    assert "8080::\n\n    serve --port 8080\n\n    serve --debug" in chunks[0].text
+
+
+def test_ids_are_stable_content_hashes():
+    first = chunk_document("README.md", MARKDOWN)
+    again = chunk_document("README.md", MARKDOWN)
+    assert [c.id for c in first] == [c.id for c in again]
+    assert all(c.id == chunk_id(c.text) for c in first)
+
+
+def test_window_and_overlap():
+    paras = "\n\n".join(f"Paragraph number {i} talks about topic {i} in some detail." for i in range(40))
+    chunks = chunk_document("notes/doc.md", f"# Big\n\n{paras}", max_tokens=80, overlap_tokens=20)
+    assert len(chunks) > 3
+    body_tokens = [count_tokens(c.text) - count_tokens(c.heading) for c in chunks]
+    assert max(body_tokens) <= 80 + 5
+    # the last paragraph of one chunk opens the next one
+    last_para = chunks[0].text.split("\n\n")[-1]
+    assert chunks[1].text.split("\n\n")[1] == last_para
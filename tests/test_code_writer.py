@@ -0,0 +1,118 @@
+import pathlib
+import threading
+import types
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from agents import code_writer_agent as p5  # noqa: E402
+from memory import Memory  # noqa: E402
+from tools.checkpoint import CheckpointStore  # noqa: E402
+
+
+def _cfg(**overrides):
+    values = dict(
+        LLM_TEMPERATURE=0.0, P5_CANDIDATES=3, P5_MAX_CANDIDATES=8, P5_TEMPERATURE_STEP=0.2
+    )
+    values.update(overrides)
+    return types.SimpleNamespace(**values)
+
+
+@pytest.fixture
+def speculative(monkeypatch):
+    """Fake generator: `behaviour[temperature]` is a diagnostic count, an exception or an Event to wait on."""
+    behaviour, committed = {}, []
+    release = threading.Event()
+
+    def generate(mem, temperature):
+        action = behaviour[temperature]
+        if isinstance(action, BaseException):
+            raise action
+        if isinstance(action, threading.Event):
+            action.wait(5)
+            action = 0
+        return p5.Candidate(pathlib.Path("x.py"), f"# {action}", "", temperature, 1.0)
+
+    def precheck(path, code):
+        return ["diag"] * int(code[2:])
+
+    monkeypatch.setattr(p5, "CodeAssistant", object)
+    monkeypatch.setattr(p5, "_CFG", _cfg())
+    monkeypatch.setattr(p5, "generate_candidate", generate)
+    monkeypatch.setattr(p5.static_checker_agent, "precheck", precheck)
+    monkeypatch.setattr(p5, "commit_candidate", lambda mem, c: committed.append(c.temperature))
+    yield behaviour, committed, release
+    release.set()
+
+
+def test_first_clean_candidate_wins(speculative):
+    behaviour, committed, release = speculative
+    behaviour.update({0.0: release, 0.2: 0, 0.4: 3})  # 0.0 would be clean, but is still running
+    mem = Memory()
+    p5.run_speculative(mem)
+    assert committed == [0.2]
+    assert mem.get("p5_candidates")["rounds"] == 1
+
+
+def test_fewest_diagnostics_wins_when_none_is_clean(speculative):
+    behaviour, committed, _ = speculative
+    behaviour.update({0.0: 4, 0.2: 1, 0.4: 2})
+    mem = Memory()
+    p5.run_speculative(mem)
+    assert committed == [0.2]
+    assert mem.get("p5_candidates") == {"generated": 3, "discarded": 2, "rounds": 1}
+
+
+def test_one_failing_candidate_is_not_fatal_but_all_failing_reraises(speculative):
+    behaviour, committed, _ = speculative
+    behaviour.update({0.0: RuntimeError("unsafe"), 0.2: 2, 0.4: RuntimeError("unsafe")})
+    p5.run_speculative(Memory())
+    assert committed == [0.2]
+
+    behaviour[0.2] = RuntimeError("unsafe")
+    with pytest.raises(RuntimeError, match="unsafe"):
+        p5.run_speculative(Memory())
+    assert committed == [0.2]
+
+
+def test_spent_budget_degrades_to_single_run(speculative, monkeypatch):
+    _, committed, _ = speculative
+    runs = []
+    monkeypatch.setattr(p5, "_CFG", _cfg(P5_MAX_CANDIDATES=4))
+    monkeypatch.setattr(p5, "run", lambda mem: runs.append(mem))
+    mem = Memory()
+    mem.put("p5_candidates", {"generated": 3, "discarded": 2, "rounds": 1})
+
+    p5.run_speculative(mem)
+    assert runs == [mem] and committed == []
+    assert mem.get("p5_candidates") == {"generated": 4, "discarded": 2, "rounds": 2}
+
+
+def test_rerun_after_failed_p5_may_revise_its_own_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(p5, "_generate_new_agent", lambda *a, **k: "# v1\n")
+    monkeypatch.setattr(p5, "_patch_existing_agent", lambda old, *a, **k: ("# v2\n", old))
+    monkeypatch.setattr(p5, "_validate_code_safe", lambda code, name: None)
+    monkeypatch.setattr(p5, "_update_requirements_if_needed", lambda code: None)
+    spec = {"feature_spec": {"className": "Tracer"}, "constraints": {"nonDestructive": True}}
+
+    first = Memory()
+    for key, value in spec.items():
+        first.put(key, value)
+    p5.run(first)  # D1 then fails and the run aborts
+    store = CheckpointStore(tmp_path / "runs", "r1")
+    store.add_created(first.get("p5_created"))
+
+    def rerun(created):
+        mem = Memory()
+        for key, value in spec.items():
+            mem.put(key, value)
+        if created:
+            mem.put("p5_created", created)
+        return p5.generate_candidate(mem)
+
+    with pytest.raises(RuntimeError, match="Refusing to overwrite"):
+        rerun([])
+    candidate = rerun(CheckpointStore(tmp_path / "runs", "r1").created)
+    assert candidate.old_text == "# v1\n" and candidate.code == "# v2\n"
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from tools.collect_worker import CollectWorker, sandbox_env
+
+
+def test_worker_reimports_evicted_modules(tmp_path):
+    (tmp_path / "src").mkdir()
+    (tmp_path / "tests").mkdir()
+    util = tmp_path / "src" / "util.py"
+    util.write_text("X = 1\n")
+    test = tmp_path / "tests" / "test_util.py"
+    test.write_text("from util import X\n\ndef test_x():\n    assert X\n")
+
+    worker = CollectWorker(
+        tmp_path,
+        pythonpath=[str(tmp_path / "src")],
+        watch=[tmp_path / "src", tmp_path / "tests"],
+    )
+    try:
+        first = worker.collect([str(test)])
+        assert first.ok and first.collected == 1 and first.errors == {}
+
+        util.write_text("import missing_dependency_xyz\n")
+        # D1 evicts the changed file plus its importers (here: the test)
+        broken = worker.collect([str(test)], evict=[str(util), str(test)])
+        assert not broken.ok
+        assert list(broken.errors) == ["tests/test_util.py"]
+        assert "missing_dependency_xyz" in broken.errors["tests/test_util.py"]
+
+        util.write_text("X = 22\n")
+        assert worker.collect([str(test)], evict=[str(util), str(test)]).ok
+    finally:
+        worker.close()
+    assert not worker.alive
+
+
+def test_worker_is_sandboxed(tmp_path, monkeypatch):
+    pytest.importorskip("resource")
+    monkeypatch.setenv("WATSONX_API_KEY", "secret")
+    (tmp_path / "tests").mkdir()
+    test = tmp_path / "tests" / "test_env.py"
+    test.write_text(
+        "import os, resource\n"
+        "assert 'WATSONX_API_KEY' not in os.environ\n"
+        "assert os.environ['PYTHONPATH'] == 'extra'\n"
+        "assert resource.getrlimit(resource.RLIMIT_AS)[0] == 2 ** 32\n"
+        "assert resource.getrlimit(resource.RLIMIT_CPU)[0] != resource.RLIM_INFINITY\n"
+        "def test_ok():\n    pass\n"
+    )
+    worker = CollectWorker(
+        tmp_path,
+        pythonpath=["extra"],
+        watch=[tmp_path / "tests"],
+        cpu_seconds=30,
+        memory_bytes=2 ** 32,
+    )
+    try:
+        result = worker.collect([str(test)])
+        assert result.ok, result.errors
+    finally:
+        worker.close()
+
+
+def test_sandbox_env_keeps_only_allowed_variables(monkeypatch):
+    monkeypatch.setenv("PATH", "/bin")
+    monkeypatch.setenv("WATSONX_PROJECT_ID", "p")
+    env = sandbox_env(["a", "b"])
+    assert env["PATH"] == "/bin" and "WATSONX_PROJECT_ID" not in env
+    assert env["PYTHONPATH"] == os.pathsep.join(["a", "b"])
+
+    env = sandbox_env(["a"], {"WATSONX_PROJECT_ID": "placeholder", "PYTHONPATH": "x"})
+    assert env["WATSONX_PROJECT_ID"] == "placeholder" and env["PYTHONPATH"] == "a"
@@ -0,0 +1,49 @@
+from tools.diff_generator import create_patch
+from tools.failure_context import error_excerpt, failing_hunks, failing_lines, parse_hunks
+
+OLD = "".join(f"line{i}\n" for i in range(1, 41))
+NEW = OLD.replace("line5\n", "line5 changed\n").replace("line30\n", "broken(\n")
+
+PYTEST_LOG = """---- pytest collect-only (FAIL) ----
+STDOUT:
+==================================== ERRORS ====================================
+_____________________ ERROR collecting tests/test_demo.py ______________________
+tests/test_demo.py:1: in <module>
+    import agents.demo
+src/agents/demo.py:30: in <module>
+    broken(
+E   SyntaxError: '(' was never closed
+=========================== short test summary info ============================
+ERROR tests/test_demo.py
+"""
+
+
+def test_create_patch_headers_parse():
+    diff = create_patch(OLD, NEW, "src/agents/demo.py")
+    assert diff.splitlines()[:2] == ["--- a/src/agents/demo.py", "+++ b/src/agents/demo.py"]
+    assert [h.new_start for h in parse_hunks(diff)] == [2, 27]
+
+
+def test_failing_hunks_keeps_only_lines_near_the_failure():
+    diff = create_patch(OLD, NEW, "src/agents/demo.py")
+    excerpt = failing_hunks(diff, {30}, context=2)
+    assert excerpt.splitlines() == ["@@ +28 @@", " line28", " line29", "-line30", "+broken(", " line31", " line32"]
+    # nothing usable → head of the first hunk
+    assert failing_hunks(diff, set()).startswith("@@ +2 @@")
+
+
+def test_failing_lines_prefers_diagnostics_then_log():
+    diags = [{"path": "/abs/src/agents/demo.py", "line": 7}, {"path": "/abs/other.py", "line": 1}]
+    assert failing_lines("src/agents/demo.py", PYTEST_LOG, diags) == {7}
+    assert failing_lines("src/agents/demo.py", PYTEST_LOG) == {30}
+
+
+def test_error_excerpt():
+    assert error_excerpt(PYTEST_LOG).splitlines() == [
+        "ERROR collecting tests/test_demo.py",
+        "tests/test_demo.py:1: in <module>",
+        "src/agents/demo.py:30: in <module>",
+        "E   SyntaxError: '(' was never closed",
+    ]
+    diags = "\n".join(f"a.py:{i}:1: undefined-name: name 'x{i}' is not defined" for i in range(30))
+    assert error_excerpt(diags, max_lines=3).splitlines()[-1] == "… (27 more)"
@@ -0,0 +1,122 @@
+# tests/test_file_scanner.py
+
+import zipfile
+
+import pytest
+
+from tools.file_scanner import PARALLEL_MIN_MEMBERS, iter_tree, scan_zip
+
+
+@pytest.fixture
+def sample_zip(tmp_path):
+    """Small archive with text, binary and vendored members."""
+    path = tmp_path / "project.zip"
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("src/app.py", "import os\nprint('hi')\n")
+        zf.writestr("src/util.py", "x" * 500 + "\n")
+        zf.writestr("assets/logo.png", b"\x89PNG\r\n\x1a\n\x00\x00")
+        zf.writestr("node_modules/left-pad/index.js", "module.exports = 1;\n")
+        zf.writestr("docs/", "")
+    return path
+
+
+def test_scan_zip_lists_sorted_files_with_previews(sample_zip):
+    tree = scan_zip(str(sample_zip))
+    lines = tree.splitlines()
+
+    assert lines[0] == "├── assets/logo.png  (10 B)"
+    assert "├── src/app.py  (22 B)" in lines
+    assert "      import os" in lines
+    assert not any(line.startswith("├── docs/") for line in lines)
+
+
+def test_preview_policy_skips_binary_and_vendor(sample_zip):
+    lines = scan_zip(str(sample_zip)).splitlines()
+
+    png = lines.index("├── assets/logo.png  (10 B)")
+    vendored = lines.index("├── node_modules/left-pad/index.js  (20 B)")
+    assert lines[png + 1].startswith("├── ")
+    assert lines[vendored + 1].startswith("├── ")
+
+
+def test_preview_bytes_is_honoured(sample_zip):
+    lines = scan_zip(str(sample_zip), preview_bytes=32).splitlines()
+    util = lines.index("├── src/util.py  (501 B)")
+    assert lines[util + 1].strip() == "x" * 32
+
+
+def test_line_budget_truncates(sample_zip):
+    lines = list(iter_tree(str(sample_zip), max_lines=2))
+    assert lines == [
+        "├── assets/logo.png  (10 B)",
+        "├── node_modules/left-pad/index.js  (20 B)",
+        "… (truncated: 2 more files)",
+    ]
+
+
+def test_tree_cache_roundtrip_and_lru_eviction(sample_zip, tmp_path):
+    from tools.tree_cache import TreeCache, archive_fingerprint
+
+    cache = TreeCache(tmp_path / "cache", max_bytes=2048)
+    key = cache.key(archive_fingerprint(str(sample_zip)), preview_bytes=120)
+    assert cache.get(key) is None
+
+    tree = scan_zip(str(sample_zip))
+    cache.put(key, tree)
+    assert cache.get(key) == tree
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Filling the cache past its budget evicts the oldest entry first.
+    for i in range(4):
+        cache.put(cache.key("other", n=i), "x" * 700)
+    assert cache.get(key) is None
+
+
+def test_compact_render_nests_and_collapses(tmp_path):
+    path = tmp_path / "big.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("src/app.py", "import os\n")
+        zf.writestr("src/deep/only/x.py", "a = 1\n")
+        for i in range(30):
+            zf.writestr(f"data/f{i:02d}.json", "{}\n")
+
+    lines = scan_zip(str(path), render="compact", collapse_threshold=20).splitlines()
+
+    assert lines == [
+        "data/",
+        "    … 30 *.json files, 90 B",
+        "src/",
+        "    ├── app.py  (10 B)",
+        "          import os",
+        "    deep/only/",
+        "        ├── x.py  (6 B)",
+        "              a = 1",
+    ]
+
+
+
+def _large_zip(path, suffix, data):
+    """Enough members to take the process-pool preview path, then one script."""
+    with zipfile.ZipFile(path, "w") as zf:
+        for i in range(PARALLEL_MIN_MEMBERS):
+            zf.writestr(f"assets/{i:05d}{suffix}", data(i))
+        zf.writestr("src/app.py", "import os\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("render", ["flat", "compact"])
+def test_parallel_previews_match_serial(tmp_path, render):
+    path = _large_zip(tmp_path / "notes.zip", ".txt", lambda i: f"note {i}\n")
+    options = dict(render=render, collapse_threshold=PARALLEL_MIN_MEMBERS)
+    serial = scan_zip(path, workers=1, **options)
+    assert scan_zip(path, workers=2, **options) == serial
+    assert "      note 1999" in serial
+
+
+def test_parallel_previews_past_line_budget(tmp_path):
+    # Only the first `max_lines` members are prefetched; the renderer still
+    # previews the next one before the budget check stops it.
+    path = _large_zip(tmp_path / "assets.zip", ".png", lambda i: b"\x89PNG")
+    lines = list(iter_tree(path, max_lines=PARALLEL_MIN_MEMBERS, workers=2))
+    assert lines == list(iter_tree(path, max_lines=PARALLEL_MIN_MEMBERS, workers=1))
+    assert lines[-1] == "… (truncated: 1 more files)"
@@ -0,0 +1,53 @@
+import os
+
+from tools.import_graph import ImportGraph, import_targets
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def test_import_targets_from_import_records_module_and_name():
+    names = import_targets("from . import models\nimport json\n", "shop.orders.repo", False)
+    assert names == {"shop.orders", "shop.orders.models", "json"}
+
+
+def test_affected_and_invalidation(tmp_path):
+    src, tests = tmp_path / "src", tmp_path / "tests"
+    util = _write(src / "pkg" / "util.py", "X = 1\n")
+    _write(src / "pkg" / "__init__.py", "")
+    core = _write(src / "pkg" / "core.py", "from pkg.util import X\n")
+    app = _write(src / "app.py", "from pkg import core\n")
+    other = _write(src / "other.py", "import json\n")
+    test = _write(tests / "test_app.py", "import app\n")
+
+    graph = ImportGraph([src, tests])
+    graph.refresh()
+    assert graph.invalidated  # first build
+
+    graph.refresh()
+    assert not graph.invalidated
+    assert graph.affected([util]) == sorted(p.resolve() for p in (util, core, app, test))
+    assert graph.affected([other]) == [other.resolve()]
+
+    # an edit reported by the caller keeps the graph valid and updates edges
+    _write(other, "import pkg.util\n")
+    os.utime(other, ns=(1, 1))
+    assert graph.refresh(expected=[other]) == {other.resolve()}
+    assert not graph.invalidated
+    assert other.resolve() in graph.affected([util])
+
+    # an expected new file is fine, an unexpected one is not
+    new = _write(src / "new.py", "import app\n")
+    graph.refresh(expected=[new])
+    assert not graph.invalidated
+    assert new.resolve() in graph.affected([app])
+    _write(src / "stray.py", "")
+    graph.refresh()
+    assert graph.invalidated
+
+    (src / "stray.py").unlink()
+    graph.refresh()
+    assert graph.invalidated
@@ -0,0 +1,82 @@
+import pytest
+
+pytest.importorskip("pydantic")
+pytest.importorskip("backoff")
+pytest.importorskip("ibm_watsonx_ai")
+
+import llm  # noqa: E402
+from llm.cache import ResponseCache  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"  # "b" is now the oldest
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["entries"] == 2
+
+
+def test_sqlite_tier_survives_new_instances(tmp_path):
+    db = tmp_path / "llm.sqlite"
+    key = ResponseCache.key("m", 0.0, None, MESSAGES)
+    ResponseCache(max_entries=4, sqlite_path=db).put(key, "hello")
+
+    fresh = ResponseCache(max_entries=4, sqlite_path=db)
+    assert fresh.get(key) == "hello"
+    assert fresh.stats()["disk_hits"] == 1
+    assert fresh.get(key) == "hello"  # now served from the LRU tier
+    assert fresh.stats()["disk_hits"] == 1
+
+
+def test_sampled_calls_bypass_unless_opted_in():
+    assert ResponseCache().cacheable(0.0)
+    assert not ResponseCache().cacheable(0.7)
+    assert ResponseCache(cache_nonzero_temperature=True).cacheable(0.7)
+    assert ResponseCache.key("m", 0.0, None, MESSAGES) != ResponseCache.key("m", 0.7, None, MESSAGES)
+
+
+class _FakeClient:
+    default_model_id = "granite"
+    default_temperature = 0.0
+
+    def __init__(self):
+        self.calls = 0
+
+    def chat(self, messages, **kwargs):
+        self.calls += 1
+        return f"reply {self.calls}"
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    client = _FakeClient()
+    monkeypatch.setattr(llm, "_get_client", lambda: client)
+    monkeypatch.setattr(llm, "_cache", None)
+    monkeypatch.setattr(llm, "_cache_configured", False)
+    return client
+
+
+def test_generate_serves_cache_hits(fake_llm):
+    llm.set_cache(ResponseCache(max_entries=8))
+    assert llm.generate(MESSAGES) == "reply 1"
+    assert llm.generate(MESSAGES) == "reply 1"
+    assert fake_llm.calls == 1
+    assert llm.cache_stats()["hits"] == 1
+
+    # a sampled call goes to the model every time
+    assert llm.generate(MESSAGES, temperature=0.9) == "reply 2"
+    assert llm.generate(MESSAGES, temperature=0.9) == "reply 3"
+
+
+def test_blank_cache_path_means_memory_only(monkeypatch):
+    from config import Settings
+
+    monkeypatch.setenv("WATSONX_API_KEY", "k")
+    monkeypatch.setenv("WATSONX_PROJECT_ID", "p")
+    monkeypatch.setenv("LLM_CACHE_PATH", "")
+    assert Settings().LLM_CACHE_PATH is None
@@ -0,0 +1,37 @@
+import threading
+
+from memory import MEM, Memory, current, resolve, use_memory
+
+
+def test_mem_routes_to_each_threads_own_memory():
+    mems = {name: Memory() for name in ("a", "b")}
+    barrier = threading.Barrier(2)
+    seen = {}
+
+    def run(name):
+        with use_memory(mems[name]):
+            MEM.put("owner", name)
+            barrier.wait()  # both runs have written before either reads
+            MEM.update("count", lambda n: (n or 0) + 1)
+            seen[name] = (MEM.get("owner"), current() is mems[name])
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in mems]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert seen == {"a": ("a", True), "b": ("b", True)}
+    assert mems["a"].as_dict() == {"owner": "a", "count": 1}
+    assert mems["b"].as_dict() == {"owner": "b", "count": 1}
+
+
+def test_use_memory_restores_previous_and_resolve_prefers_explicit():
+    outer, inner = Memory(), Memory()
+    before = current()
+    with use_memory(outer):
+        with use_memory(inner):
+            assert resolve(None) is inner
+            assert resolve(outer) is outer
+        assert current() is outer
+    assert current() is before
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from tools.phase_graph import PhaseSpec, arun_graph, critical_path, dependencies, run_graph
+
+F = frozenset
+SPECS = [
+    PhaseSpec("Z", F(), F({"tree"})),
+    PhaseSpec("S", F(), F({"symbols"})),
+    PhaseSpec("P1", F({"tree"}), F({"constraints"})),
+    PhaseSpec("P2", F({"tree", "symbols"}), F({"snippets"})),
+    PhaseSpec("P3", F({"constraints", "snippets"}), F({"tasks"})),
+]
+SLEEP = {"Z": 0.05, "S": 0.05, "P1": 0.2, "P2": 0.1, "P3": 0.05}
+
+
+def test_dependencies_from_reads_and_writes():
+    assert dependencies(SPECS) == {
+        "Z": set(), "S": set(), "P1": {"Z"}, "P2": {"Z", "S"}, "P3": {"P1", "P2"},
+    }
+    # an undeclared phase is a barrier
+    deps = dependencies(SPECS[:2] + [PhaseSpec("X")] + SPECS[2:3])
+    assert deps["X"] == {"Z", "S"} and deps["P1"] == {"Z", "X"}
+
+
+def test_critical_path():
+    deps = dependencies(SPECS)
+    assert critical_path(deps, SLEEP) == ["Z", "P1", "P3"]
+
+
+def test_run_graph_overlaps_independent_phases():
+    seen = []
+    lock = threading.Lock()
+
+    def call(spec):
+        with lock:
+            seen.append(spec.id)
+        time.sleep(SLEEP[spec.id])
+
+    report = run_graph(SPECS, call, max_workers=4)
+    assert seen.index("P3") == 4
+    assert report["critical_path"] == ["Z", "P1", "P3"]
+    assert report["wall_s"] < report["serial_s"] - 0.1
+    assert report["phases"]["P2"]["start_s"] < report["phases"]["P1"]["end_s"]
+
+
+def test_run_graph_stops_after_a_failure():
+    ran = []
+
+    def call(spec):
+        ran.append(spec.id)
+        if spec.id == "P1":
+            raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        run_graph(SPECS, call, max_workers=1)
+    assert "P3" not in ran
+
+
+def test_arun_graph():
+    async def acall(spec):
+        await asyncio.sleep(SLEEP[spec.id])
+
+    report = asyncio.run(arun_graph(SPECS, acall))
+    assert report["critical_path"] == ["Z", "P1", "P3"]
+    assert report["wall_s"] < report["serial_s"]
@@ -0,0 +1,122 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from agents import static_checker_agent as d1  # noqa: E402
+from memory import Memory  # noqa: E402
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    src, tests = tmp_path / "src", tmp_path / "tests"
+    (src / "pkg").mkdir(parents=True)
+    tests.mkdir()
+    (src / "pkg" / "__init__.py").write_text("")
+    (src / "pkg" / "core.py").write_text("def f():\n    return 1\n")
+    (src / "pkg" / "app.py").write_text("from pkg.core import f\n\nVALUE = f()\n")
+    (src / "pkg" / "other.py").write_text("X = 1\n")
+    (tests / "test_app.py").write_text("from pkg.app import VALUE\n")
+    monkeypatch.setattr(d1, "SRC_DIR", src)
+    monkeypatch.setattr(d1, "TESTS_DIR", tests)
+    monkeypatch.setattr(d1, "_GRAPH", None)
+
+    collects = []
+
+    def fake_collect(paths=None, evict=None):
+        collects.append(None if paths is None else sorted(p.name for p in paths))
+        return True, "collected", []
+
+    monkeypatch.setattr(d1, "_collect", fake_collect)
+    return src, collects
+
+
+def _write(mem, path, code):
+    path.write_text(code)
+    mem.put("changed_files", [str(path.resolve())])
+
+
+def test_retry_after_failed_full_check_is_incremental(project):
+    src, collects = project
+    mem = Memory()
+
+    _write(mem, src / "pkg" / "core.py", "def f(:\n")
+    assert not d1.run(mem)
+    assert mem.get("d1_scope") == {"mode": "full"}
+    assert mem.get("d1_state")["pending"] == [str((src / "pkg" / "core.py").resolve())]
+    assert collects == []
+
+    # P5 touched another file; the broken one is still re-checked
+    _write(mem, src / "pkg" / "other.py", "X = 2\n")
+    assert not d1.run(mem)
+    assert mem.get("d1_scope")["mode"] == "incremental"
+    assert mem.get("d1_scope")["files"] == 4  # other, core, app, test_app
+
+    # fixed: compiles, then the whole suite is collected once
+    _write(mem, src / "pkg" / "core.py", "def f():\n    return 2\n")
+    assert d1.run(mem)
+    assert collects == [None]
+    assert mem.get("d1_state") == {"baseline": True, "collected": True, "pending": []}
+
+    # from now on only affected tests are collected
+    _write(mem, src / "pkg" / "app.py", "from pkg.core import f\n\nVALUE = f() + 1\n")
+    assert d1.run(mem)
+    assert collects == [None, ["test_app.py"]]
+
+
+def test_each_run_starts_from_its_own_baseline(project):
+    src, _ = project
+    first = Memory()
+    _write(first, src / "pkg" / "other.py", "X = 3\n")
+    assert d1.run(first)
+
+    second = Memory()
+    _write(second, src / "pkg" / "other.py", "X = 4\n")
+    assert d1.run(second)
+    assert second.get("d1_scope") == {"mode": "full"}
+
+
+def test_unattributed_collection_failure_forces_full_check(project, monkeypatch):
+    src, _ = project
+    monkeypatch.setattr(d1, "_collect", lambda paths=None, evict=None: (False, "boom", None))
+    mem = Memory()
+    _write(mem, src / "pkg" / "other.py", "X = 5\n")
+    assert not d1.run(mem)
+    assert mem.get("d1_state")["baseline"] is False
+
+    assert not d1.run(mem)
+    assert mem.get("d1_scope") == {"mode": "full"}
+
+
+def test_precheck_checks_an_unwritten_buffer(project):
+    src, _ = project
+    target = src / "pkg" / "new.py"
+    assert d1.precheck(target, "from pkg.core import f\n\nY = f()\n") == []
+
+    codes = {d.code for d in d1.precheck(target, "from pkg.nope import g\n\nY = h()\n")}
+    assert codes == {"unresolved-import", "undefined-name"}
+    assert [d.code for d in d1.precheck(target, "def f(:\n")] == ["syntax"]
+    assert not target.exists()
+
+
+def test_collection_builds_settings_without_the_parent_credentials(tmp_path, monkeypatch):
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_cfg.py").write_text(
+        "import os\n"
+        "from config import Settings\n"
+        "assert os.environ['WATSONX_API_KEY'] != 'real-secret'\n"
+        "CFG = Settings()\n"
+        "def test_cfg():\n    assert CFG.WATSONX_PROJECT_ID\n"
+    )
+    monkeypatch.setenv("WATSONX_API_KEY", "real-secret")
+    monkeypatch.setenv("WATSONX_PROJECT_ID", "real-project")
+    monkeypatch.chdir(d1.SRC_DIR)  # the worker's PYTHONPATH, as in the CLI
+    monkeypatch.setattr(d1, "SRC_DIR", tmp_path / "src")
+    monkeypatch.setattr(d1, "TESTS_DIR", tmp_path / "tests")
+    monkeypatch.setattr(d1, "_WORKER", None)
+    try:
+        ok, log, failed = d1._collect()
+    finally:
+        if d1._WORKER is not None:
+            d1._WORKER.close()
+    assert ok, log
+    assert failed == []
@@ -0,0 +1,85 @@
+import zipfile
+
+import pytest
+
+from tools.symbol_index import SymbolCache, SymbolIndex, build_symbol_index, parse_module
+
+SOURCE = '''"""Order persistence."""
+from . import models
+from ..core.db import Session
+import json
+
+
+class OrderRepository(BaseRepo):
+    """Loads and saves orders."""
+
+    def get_by_id(self, order_id: int) -> "Order":
+        """Fetch one order."""
+
+    async def export_csv(self, path):
+        pass
+
+
+def helper(x=1, *args):
+    pass
+'''
+
+
+def test_parse_module_symbols_and_imports():
+    info = parse_module("shop/orders/repo.py", SOURCE)
+    assert info.module == "shop.orders.repo"
+    assert info.doc == "Order persistence."
+    assert info.imports == ["json", "shop.core.db", "shop.orders.models"]
+    assert [(s.kind, s.qualname, s.signature) for s in info.symbols] == [
+        ("class", "OrderRepository", "(BaseRepo)"),
+        ("def", "OrderRepository.get_by_id", "(self, order_id: int) -> 'Order'"),
+        ("async def", "OrderRepository.export_csv", "(self, path)"),
+        ("def", "helper", "(x=1, *args)"),
+    ]
+    assert parse_module("bad.py", "def (:").error.startswith("SyntaxError")
+
+
+def test_build_uses_per_file_cache_and_ranks(tmp_path):
+    archive = tmp_path / "proj.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("shop/orders/repo.py", SOURCE)
+        zf.writestr("shop/branding.py", "def logo_colour():\n    '''Brand colour.'''\n")
+        zf.writestr("node_modules/x.py", "def vendored(): pass\n")
+
+    cache = SymbolCache(tmp_path / "symbols.sqlite")
+    index = build_symbol_index(str(archive), cache=cache)
+    assert sorted(index.modules) == ["shop/branding.py", "shop/orders/repo.py"]
+
+    again = build_symbol_index(str(archive), cache=SymbolCache(tmp_path / "symbols.sqlite"))
+    assert again.to_dict() == index.to_dict()
+
+    best = again.rank("export orders to csv", k=2)
+    assert best[0][1].qualname == "OrderRepository.export_csv"
+    rendered = SymbolIndex.render(best)
+    assert rendered.splitlines()[0] == "shop/orders/repo.py – Order persistence."
+    assert SymbolIndex.from_dict(again.to_dict()).to_dict() == again.to_dict()
+
+
+def test_cached_relative_imports_follow_the_member_path(tmp_path):
+    # Identical content at two paths shares one cache entry; its relative
+    # imports must still resolve against each path.
+    path = tmp_path / "twins.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        for pkg in ("shop", "blog"):
+            zf.writestr(f"{pkg}/__init__.py", "from .models import Thing\n")
+            zf.writestr(f"{pkg}/models.py", "class Thing:\n    pass\n")
+    cache = SymbolCache()
+    for _ in range(2):  # cold, then warm cache
+        index = build_symbol_index(str(path), cache=cache)
+        assert index.modules["shop/__init__.py"].imports == ["shop.models"]
+        assert index.modules["blog/__init__.py"].imports == ["blog.models"]
+
+
+def test_blank_symbol_cache_path_means_in_process(monkeypatch):
+    pytest.importorskip("pydantic")
+    from config import Settings
+
+    monkeypatch.setenv("WATSONX_API_KEY", "k")
+    monkeypatch.setenv("WATSONX_PROJECT_ID", "p")
+    monkeypatch.setenv("SYMBOL_CACHE_PATH", " ")
+    assert Settings().SYMBOL_CACHE_PATH is None
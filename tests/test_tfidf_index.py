@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+pytest.importorskip("sklearn")
+
+from tools.tfidf_index import TfidfIndex, prune_indexes  # noqa: E402
+
+CHUNKS = [
+    ("a", "The repository layer wraps every database query in a unit of work."),
+    ("b", "Logos and brand colours live in the assets folder."),
+    ("c", "HTTP handlers validate payloads with pydantic before calling services."),
+]
+
+
+def test_sync_is_incremental_and_persisted(tmp_path):
+    index = TfidfIndex(tmp_path)
+    assert index.sync(CHUNKS) == (3, 0)
+    assert index.sync(CHUNKS) == (0, 0)
+    assert index.top_k("database query", 1) == ["a"]
+
+    reopened = TfidfIndex(tmp_path)
+    assert reopened.ids == ["a", "b", "c"]
+    assert reopened.sync(CHUNKS[1:] + [("d", "Database migrations run with alembic.")]) == (1, 1)
+    assert reopened.top_k("database migrations", 1) == ["d"]
+    assert "a" not in TfidfIndex(tmp_path).ids
+
+
+def test_top_k_handles_empty_and_small_corpora():
+    index = TfidfIndex()
+    assert index.top_k("anything", 3) == []
+    index.sync(CHUNKS[:2])
+    assert sorted(index.top_k("brand colours", 5)) == ["a", "b"]
+    assert index.top_k("brand colours", 5)[0] == "b"
+
+
+def test_search_syncs_a_reuploaded_corpus(tmp_path):
+    index = TfidfIndex(tmp_path / "zip-shop.zip")
+    assert index.search(CHUNKS, "database query", 1) == ["a"]
+    # Same project re-uploaded with one chunk edited: only the diff is applied.
+    edited = CHUNKS[:2] + [("c2", "HTTP handlers validate payloads with marshmallow.")]
+    reopened = TfidfIndex(tmp_path / "zip-shop.zip")
+    assert reopened.search(edited, "marshmallow payloads", 1) == ["c2"]
+    assert reopened.sync(edited) == (0, 0)
+
+
+def test_prune_keeps_most_recently_used(tmp_path):
+    for age, name in enumerate(["new", "mid", "old"]):
+        (tmp_path / name).mkdir()
+        os.utime(tmp_path / name, (1000 - age, 1000 - age))
+    assert prune_indexes(tmp_path, keep=2) == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["mid", "new"]
+    assert prune_indexes(tmp_path / "missing", keep=1) == 0
+
+
+def test_uploads_with_the_same_name_get_their_own_corpus(tmp_path):
+    pytest.importorskip("pydantic")
+    import zipfile
+
+    from agents.architecture_lookup_agent import _corpus_name
+    from tools.tree_cache import archive_fingerprint
+
+    names = []
+    for project, text in (("shop", "# Shop"), ("blog", "# Blog"), ("shop-again", "# Shop")):
+        path = tmp_path / project / "project.zip"
+        path.parent.mkdir()
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr("README.md", text)
+        names.append(_corpus_name(str(path), archive_fingerprint(str(path))))
+    assert names[0] != names[1]
+    assert names[0] == names[2]
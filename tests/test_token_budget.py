@@ -0,0 +1,34 @@
+# tests/test_token_budget.py
+
+from tools.token_budget import Section, count_tokens, fit_sections, trim_text
+
+
+def test_fit_sections_trims_largest_section_first():
+    tree = "\n".join(f"├── src/module_{i}.py  (123 B)" for i in range(400))
+    notes = "- keep agents stateless"
+
+    fitted, report = fit_sections(
+        [
+            Section("prompt", "Add a logging agent", keep="none"),
+            Section("tree", tree),
+            Section("notes", notes),
+        ],
+        budget=500,
+        phase="P3",
+        reserve=20,
+    )
+
+    assert fitted["prompt"] == "Add a logging agent"
+    assert fitted["notes"] == notes
+    assert fitted["tree"].endswith("lines trimmed)")
+    assert report.after <= 500 < report.before
+    assert report.sections["notes"] == (count_tokens(notes), count_tokens(notes))
+
+
+def test_trim_text_tail_keeps_last_lines():
+    log = "\n".join(f"line {i}" for i in range(100))
+    trimmed = trim_text(log, 40, keep="tail")
+
+    assert trimmed.splitlines()[0].endswith("lines trimmed)")
+    assert trimmed.splitlines()[-1] == "line 99"
+    assert count_tokens(trimmed) <= 40
@@ -0,0 +1,63 @@
+import numpy as np
+
+from tools.vector_index import EmbeddingIndex, top_k_cosine
+
+
+def _fake_encoder(calls):
+    def encode(texts):
+        calls.extend(texts)
+        return [[float(len(t)), float(t.count("a")), 1.0] for t in texts]
+
+    return encode
+
+
+def test_index_embeds_only_new_paragraphs(tmp_path):
+    calls = []
+    index = EmbeddingIndex(tmp_path)
+    first = index.embed(["alpha", "beta", "alpha"], _fake_encoder(calls))
+    assert first.shape == (3, 3)
+    assert calls == ["alpha", "beta"]
+
+    reopened = EmbeddingIndex(tmp_path)
+    calls.clear()
+    again = reopened.embed(["beta", "gamma"], _fake_encoder(calls))
+    assert calls == ["gamma"]
+    assert np.array_equal(again[0], first[1])
+    assert len(reopened) == 3
+
+
+def test_top_k_cosine_orders_best_first():
+    matrix = np.array([[1, 0], [0, 1], [1, 1], [-1, 0]], dtype=np.float32)
+    assert top_k_cosine(matrix, np.array([1, 0.1], dtype=np.float32), 2) == [0, 2]
+    assert top_k_cosine(matrix, np.array([0, 1], dtype=np.float32), 10)[0] == 1
+
+
+def _unit(text):
+    v = np.array([float(len(text)), float(text.count("a")), 1.0], dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def test_concurrent_writers_keep_rows_aligned(tmp_path):
+    # Two handles on one directory stand in for two processes.
+    first, second = EmbeddingIndex(tmp_path), EmbeddingIndex(tmp_path)
+    first.embed(["alpha"], _fake_encoder([]))
+    second.embed(["bb"], _fake_encoder([]))  # stale view: saw no rows at open
+
+    calls = []
+    rows = first.embed(["bb", "aaaa"], _fake_encoder(calls))
+    assert calls == ["aaaa"]  # "bb" was appended by the other handle
+    assert np.allclose(rows, [_unit("bb"), _unit("aaaa")])
+
+    fresh = EmbeddingIndex(tmp_path)
+    assert len(fresh) == 3
+    assert np.allclose(fresh.embed(["alpha", "bb", "aaaa"], _fake_encoder([])),
+                       [_unit("alpha"), _unit("bb"), _unit("aaaa")])
+
+
+def test_torn_append_is_cut_before_next_write(tmp_path):
+    index = EmbeddingIndex(tmp_path)
+    index.embed(["alpha"], _fake_encoder([]))
+    with open(tmp_path / "vectors.f32", "ab") as fp:
+        fp.write(b"\x00" * 5)  # half-written row from a crashed writer
+    index.embed(["bb"], _fake_encoder([]))
+    assert np.allclose(EmbeddingIndex(tmp_path).embed(["bb"], _fake_encoder([])), [_unit("bb")])
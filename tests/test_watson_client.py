@@ -0,0 +1,73 @@
+import importlib.util
+import sys
+import types
+
+import pytest
+
+pytest.importorskip("pydantic")
+pytest.importorskip("backoff")
+
+
+class _StubCredentials:
+    def __init__(self, url=None, api_key=None):
+        self.url, self.api_key = url, api_key
+
+
+class _StubAPIClient:
+    def __init__(self, credentials, project_id=None):
+        self.credentials, self.project_id = credentials, project_id
+
+
+class _StubInference:
+    """Accepts exactly the keyword arguments the SDK's `ModelInference` does."""
+
+    built = []
+
+    def __init__(self, *, model_id, api_client=None, credentials=None, project_id=None):
+        self.model_id, self.api_client, self.project_id = model_id, api_client, project_id
+        self.calls = []
+        _StubInference.built.append(self)
+
+    def generate(self, prompt=None, params=None):
+        self.calls.append((prompt, params))
+        return {"results": [{"generated_text": f" echo {self.model_id}"}]}
+
+
+@pytest.fixture
+def watson(monkeypatch):
+    if importlib.util.find_spec("ibm_watsonx_ai") is None:
+        sdk = types.ModuleType("ibm_watsonx_ai")
+        models = types.ModuleType("ibm_watsonx_ai.foundation_models")
+        sdk.APIClient, sdk.Credentials = _StubAPIClient, _StubCredentials
+        models.Model = models.ModelInference = _StubInference
+        monkeypatch.setitem(sys.modules, "ibm_watsonx_ai", sdk)
+        monkeypatch.setitem(sys.modules, "ibm_watsonx_ai.foundation_models", models)
+    from llm import watson_client
+
+    monkeypatch.setattr(watson_client, "APIClient", _StubAPIClient)
+    monkeypatch.setattr(watson_client, "Credentials", _StubCredentials)
+    monkeypatch.setattr(watson_client, "ModelInference", _StubInference)
+    _StubInference.built = []
+    return watson_client
+
+
+def test_models_share_one_public_api_client(watson):
+    client = watson.WatsonClient("key", "proj", url="https://x", default_model="granite", max_models=1)
+    api = client._api_client
+    assert isinstance(api, _StubAPIClient) and api.project_id == "proj"
+    assert api.credentials.api_key == "key" and api.credentials.url == "https://x"
+
+    client._get_model("llama")
+    client._get_model("mixtral")  # evicts "llama" (max_models=1)
+    assert client._get_model("mixtral") is _StubInference.built[-1]
+    assert [m.model_id for m in _StubInference.built] == ["granite", "llama", "mixtral"]
+    assert all(m.api_client is api and m.project_id == "proj" for m in _StubInference.built)
+
+
+def test_chat_passes_generation_params(watson):
+    client = watson.WatsonClient("key", "proj", default_model="granite", default_temperature=0.3)
+    reply = client.chat([{"role": "user", "content": "hi"}], max_tokens=64, model_id="llama")
+    assert reply == "echo llama"
+    (prompt, params), = _StubInference.built[-1].calls
+    assert prompt == "User:\nhi"
+    assert params == {"temperature": 0.3, "max_new_tokens": 64}
@@ -0,0 +1,41 @@
+import zipfile
+
+from tools.zip_docs import doc_kind, iter_docs, module_docstring
+
+
+def test_doc_kind_classification():
+    assert doc_kind("README.md") == "readme"
+    assert doc_kind("pkg/README.rst") == "readme"
+    assert doc_kind("docs/guide/setup.md") == "doc"
+    assert doc_kind("docs/adr/0003-use-sqlite.md") == "adr"
+    assert doc_kind("notes/0012-drop-py2.md") == "adr"
+    assert doc_kind("src/app/models.py") == "module"
+    assert doc_kind("node_modules/pkg/README.md") is None
+    assert doc_kind("src/data.json") is None
+    assert doc_kind("notes/todo.md") is None
+
+
+def test_module_docstring_tolerates_truncation():
+    src = '#!/usr/bin/env python\n# comment\n"""Service layer.\n\nDetails."""\nimport os\ndef f(:'
+    assert module_docstring(src) == "Service layer.\n\nDetails."
+    assert module_docstring("import os\n") is None
+    assert module_docstring('"""unterminated') is None
+
+
+def test_iter_docs_streams_from_archive(tmp_path):
+    archive = tmp_path / "proj.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("README.md", "# Project\n")
+        zf.writestr("docs/design.rst", "Design\n======\n")
+        zf.writestr("src/core.py", '"""Core module."""\nx = 1\n')
+        zf.writestr("src/noop.py", "x = 1\n")
+        zf.writestr("assets/logo.png", b"\x89PNG")
+    assert list(iter_docs(str(archive))) == [
+        ("README.md", "# Project\n"),
+        ("docs/design.rst", "Design\n======\n"),
+        ("src/core.py", "Core module."),
+    ]
+    assert [n for n, _ in iter_docs(str(archive), docstrings=False)] == [
+        "README.md",
+        "docs/design.rst",
+    ]